@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Kalibrierung der Schnellschätzung - vergleicht estimate_output_size_fast()
+mit der exakten Schätzung über alle Zielformate und mehrere Qualitätsstufen
+"""
+
+import os
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import (SUPPORTED_FORMATS, QUALITY_SETTINGS,
+                               estimate_output_size, estimate_output_size_fast)
+
+
+def make_photo(width, height):
+    """Fotoähnliches Testbild: weiche Strukturen, Verlauf und feines Rauschen"""
+    coarse = Image.effect_noise((max(1, width // 8), max(1, height // 8)), 80)
+    coarse = coarse.resize((width, height), Image.Resampling.BICUBIC)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    fine = Image.effect_noise((width, height), 20).filter(ImageFilter.GaussianBlur(1))
+    return Image.merge('RGB', (coarse, gradient, fine))
+
+
+def make_graphic(width, height):
+    """Grafikähnliches Testbild: flache Farbflächen mit harten Kanten"""
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    step = max(8, min(width, height) // 12)
+    for index, y in enumerate(range(0, height, step)):
+        for x in range(0, width, step * 3):
+            if (x // step + index) % 4 == 0:
+                color = ((x * 7) % 256, (y * 5) % 256, (index * 40) % 256)
+                draw.rectangle([x, y, x + step * 2, y + step // 2], fill=color)
+    return img
+
+
+def quality_levels(output_format):
+    """Gibt die zu prüfenden Qualitätsstufen für ein Format zurück"""
+    if output_format not in QUALITY_SETTINGS:
+        return [None]
+    settings = QUALITY_SETTINGS[output_format]
+    middle = (settings['min'] + settings['max']) // 2
+    return sorted({settings['min'] if settings['min'] > 0 else 1, middle,
+                   settings['default'], settings['max']})
+
+
+def calibrate(name, image, scale):
+    """Vergleicht Schnell- und exakte Schätzung für ein Bild"""
+    width = max(1, int(image.size[0] * scale))
+    height = max(1, int(image.size[1] * scale))
+    
+    rows = []
+    for output_format in sorted(set(SUPPORTED_FORMATS.values())):
+        for quality in quality_levels(output_format):
+            start = time.perf_counter()
+            exact = estimate_output_size(image, output_format, quality, width, height)
+            exact_time = time.perf_counter() - start
+            
+            start = time.perf_counter()
+            result = estimate_output_size_fast(image, output_format, quality, width, height)
+            fast_time = time.perf_counter() - start
+            
+            if exact is None or result is None:
+                continue
+            
+            fast, bound = result
+            rows.append({
+                'image': name,
+                'format': output_format,
+                'quality': quality,
+                'exact_mb': exact,
+                'fast_mb': fast,
+                'bound_mb': bound,
+                'error': (fast - exact) / exact if exact else 0.0,
+                'covered': abs(fast - exact) <= bound,
+                'exact_s': exact_time,
+                'fast_s': fast_time,
+            })
+    return rows
+
+
+def print_rows(rows):
+    print(f"{'Bild':<14} {'Format':<6} {'Q':>4} {'Exakt MB':>9} {'Schnell MB':>11} "
+          f"{'Fehler':>8} {'Schranke':>9} {'Exakt ms':>9} {'Schnell ms':>11}")
+    print('-' * 90)
+    for row in rows:
+        quality = '-' if row['quality'] is None else row['quality']
+        marker = '' if row['covered'] else ' !'
+        print(f"{row['image']:<14} {row['format']:<6} {quality:>4} "
+              f"{row['exact_mb']:>9.3f} {row['fast_mb']:>11.3f} "
+              f"{row['error'] * 100:>+7.1f}% {row['bound_mb']:>9.3f} "
+              f"{row['exact_s'] * 1000:>9.0f} {row['fast_s'] * 1000:>11.0f}{marker}")
+
+
+def print_summary(rows):
+    print(f"\n{'Format':<6} {'Mittl. |Fehler|':>16} {'Max |Fehler|':>13} "
+          f"{'Abdeckung':>10} {'Beschleunigung':>15}")
+    print('-' * 64)
+    for output_format in sorted({row['format'] for row in rows}):
+        subset = [row for row in rows if row['format'] == output_format]
+        errors = [abs(row['error']) for row in subset]
+        covered = sum(row['covered'] for row in subset) / len(subset)
+        exact_time = sum(row['exact_s'] for row in subset)
+        fast_time = sum(row['fast_s'] for row in subset)
+        speedup = exact_time / fast_time if fast_time > 0 else float('inf')
+        print(f"{output_format:<6} {sum(errors) / len(errors) * 100:>15.1f}% "
+              f"{max(errors) * 100:>12.1f}% {covered * 100:>9.0f}% {speedup:>14.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Kalibriert die Schnellschätzung gegen die exakte Schätzung')
+    parser.add_argument('images', nargs='*',
+                       help='Eigene Testbilder (Standard: synthetische Bilder)')
+    parser.add_argument('--size', default='4000x3000',
+                       help='Auflösung der synthetischen Testbilder (Standard: 4000x3000)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                       help='Skalierungsfaktor der Zielauflösung (Standard: 1.0)')
+    args = parser.parse_args()
+    
+    if args.images:
+        sources = [(os.path.basename(path), Image.open(path)) for path in args.images]
+    else:
+        width, height = (int(value) for value in args.size.lower().split('x'))
+        sources = [('foto', make_photo(width, height)),
+                   ('grafik', make_graphic(width, height))]
+    
+    rows = []
+    for name, image in sources:
+        rows.extend(calibrate(name, image, args.scale))
+    
+    print_rows(rows)
+    print_summary(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Benchmark der Konvertierungsmatrix - misst jede Kombination aus Quell- und
+Zielformat (SUPPORTED_FORMATS) mit synthetischen, reproduzierbaren Testbildern
+in mehreren Auflösungen und Qualitätsstufen.
+
+Je Fall werden Dekodieren, Skalieren (prepare), Kodieren und die komplette
+Konvertierung über Converter.convert() gemessen, dazu beide Schätzungen,
+Spitzen-RSS und Ausgabegröße. Jeder Fall läuft in einem frischen Prozess,
+damit der Spitzen-RSS nicht von vorherigen Fällen stammt.
+
+    python benchmarks/conversion_matrix.py run -o basis.json
+    python benchmarks/conversion_matrix.py run -o neu.json
+    python benchmarks/conversion_matrix.py compare basis.json neu.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+import PIL
+from PIL import Image, ImageDraw, ImageFilter
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import (SUPPORTED_FORMATS, QUALITY_SETTINGS, ConversionJob, Converter,
+                               format_extension)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Version des JSON-Formats der Ergebnisse
+RESULTS_VERSION = 1
+
+IMAGE_KINDS = ('foto', 'grafik', 'alpha', 'palette')
+
+# Gemessene Zeiten und Größen; compare() prüft diese Kennzahlen
+TIME_METRICS = ('decode_s', 'resize_s', 'encode_s', 'total_s')
+COMPARE_METRICS = TIME_METRICS + ('peak_rss_mb', 'output_bytes')
+
+# Zeitunterschiede unterhalb dieser Schwelle gelten als Messrauschen
+DEFAULT_MIN_DELTA_S = 0.005
+
+
+def noise(size, seed, scale=1):
+    """Reproduzierbares Graustufen-Rauschen (SHAKE-128 statt Zufallsgenerator)"""
+    width, height = max(1, size[0] // scale), max(1, size[1] // scale)
+    data = hashlib.shake_128(f'picconverter-{seed}'.encode()).digest(width * height)
+    img = Image.frombytes('L', (width, height), data)
+    if scale > 1:
+        img = img.resize(size, Image.Resampling.BICUBIC)
+    return img
+
+
+def make_image(kind, width, height):
+    """Erzeugt ein synthetisches Testbild der Art kind (siehe IMAGE_KINDS)"""
+    if kind in ('foto', 'alpha'):
+        # Weiche Strukturen, Verlauf und feines Rauschen
+        gradient = Image.linear_gradient('L').resize((width, height))
+        fine = noise((width, height), 'fine').filter(ImageFilter.GaussianBlur(1))
+        img = Image.merge('RGB', (noise((width, height), 'coarse', 8), gradient, fine))
+        if kind == 'alpha':
+            alpha = Image.radial_gradient('L').resize((width, height))
+            img.putalpha(alpha.point(lambda value: 255 - value))
+        return img
+    
+    # Flache Farbflächen mit harten Kanten
+    img = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    step = max(8, min(width, height) // 12)
+    for index, y in enumerate(range(0, height, step)):
+        for x in range(0, width, step * 3):
+            if (x // step + index) % 4 == 0:
+                color = ((x * 7) % 256, (y * 5) % 256, (index * 40) % 256)
+                draw.rectangle([x, y, x + step * 2, y + step // 2], fill=color)
+    if kind == 'palette':
+        img = img.quantize(64, dither=Image.Dither.NONE)
+    return img
+
+
+def quality_levels(output_format):
+    """Niedrigste, Standard- und höchste Qualitätsstufe eines Formats"""
+    if output_format not in QUALITY_SETTINGS:
+        return [None]
+    settings = QUALITY_SETTINGS[output_format]
+    return sorted({max(1, settings['min']), settings['default'], settings['max']})
+
+
+def output_formats():
+    return sorted(set(SUPPORTED_FORMATS.values()))
+
+
+def parse_sizes(text):
+    """Liest '640x480,1920x1080' als Liste von (breite, höhe)"""
+    sizes = []
+    for part in text.split(','):
+        width, height = (int(value) for value in part.strip().lower().split('x'))
+        sizes.append((width, height))
+    return sizes
+
+
+def peak_rss_mb():
+    """Spitzen-RSS des aktuellen Prozesses in MB oder None (Linux: KB, macOS: Bytes)"""
+    if resource is None:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return usage / (1024 * 1024)
+    return usage / 1024
+
+
+def write_sources(workdir, sizes, kinds):
+    """
+    Speichert jedes Testbild in jedem Quellformat. Gibt (art, auflösung,
+    quellformat, pfad) zurück; nicht speicherbare Kombinationen (z.B. RGBA
+    als JPEG) werden ausgelassen.
+    """
+    sources = []
+    for width, height in sizes:
+        for kind in kinds:
+            img = make_image(kind, width, height)
+            for source_format in output_formats():
+                path = workdir / f"{kind}_{width}x{height}.{format_extension(source_format)}"
+                try:
+                    img.save(path, format=source_format)
+                except (OSError, ValueError):
+                    continue
+                sources.append((kind, f"{width}x{height}", source_format, str(path)))
+    return sources
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    value = function(*args)
+    return time.perf_counter() - start, value
+
+
+def run_case(case):
+    """
+    Misst einen Fall im Worker-Prozess. Zeiten sind das Minimum über
+    case['repeat'] Wiederholungen.
+    """
+    converter = Converter()
+    source = case['source_path']
+    output = Path(case['workdir']) / f"case_{case['index']}.{format_extension(case['target'])}"
+    
+    with converter.open(source) as img:
+        source_size = img.size
+    width = max(1, round(source_size[0] * case['scale']))
+    height = max(1, round(source_size[1] * case['scale']))
+    job = ConversionJob(case['target'], case['quality'], width, height)
+    
+    row = {key: case[key] for key in ('image', 'size', 'source', 'target', 'quality')}
+    row['source_size'] = list(source_size)
+    row['target_size'] = [width, height]
+    row['error'] = None
+    
+    timings = {metric: [] for metric in TIME_METRICS}
+    try:
+        # Aufwärmen: Plugins und Codecs initialisieren sich beim ersten Gebrauch
+        converter.convert(source, str(output), job)
+        
+        for _ in range(case['repeat']):
+            # Einzelne Stufen: volles Dekodieren, prepare() auf den Pixeln, Speichern
+            with converter.open(source) as img:
+                decode, _ = timed(img.load)
+                resize, prepared = timed(converter.prepare, img, job)
+                encode, _ = timed(converter.save, prepared, str(output), job)
+            
+            # Gesamtzeit über den echten Pfad (inkl. verkleinertem Dekodieren)
+            total, (success, error) = timed(converter.convert, source, str(output), job)
+            if not success:
+                raise RuntimeError(error)
+            
+            timings['decode_s'].append(decode)
+            timings['resize_s'].append(resize)
+            timings['encode_s'].append(encode)
+            timings['total_s'].append(total)
+        
+        row.update({metric: min(values) for metric, values in timings.items()})
+        row['output_bytes'] = os.path.getsize(output)
+        
+        if case['estimates']:
+            with converter.open(source) as img:
+                row['estimate_s'], estimate = timed(converter.estimate, img, job)
+            with converter.open(source) as img:
+                row['estimate_fast_s'], fast = timed(converter.estimate_fast, img, job)
+            row['estimate_bytes'] = None if estimate is None else round(estimate * 1024 * 1024)
+            row['estimate_fast_bytes'] = None if fast is None else round(fast[0] * 1024 * 1024)
+    except Exception as e:
+        row['error'] = str(e)
+    finally:
+        if output.exists():
+            output.unlink()
+    
+    row['peak_rss_mb'] = peak_rss_mb()
+    return row
+
+
+def build_cases(sources, args, workdir):
+    cases = []
+    for kind, size, source_format, path in sources:
+        for target in output_formats():
+            for quality in quality_levels(target):
+                cases.append({
+                    'index': len(cases),
+                    'image': kind,
+                    'size': size,
+                    'source': source_format,
+                    'target': target,
+                    'quality': quality,
+                    'source_path': path,
+                    'workdir': str(workdir),
+                    'scale': args.scale,
+                    'repeat': args.repeat,
+                    'estimates': not args.no_estimate,
+                })
+    return cases
+
+
+def case_key(row):
+    """Identifiziert einen Fall über mehrere Läufe hinweg"""
+    return (row['image'], row['size'], row['source'], row['target'], row['quality'])
+
+
+def format_case(row):
+    quality = '-' if row['quality'] is None else row['quality']
+    return f"{row['image']:<8} {row['size']:>10} {row['source']:<5} → {row['target']:<5} {quality:>4}"
+
+
+def print_row(row):
+    if row['error']:
+        print(f"{format_case(row)}  FEHLER: {row['error']}")
+        return
+    rss = '-' if row['peak_rss_mb'] is None else f"{row['peak_rss_mb']:.0f}"
+    print(f"{format_case(row)} {row['decode_s'] * 1000:>8.1f} {row['resize_s'] * 1000:>8.1f} "
+          f"{row['encode_s'] * 1000:>8.1f} {row['total_s'] * 1000:>8.1f} {rss:>7} "
+          f"{row['output_bytes'] / 1024:>10.1f}")
+
+
+def run(args):
+    kinds = args.images.split(',') if args.images else list(IMAGE_KINDS)
+    unknown = set(kinds) - set(IMAGE_KINDS)
+    if unknown:
+        print(f"Fehler: Unbekannte Bildart(en): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    
+    workdir = Path(tempfile.mkdtemp(prefix='picconverter_bench_'))
+    try:
+        start = time.perf_counter()
+        sources = write_sources(workdir, parse_sizes(args.sizes), kinds)
+        cases = build_cases(sources, args, workdir)
+        print(f"{len(sources)} Quelldateien, {len(cases)} Fälle\n")
+        
+        print(f"{'Bild':<8} {'Auflösung':>10} {'Quelle':<5}   {'Ziel':<5} {'Q':>4} "
+              f"{'Dek. ms':>8} {'Skal. ms':>8} {'Kod. ms':>8} {'Ges. ms':>8} {'RSS MB':>7} "
+              f"{'Ausgabe KB':>10}")
+        print('-' * 100)
+        
+        # Frischer Prozess je Fall (maxtasksperchild=1), damit der Spitzen-RSS zum Fall gehört.
+        # Der Forkserver lädt Pillow und die Engine einmal vor, statt je Fall neu zu starten.
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['PIL.Image', 'picconverter_core'])
+        else:
+            context = multiprocessing.get_context('spawn')
+        rows = []
+        with context.Pool(args.jobs, maxtasksperchild=1) as pool:
+            for row in pool.imap(run_case, cases):
+                print_row(row)
+                rows.append(row)
+        elapsed = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    results = {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'sizes': args.sizes,
+            'scale': args.scale,
+            'repeat': args.repeat,
+            'jobs': args.jobs,
+            'elapsed_s': elapsed,
+        },
+        'results': rows,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1)
+    
+    failed = sum(1 for row in rows if row['error'])
+    print(f"\n{len(rows)} Fälle in {elapsed:.1f} s, {failed} mit Fehler - Ergebnisse: {args.output}")
+    return 0
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path}: unbekannte Ergebnisversion {results.get('version')}")
+    return {case_key(row): row for row in results['results'] if not row['error']}
+
+
+def compare_rows(base, new, threshold, min_delta):
+    """
+    Vergleicht zwei Läufe. Gibt (regressionen, verbesserungen) als Listen von
+    (fall, kennzahl, alt, neu) zurück. Zeiten zählen erst ab min_delta Sekunden
+    Unterschied, damit Rauschen bei sehr schnellen Fällen nicht auffällt.
+    """
+    regressions = []
+    improvements = []
+    for key in sorted(set(base) & set(new), key=str):
+        for metric in COMPARE_METRICS:
+            old, value = base[key].get(metric), new[key].get(metric)
+            if old is None or value is None:
+                continue
+            if metric in TIME_METRICS and abs(value - old) < min_delta:
+                continue
+            if value > old * (1 + threshold):
+                regressions.append((new[key], metric, old, value))
+            elif value < old * (1 - threshold):
+                improvements.append((new[key], metric, old, value))
+    return regressions, improvements
+
+
+def print_changes(title, changes):
+    print(f"\n{title} ({len(changes)}):")
+    for row, metric, old, value in changes:
+        ratio = value / old if old else float('inf')
+        print(f"  {format_case(row)}  {metric:<12} {old:>12.4g} → {value:>12.4g}  ({ratio:.2f}x)")
+
+
+def compare(args):
+    try:
+        base = load_results(args.base)
+        new = load_results(args.new)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        return 2
+    
+    common = set(base) & set(new)
+    print(f"{len(common)} gemeinsame Fälle "
+          f"({len(set(base) - set(new))} nur in {args.base}, {len(set(new) - set(base))} nur in {args.new})")
+    
+    # Gesamtbild: geometrisches Mittel der Gesamtzeit-Verhältnisse
+    ratios = [new[key]['total_s'] / base[key]['total_s'] for key in common
+              if base[key]['total_s'] > 0]
+    if ratios:
+        product = 1.0
+        for ratio in ratios:
+            product *= ratio ** (1 / len(ratios))
+        print(f"Gesamtzeit neu/alt (geometrisches Mittel): {product:.3f}x")
+    
+    regressions, improvements = compare_rows(base, new, args.threshold, args.min_delta)
+    if args.verbose:
+        print_changes("Verbesserungen", improvements)
+    print_changes("Regressionen", regressions)
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Misst die Konvertierungsmatrix aller Quell- und Zielformate')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    run_parser = subparsers.add_parser('run', help='Benchmark ausführen und als JSON speichern')
+    run_parser.add_argument('-o', '--output', default='benchmark.json',
+                           help='JSON-Ergebnisdatei (Standard: benchmark.json)')
+    run_parser.add_argument('--sizes', default='640x480,1920x1080',
+                           help='Auflösungen der Testbilder (Standard: 640x480,1920x1080)')
+    run_parser.add_argument('--images',
+                           help=f"Bildarten, kommagetrennt (Standard: {','.join(IMAGE_KINDS)})")
+    run_parser.add_argument('--scale', type=float, default=0.5,
+                           help='Skalierungsfaktor der Zielauflösung (Standard: 0.5)')
+    run_parser.add_argument('--repeat', type=int, default=3,
+                           help='Wiederholungen je Fall, gewertet wird das Minimum (Standard: 3)')
+    run_parser.add_argument('-j', '--jobs', type=int, default=1,
+                           help='Parallele Fälle - verfälscht Zeiten bei Werten > 1 (Standard: 1)')
+    run_parser.add_argument('--no-estimate', action='store_true',
+                           help='Schätzungen nicht messen')
+    
+    compare_parser = subparsers.add_parser('compare', help='Zwei Läufe vergleichen')
+    compare_parser.add_argument('base', help='Ergebnisdatei des Referenzlaufs')
+    compare_parser.add_argument('new', help='Ergebnisdatei des neuen Laufs')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                               help='Relative Abweichung, ab der gemeldet wird (Standard: 0.15)')
+    compare_parser.add_argument('--min-delta', type=float, default=DEFAULT_MIN_DELTA_S,
+                               help='Minimale Zeitdifferenz in Sekunden '
+                                    f'(Standard: {DEFAULT_MIN_DELTA_S})')
+    compare_parser.add_argument('-v', '--verbose', action='store_true',
+                               help='Auch Verbesserungen anzeigen')
+    
+    args = parser.parse_args()
+    sys.exit(run(args) if args.command == 'run' else compare(args))
+
+
+if __name__ == '__main__':
+    main()
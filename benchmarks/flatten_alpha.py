@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark Transparenz entfernen - vergleicht flatten_alpha() mit dem
+bisherigen Verfahren (weißer Hintergrund, P -> RGBA, split() und paste())
+auf 8K-PNGs mit Alphakanal. Jede Messung läuft in einem eigenen Prozess.
+Der zusätzliche Spitzen-Speicher (RSS) wird nur unter Linux gemessen, wo
+sich der Höchststand nach dem Dekodieren zurücksetzen lässt.
+"""
+
+import os
+import sys
+import hashlib
+import time
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import flatten_alpha, parse_color
+
+
+def legacy_flatten(img, background):
+    """Bisheriges Verfahren aus Converter.prepare() (nur um die Farbe erweitert)"""
+    flat = Image.new('RGB', img.size, background)
+    if img.mode == 'P':
+        img = img.convert('RGBA')
+    flat.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
+    return flat
+
+
+METHODS = {'bisher': legacy_flatten, 'flatten_alpha': flatten_alpha}
+
+
+def make_source(width, height):
+    """RGBA-Testbild: Rauschen mit weichem Alpha-Verlauf und voll transparenten Streifen"""
+    noise = Image.effect_noise((width, height), 60)
+    gradient = Image.linear_gradient('L').resize((width, height))
+    alpha = ImageChops.multiply(Image.linear_gradient('L').rotate(90).resize((width, height)),
+                                ImageChops.invert(gradient))
+    return Image.merge('RGBA', (noise, gradient, ImageChops.offset(noise, width // 3, 0), alpha))
+
+
+def write_cases(directory, width, height):
+    """Schreibt RGBA-, LA- und Paletten-PNG und gibt [(name, pfad)] zurück"""
+    source = make_source(width, height)
+    cases = [('RGBA', source), ('LA', source.convert('LA')),
+             ('P', source.quantize(256, method=Image.Quantize.FASTOCTREE))]
+    paths = []
+    for name, image in cases:
+        path = os.path.join(directory, f'{name.lower()}.png')
+        image.save(path, compress_level=1)
+        paths.append((name, path))
+    return paths
+
+
+def peak_rss():
+    """
+    RSS-Höchststand nach dem Zurücksetzen (VmHWM) in Bytes, None ohne /proc.
+    getrusage() taugt hier nicht, es enthält den Speicher des Elternprozesses
+    vor exec().
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Setzt den RSS-Höchststand des Prozesses zurück, gibt False zurück wenn nicht möglich"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def measure(task):
+    """
+    Läuft im frischen Prozess: (sekunden, zusätzlicher spitzen_rss oder None,
+    sha256 der ausgabe)
+    """
+    path, method, background, repeats = task
+    with Image.open(path) as img:
+        img.load()
+        baseline = peak_rss() if reset_peak_rss() else None
+        best = None
+        for _ in range(repeats):
+            start = time.perf_counter()
+            flat = METHODS[method](img, background)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+            if _ < repeats - 1:
+                del flat
+        extra = None if baseline is None else peak_rss() - baseline
+        return best, extra, hashlib.sha256(flat.tobytes()).hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vergleicht flatten_alpha() mit dem bisherigen Verfahren')
+    parser.add_argument('images', nargs='*',
+                       help='Eigene PNGs mit Transparenz (Standard: synthetische 8K-Bilder)')
+    parser.add_argument('--size', default='7680x4320',
+                       help='Auflösung der synthetischen Testbilder (Standard: 7680x4320)')
+    parser.add_argument('--background', default='#ffffff',
+                       help='Hintergrundfarbe (Standard: #ffffff)')
+    parser.add_argument('--repeats', type=int, default=3,
+                       help='Wiederholungen je Messung, gewertet wird die schnellste (Standard: 3)')
+    args = parser.parse_args()
+    
+    background = parse_color(args.background)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.images:
+            cases = [(os.path.basename(path), path) for path in args.images]
+        else:
+            width, height = (int(value) for value in args.size.lower().split('x'))
+            print(f"Erzeuge Testbilder {width}x{height}...")
+            cases = write_cases(directory, width, height)
+        
+        print(f"\n{'Bild':<14} {'Verfahren':<14} {'Zeit':>9} {'RSS +':>12}  Ergebnis")
+        print('-' * 65)
+        context = multiprocessing.get_context('spawn')
+        for name, path in cases:
+            outputs = {}
+            for method in METHODS:
+                with context.Pool(1, maxtasksperchild=1) as pool:
+                    seconds, rss, outputs[method] = pool.apply(
+                        measure, ((path, method, background, args.repeats),))
+                same = '' if method == 'bisher' else (
+                    'identisch' if outputs[method] == outputs['bisher'] else 'abweichend')
+                memory = '-' if rss is None else f"{rss / (1024 * 1024):.0f} MB"
+                print(f"{name:<14} {method:<14} {seconds * 1000:>7.0f}ms "
+                      f"{memory:>12}  {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark Eingabe per Memory-Mapping - vergleicht Pillows gepuffertes
+Laden mit load_mapped() für unkomprimierte BMP-, TIFF- und PPM-Dateien
+und zeigt den Anteil des Ladens an einer Konvertierung nach WebP. Die
+Dateien liegen nach dem Schreiben im Seiten-Cache, gemessen wird also
+das Kopieren und Entpacken, nicht das Lesen vom Datenträger.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import ConversionJob, Converter
+from picconverter_mmap import load_mapped
+
+
+def write_cases(directory, width, height):
+    """Schreibt die Testbilder und gibt [(name, pfad)] zurück"""
+    source = Image.effect_noise((width, height), 60).convert('RGB')
+    cases = [('BMP 24 Bit', 'rgb.bmp', {}),
+             ('TIFF RGB', 'rgb.tif', {}),
+             ('TIFF Streifen', 'strips.tif', {'tiffinfo': {278: 64}}),
+             ('PPM', 'rgb.ppm', {})]
+    paths = []
+    for name, filename, options in cases:
+        path = os.path.join(directory, filename)
+        source.save(path, **options)
+        paths.append((name, path))
+    return paths
+
+
+def load_buffered(path):
+    img = Image.open(path)
+    img.load()
+    return img
+
+
+def load_with_mmap(path):
+    img = Image.open(path)
+    if not load_mapped(img):
+        img.load()
+    return img
+
+
+def best_time(function, path, repeats):
+    """Schnellste von repeats Ausführungen in Sekunden"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function(path).close()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vergleicht gepuffertes Laden mit load_mapped()')
+    parser.add_argument('images', nargs='*',
+                       help='Eigene unkomprimierte Bilder (Standard: synthetische 8K-Bilder)')
+    parser.add_argument('--size', default='7680x4320',
+                       help='Auflösung der synthetischen Testbilder (Standard: 7680x4320)')
+    parser.add_argument('--repeats', type=int, default=5,
+                       help='Wiederholungen je Messung, gewertet wird die schnellste (Standard: 5)')
+    args = parser.parse_args()
+    
+    converter = Converter()
+    job = ConversionJob('webp', 80, 1920, keep_aspect=True)
+    with tempfile.TemporaryDirectory() as directory:
+        if args.images:
+            cases = [(os.path.basename(path), path) for path in args.images]
+        else:
+            width, height = (int(value) for value in args.size.lower().split('x'))
+            print(f"Erzeuge Testbilder {width}x{height}...")
+            cases = write_cases(directory, width, height)
+        
+        print(f"\n{'Bild':<16} {'gepuffert':>10} {'mmap':>10} {'Faktor':>7} {'-> WebP':>10}")
+        print('-' * 58)
+        for name, path in cases:
+            buffered = best_time(load_buffered, path, args.repeats)
+            mapped = best_time(load_with_mmap, path, args.repeats)
+            
+            start = time.perf_counter()
+            success, error = converter.convert(path, os.path.join(directory, 'out.webp'), job)
+            total = time.perf_counter() - start
+            if not success:
+                print(f"{name:<16} Fehler: {error}")
+                continue
+            print(f"{name:<16} {buffered * 1000:>8.0f}ms {mapped * 1000:>8.0f}ms "
+                  f"{buffered / mapped:>6.1f}x {total * 1000:>8.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
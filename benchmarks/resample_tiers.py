@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark Skalierungsstufen - misst für jede Stufe von --resample die
+Dauer des Skalierens und die Abweichung vom bisherigen Ergebnis (PSNR
+gegenüber 'best', also LANCZOS in einem Schritt) bei verschiedenen
+Verkleinerungsfaktoren. Gemessen wird nur resize_image() auf dem bereits
+dekodierten Bild, ohne verkleinertes Laden (draft/reduce) und Kodieren.
+
+Benötigt NumPy (pip install numpy) für die PSNR.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import RESAMPLE_CHOICES, resample_tier, resize_image
+from picconverter_quality import psnr
+
+
+def make_source(width, height):
+    """RGB-Testbild mit feinen Strukturen (Mandelbrot), weichen Verläufen und Rauschen"""
+    detail = Image.effect_mandelbrot((width, height), (-0.75, -0.25, -0.25, 0.25), 200)
+    gradient = Image.radial_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 24)
+    return Image.merge('RGB', (detail, ImageChops.add(gradient, noise, 2, -64),
+                               ImageChops.multiply(detail, Image.linear_gradient('L')
+                                                   .resize((width, height)))))
+
+
+def best_time(img, size, strategy, repeats):
+    """Schnellste von repeats Ausführungen in Sekunden und das Ergebnis"""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = resize_image(img, size, strategy)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vergleicht Dauer und Qualität der Skalierungsstufen')
+    parser.add_argument('image', nargs='?',
+                       help='Eigenes Bild (Standard: synthetisches Testbild)')
+    parser.add_argument('--size', default='6000x4000',
+                       help='Auflösung des synthetischen Testbildes (Standard: 6000x4000)')
+    parser.add_argument('--scales', default='1.01,1.5,2.5,5,10',
+                       help='Verkleinerungsfaktoren, kommagetrennt (Standard: 1.01,1.5,2.5,5,10)')
+    parser.add_argument('--repeats', type=int, default=3,
+                       help='Wiederholungen je Messung, gewertet wird die schnellste (Standard: 3)')
+    args = parser.parse_args()
+    
+    if args.image:
+        img = Image.open(args.image).convert('RGB')
+    else:
+        width, height = (int(value) for value in args.size.lower().split('x'))
+        print(f"Erzeuge Testbild {width}x{height}...")
+        img = make_source(width, height)
+    
+    print(f"\n{'Faktor':>7} {'Ziel':>11} {'Stufe':<16} {'Dauer':>9} {'Faktor':>7} {'PSNR':>9}")
+    print('-' * 64)
+    for scale in (float(value) for value in args.scales.split(',')):
+        size = (max(1, round(img.size[0] / scale)), max(1, round(img.size[1] / scale)))
+        reference_time, reference = best_time(img, size, 'best', args.repeats)
+        for strategy in RESAMPLE_CHOICES:
+            if strategy == 'best':
+                elapsed, quality = reference_time, 'Referenz'
+            else:
+                elapsed, result = best_time(img, size, strategy, args.repeats)
+                quality = f"{psnr(reference, result):.1f} dB"
+            name = (f"auto -> {resample_tier(strategy, img.size, size)}"
+                    if strategy == 'auto' else strategy)
+            print(f"{scale:>6.2f}x {size[0]:>5}x{size[1]:<5} {name:<16} "
+                  f"{elapsed * 1000:>7.0f}ms {reference_time / elapsed:>6.1f}x {quality:>9}")
+        print()
+
+
+if __name__ == '__main__':
+    main()
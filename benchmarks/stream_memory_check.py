@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Speicherprüfung des Streaming-Modus - erzeugt ein synthetisches Riesenbild
+(Standard 40000x40000) streifenweise, konvertiert es per CLI mit --max-memory
+und misst den Spitzen-Speicher (RSS) jedes Konvertierungsprozesses.
+Nur unter Linux/macOS (os.wait4).
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+from PIL import Image, ImageChops
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from picconverter_core import parse_byte_size
+from picconverter_stream import PngStripWriter, open_unbounded
+
+CLI = Path(__file__).resolve().parent.parent / 'picconverter_cli.py'
+
+# (Zielformat, Verkleinerungsfaktor)
+CASES = [('tiff', 1), ('png', 4), ('bmp', 2)]
+
+
+def make_source(path, width, height, band_rows=256):
+    """Schreibt ein fotoähnliches RGB-PNG streifenweise, ohne es im Speicher zu halten"""
+    noise = Image.effect_noise((width, band_rows), 40)
+    gradient = Image.linear_gradient('L').resize((width, band_rows))
+    band = Image.merge('RGB', (noise, gradient, ImageChops.offset(noise, band_rows // 2, 0)))
+    
+    writer = PngStripWriter(path, (width, height), 'RGB', {'compress_level': 1})
+    for top in range(0, height, band_rows):
+        rows = min(band_rows, height - top)
+        strip = ImageChops.offset(band, top // band_rows * 97, 0)
+        writer.write(strip.crop((0, 0, width, rows)))
+    writer.close()
+
+
+def peak_rss_mb(usage):
+    """Spitzen-RSS aus rusage in MB (Linux: KB, macOS: Bytes)"""
+    if sys.platform == 'darwin':
+        return usage.ru_maxrss / (1024 * 1024)
+    return usage.ru_maxrss / 1024
+
+
+def run_case(source, output, size, factor, max_memory):
+    """Konvertiert per CLI und gibt (exitcode, dauer, spitzen_rss_mb) zurück"""
+    command = [sys.executable, str(CLI), str(source), '-f', output.suffix[1:],
+               '-o', str(output), '--max-memory', max_memory]
+    if factor > 1:
+        command += ['-w', str(-(-size[0] // factor)), '--height', str(-(-size[1] // factor))]
+    
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    exitcode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+    return exitcode, elapsed, peak_rss_mb(usage)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Prüft den Speicherbedarf der streifenweisen Konvertierung')
+    parser.add_argument('--size', default='40000x40000',
+                       help='Auflösung des synthetischen Bildes (Standard: 40000x40000)')
+    parser.add_argument('--max-memory', default='384M',
+                       help='An die CLI übergebenes Speicherbudget (Standard: 384M)')
+    parser.add_argument('--limit', default='512M',
+                       help='Zulässiger Spitzen-RSS je Prozess (Standard: 512M)')
+    parser.add_argument('--workdir',
+                       help='Arbeitsverzeichnis für Quell- und Ausgabedateien (Standard: temporär)')
+    args = parser.parse_args()
+    
+    width, height = (int(value) for value in args.size.lower().split('x'))
+    limit_mb = parse_byte_size(args.limit) / (1024 * 1024)
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='picconverter_stream_'))
+    workdir.mkdir(parents=True, exist_ok=True)
+    
+    try:
+        source = workdir / 'quelle.png'
+        print(f"Erzeuge {width}x{height} Testbild...")
+        start = time.perf_counter()
+        make_source(source, width, height)
+        print(f"  {source.stat().st_size / (1024 * 1024):.0f} MB in "
+              f"{time.perf_counter() - start:.1f} s\n")
+        
+        print(f"{'Ziel':<6} {'Faktor':>6} {'Auflösung':>13} {'Dauer s':>8} "
+              f"{'Spitzen-RSS MB':>15} {'Ausgabe MB':>11}  Ergebnis")
+        print('-' * 78)
+        
+        failed = False
+        for output_format, factor in CASES:
+            output = workdir / f"ausgabe_{factor}.{output_format}"
+            exitcode, elapsed, peak = run_case(source, output, (width, height),
+                                               factor, args.max_memory)
+            
+            resolution = '-'
+            if exitcode == 0:
+                with open_unbounded(output) as img:
+                    resolution = f"{img.size[0]}x{img.size[1]}"
+            ok = exitcode == 0 and peak <= limit_mb
+            failed |= not ok
+            output_mb = output.stat().st_size / (1024 * 1024) if output.exists() else 0
+            print(f"{output_format:<6} {factor:>6} {resolution:>13} {elapsed:>8.1f} "
+                  f"{peak:>15.0f} {output_mb:>11.0f}  "
+                  f"{'OK' if ok else 'FEHLER (Exit ' + str(exitcode) + ')' if exitcode else 'ÜBER LIMIT'}")
+            if output.exists():
+                output.unlink()
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+PicConverter Animation - Mehrteilige GIF/WebP-Konvertierung
+
+Animierte Eingaben werden Frame für Frame umgewandelt, skaliert und an den
+Kodierer weitergereicht. Die Kodierer holen die Frames über eine
+FrameSequence einzeln ab, es liegen also nie alle Frames gleichzeitig als
+RGBA-Kopie im Speicher, sondern nur die gerade skalierten. Frame-Dauern und
+Wiederholungen bleiben erhalten. Bei langen Animationen skalieren mehrere
+Threads (Pillow gibt beim Skalieren das GIL frei), dekodiert wird
+zwangsläufig der Reihe nach.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageChops
+
+
+ANIMATION_FORMATS = ('GIF', 'WebP')
+
+# Ab so vielen Frames wird in Threads skaliert, darunter lohnt der Pool nicht
+PARALLEL_MIN_FRAMES = 8
+
+# Skalierte Frames je Thread, die gleichzeitig unterwegs sein dürfen
+FRAMES_IN_FLIGHT_PER_WORKER = 2
+
+
+def is_animated(img):
+    """True für Bilder mit mehr als einem Frame"""
+    return getattr(img, 'is_animated', False) and getattr(img, 'n_frames', 1) > 1
+
+
+def frames_equal(a, b, tolerance=0):
+    """True, wenn sich kein Kanal zweier gleich großer Frames um mehr als tolerance unterscheidet"""
+    # getextrema() statt getbbox(): getbbox() prüft bei RGBA nur den Alphakanal
+    extrema = ImageChops.difference(a, b).getextrema()
+    return max(high for _, high in extrema) <= tolerance
+
+
+def frame_plan(img, dedupe=None):
+    """
+    Gibt [[quellframe, dauer_ms], ...] der auszugebenden Frames zurück. Mit
+    dedupe (Toleranz je Kanal, 0 = nur identische) wird ein Frame, der dem
+    zuletzt behaltenen gleicht, weggelassen und seine Dauer dem behaltenen
+    zugeschlagen. Dafür werden alle Frames einmal dekodiert; ohne dedupe
+    genügen die Frame-Header (WebP liefert die Dauer erst beim Dekodieren).
+    """
+    plan = []
+    kept = None
+    for index in range(img.n_frames):
+        img.seek(index)
+        if dedupe is not None or img.format == 'WEBP':
+            img.load()
+        duration = img.info.get('duration') or 0
+        
+        if dedupe is not None:
+            frame = img.convert('RGBA')
+            if kept is not None and frames_equal(kept, frame, dedupe):
+                plan[-1][1] += duration
+                continue
+            kept = frame
+        plan.append([index, duration])
+    return plan
+
+
+def frame_mode(img):
+    """RGBA, wenn der erste Frame Transparenz enthält, sonst RGB"""
+    img.seek(0)
+    if 'transparency' in img.info:
+        return 'RGBA'
+    if img.mode in ('RGBA', 'LA', 'PA', 'RGBa', 'La'):
+        # Animiertes WebP wird immer als RGBA dekodiert, auch wenn es deckend ist
+        return 'RGBA' if img.getextrema()[-1][0] < 255 else 'RGB'
+    return 'RGB'
+
+
+def _resize_frame(frame, size, resample, reducing_gap):
+    return frame.resize(size, resample, reducing_gap=reducing_gap)
+
+
+def prepared_frames(img, plan, mode, size, workers=1, reducing_gap=None,
+                    resample=Image.Resampling.LANCZOS):
+    """
+    Liefert die Frames aus plan nacheinander im Farbmodus mode und in der
+    Größe size (Filter resample). Mit mehreren workers skalieren Threads, höchstens
+    FRAMES_IN_FLIGHT_PER_WORKER Frames je Thread sind gleichzeitig unterwegs.
+    """
+    def decoded():
+        for index, _ in plan:
+            img.seek(index)
+            # convert() legt die Kopie an, die den nächsten seek() übersteht
+            yield img.convert(mode)
+    
+    if size == img.size:
+        yield from decoded()
+        return
+    if workers <= 1 or len(plan) < PARALLEL_MIN_FRAMES:
+        for frame in decoded():
+            yield _resize_frame(frame, size, resample, reducing_gap)
+        return
+    
+    with ThreadPoolExecutor(workers) as executor:
+        pending = deque()
+        for frame in decoded():
+            pending.append(executor.submit(_resize_frame, frame, size, resample, reducing_gap))
+            if len(pending) >= workers * FRAMES_IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class FrameSequence(Image.Image):
+    """
+    Mehrteiliges Bild, dessen Frames erst bei seek() aus einem Iterator
+    entstehen. Pillow kodiert mit save(save_all=True) jeden Frame direkt nach
+    dem seek(), daher liegt immer nur der aktuelle Frame vor. Nur vorwärts:
+    der Rücksprung, den der WebP-Kodierer nach dem letzten Frame macht,
+    ändert nichts mehr.
+    """
+    
+    def __init__(self, frames, n_frames):
+        super().__init__()
+        self._frames = iter(frames)
+        self.n_frames = n_frames
+        self.is_animated = n_frames > 1
+        self._position = -1
+        self.seek(0)
+    
+    def seek(self, frame):
+        if frame <= self._position:
+            return
+        if frame >= self.n_frames:
+            raise EOFError("Keine weiteren Frames")
+        while self._position < frame:
+            current = next(self._frames)
+            self._position += 1
+        self._show(current)
+    
+    def tell(self):
+        return self._position
+    
+    def _show(self, frame):
+        """Übernimmt die Pixel eines Frames (RGB oder RGBA, ohne Palette)"""
+        self.im = frame.im
+        self._size = frame.size
+        # mode ist ab Pillow 10.1 eine Eigenschaft über _mode, vorher ein Attribut
+        if isinstance(getattr(Image.Image, 'mode', None), property):
+            self._mode = frame.mode
+        else:
+            self.mode = frame.mode
+
+
+def save_animation(img, fp, job, workers=1, timer=None):
+    """
+    Kodiert alle Frames eines animierten Bildes nach job (GIF oder WebP,
+    Qualität, Zielgröße, dedupe_frames) in fp. workers ist die Anzahl der
+    Threads zum Skalieren. Gibt die Anzahl geschriebener Frames zurück.
+    """
+    from picconverter_core import DRAFT_REDUCING_GAP, NULL_TIMER, get_save_kwargs, resample_filter
+    timer = timer or NULL_TIMER
+    
+    with timer.stage('frames'):
+        plan = frame_plan(img, job.dedupe_frames)
+        mode = frame_mode(img)
+    size = job.target_size(img.size)
+    resample, reducing_gap = resample_filter(job.resample, img.size, size)
+    if reducing_gap is None and not job.exact_decode:
+        reducing_gap = DRAFT_REDUCING_GAP
+    loop = img.info.get('loop')
+    
+    save_kwargs = get_save_kwargs(job.output_format, job.quality)
+    save_kwargs['duration'] = [duration for _, duration in plan]
+    if job.output_format == 'GIF':
+        if loop is not None:
+            save_kwargs['loop'] = loop
+        if mode == 'RGBA':
+            # Volle Frames mit Transparenz: vor jedem Frame auf Hintergrund zurücksetzen
+            save_kwargs['disposal'] = 2
+    else:
+        # Ohne Angabe läuft eine GIF-Animation einmal, WebP ohne Angabe endlos
+        save_kwargs['loop'] = 1 if loop is None else loop
+    
+    frames = FrameSequence(prepared_frames(img, plan, mode, size, workers, reducing_gap,
+                                           resample), len(plan))
+    with timer.stage('animation'):
+        frames.save(fp, format=job.output_format, save_all=len(plan) > 1, **save_kwargs)
+    return len(plan)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+PicConverter Async - asyncio-Schnittstelle für Web-Dienste
+
+Konvertiert Bytes zu Bytes in einem eigenen Prozess-Pool, ohne Umweg über
+die Festplatte und ohne die Ereignisschleife zu blockieren:
+
+    async with AsyncConverter(workers=4) as converter:
+        data = await converter.convert(await request.read(),
+                                       {'format': 'webp', 'width': 320})
+
+Höchstens max_in_flight Aufträge liegen gleichzeitig beim Pool, weitere
+warten in convert() auf einen freien Platz (Gegendruck statt unbegrenzter
+Warteschlange). Nach timeout Sekunden endet ein Auftrag mit
+asyncio.TimeoutError; der Worker bricht die Arbeit dann selbst ab. Wird
+der aufrufende Task abgebrochen, verlässt ein noch wartender Auftrag den
+Pool, ein bereits laufender belegt seinen Platz bis zum Ende.
+"""
+
+import os
+import asyncio
+import inspect
+from concurrent.futures.process import BrokenProcessPool
+
+from picconverter_core import ConversionJob, ConversionTimeout, Converter, job_from_options
+
+# Aufträge je Worker, die gleichzeitig beim Pool liegen (einer läuft, einer wartet)
+IN_FLIGHT_PER_WORKER = 2
+
+
+async def _read(source):
+    """Eingabe-Bytes aus bytes oder einem dateiähnlichen Objekt (read() auch als Coroutine)"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    data = source.read()
+    if inspect.isawaitable(data):
+        data = await data
+    return data
+
+
+async def _write(output, data):
+    """Schreibt in ein dateiähnliches Objekt, write() darf eine Coroutine sein"""
+    written = output.write(data)
+    if inspect.isawaitable(written):
+        await written
+
+
+class AsyncConverter:
+    """
+    Verwaltet einen Prozess-Pool für asyncio-Anwendungen. Der Pool wird beim
+    ersten Auftrag gestartet und nach einem abgestürzten Worker neu angelegt.
+    timeout ist das Standard-Zeitlimit je Auftrag in Sekunden (None: keins).
+    """
+    
+    def __init__(self, workers=None, max_in_flight=None, timeout=None, converter=None):
+        self.converter = converter or Converter()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_in_flight = max_in_flight or self.workers * IN_FLIGHT_PER_WORKER
+        self.timeout = timeout
+        self.in_flight = 0
+        self._pool = None
+        self._slots = None
+        self._loop = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def convert(self, source, spec, output=None, timeout=None):
+        """
+        Konvertiert source (bytes oder dateiähnliches Objekt) nach spec
+        (ConversionJob oder dict wie bei job_from_options()) und gibt die
+        Ausgabe-Bytes zurück; mit output werden sie zusätzlich dorthin
+        geschrieben. Das Zeitlimit zählt ab der Übergabe an den Pool, nicht
+        während des Wartens auf einen freien Platz.
+        """
+        job = spec if isinstance(spec, ConversionJob) else job_from_options(spec)
+        data = await _read(source)
+        timeout = self.timeout if timeout is None else timeout
+        
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphore gehört zu einer Ereignisschleife (Python < 3.10)
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        await self._slots.acquire()
+        
+        slots = self._slots
+        try:
+            pool = self._get_pool()
+            future = self.converter.submit_bytes(pool, data, job, timeout)
+        except BaseException:
+            slots.release()
+            raise
+        
+        # Platz erst freigeben, wenn der Worker wirklich fertig ist
+        self.in_flight += 1
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, slots))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except ConversionTimeout as e:
+            raise asyncio.TimeoutError(str(e))
+        except BrokenProcessPool:
+            self._discard_pool(pool)
+            raise
+        
+        if output is not None:
+            await _write(output, result)
+        return result
+    
+    def _release(self, slots):
+        self.in_flight -= 1
+        slots.release()
+    
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = self.converter.pool(self.workers)
+        return self._pool
+    
+    def _discard_pool(self, pool):
+        """Verwirft einen defekten Pool, der nächste Auftrag startet einen neuen"""
+        if self._pool is pool:
+            self._pool = None
+            pool.shutdown(wait=False)
+    
+    async def close(self):
+        """Wartet auf laufende Aufträge und beendet den Pool"""
+        if self._pool is not None:
+            pool, self._pool = self._pool, None
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+_default_converter = None
+
+
+async def convert_async(source, spec, output=None, timeout=None):
+    """
+    Wie AsyncConverter.convert() mit einem gemeinsamen Converter (ein Worker
+    je CPU-Kern), der beim ersten Aufruf angelegt wird
+    """
+    global _default_converter
+    if _default_converter is None:
+        _default_converter = AsyncConverter()
+    return await _default_converter.convert(source, spec, output, timeout)
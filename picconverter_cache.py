@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+PicConverter Cache - Überspringen bereits erledigter Konvertierungen
+
+ConversionCache ist inhaltsadressiert: Der Schlüssel besteht aus dem SHA-256
+des Quellinhalts und allen Parametern der Konvertierung (ConversionJob,
+Pillow-Version). Bei einem Treffer wird die gespeicherte Ausgabe als eigene
+Datei bereitgestellt (Reflink, wo das Dateisystem es kann, sonst Kopie),
+statt erneut zu konvertieren. Einträge teilen nie eine Inode mit einer
+Ausgabe und sind schreibgeschützt - ein späteres Überschreiben der Ausgabe
+lässt den Cache unberührt. Die Größe ist
+begrenzt; verdrängt werden die am längsten nicht genutzten Einträge (LRU
+über die Änderungszeit).
+
+ConversionManifest ist die günstigere Variante für wiederholte Batch-Läufe:
+Eine SQLite-Datei neben dem Ausgabebaum merkt sich Änderungszeit und Größe
+jeder Quelle sowie den Parameter-Fingerabdruck. Unveränderte Quellen mit
+vorhandener Ausgabe werden übersprungen, ohne sie zu lesen.
+"""
+
+import os
+import sys
+import json
+import stat
+import shutil
+import sqlite3
+import hashlib
+import secrets
+from dataclasses import asdict
+from pathlib import Path
+
+import PIL
+
+
+# Bei Änderungen an der Engine erhöhen, die andere Ausgaben erzeugen - oder am
+# Ablageverfahren (2: Kopien statt Hardlinks, ältere Einträge können beschädigt sein)
+CACHE_VERSION = 2
+
+# ioctl FICLONE (Linux): Datei ohne Datenkopie klonen (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Standardname des Manifests im Ausgabeverzeichnis
+MANIFEST_NAME = '.picconverter-manifest.sqlite'
+
+# Anzahl Einträge je Schreibtransaktion des Manifests
+MANIFEST_COMMIT_EVERY = 1000
+
+
+def job_fingerprint(job):
+    """Gibt einen Hash über alle Parameter einer Konvertierung zurück"""
+    params = json.dumps({
+        'job': asdict(job),
+        'pillow': PIL.__version__,
+        'cache': CACHE_VERSION,
+    }, sort_keys=True)
+    return hashlib.sha256(params.encode()).hexdigest()
+
+
+def file_digest(path):
+    """Gibt den SHA-256 des Dateiinhalts als Hex-String zurück"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """
+    Persistenter Cache in einem Verzeichnis. Ist picklebar und kann daher an
+    Worker-Prozesse übergeben werden; hits/misses zählen je Prozess. Mit
+    link=False wird immer kopiert, sonst zuerst ein Reflink versucht.
+    """
+    def __init__(self, directory, max_bytes=None, link=True):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def key(self, input_path, job):
+        """Berechnet den Cache-Schlüssel aus Quellinhalt und Konvertierungsparametern"""
+        digest = hashlib.sha256(file_digest(input_path).encode())
+        digest.update(job_fingerprint(job).encode())
+        return digest.hexdigest()
+    
+    def path(self, key):
+        """Pfad eines Eintrags - auf Unterverzeichnisse verteilt"""
+        return self.directory / key[:2] / key
+    
+    def fetch(self, key, output_path):
+        """Stellt einen gespeicherten Eintrag unter output_path bereit. Gibt True bei Treffer zurück."""
+        entry = self.path(key)
+        output_path = Path(output_path)
+        try:
+            # Die Ausgabe wird erst ersetzt, wenn die Kopie vollständig ist
+            self._place(entry, output_path.parent, output_path)
+            os.utime(entry)  # Für LRU als zuletzt genutzt markieren
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+    
+    def store(self, key, output_path):
+        """Übernimmt eine Kopie einer frisch erzeugten Ausgabe schreibgeschützt in den Cache"""
+        entry = self.path(key)
+        entry.parent.mkdir(exist_ok=True)
+        # Über eine temporäre Datei, damit parallele Worker nie halbe Einträge sehen
+        self._place(Path(output_path), entry.parent, entry, read_only=True)
+    
+    def _place(self, source, directory, target, read_only=False):
+        """
+        Kopiert source über eine temporäre Datei in directory nach target
+        (per Reflink, wo möglich). Nie als Hardlink: sonst würde ein
+        Überschreiben der Ausgabe den Eintrag mit überschreiben.
+        """
+        # Nicht per mkstemp (0600): Ausgaben sollen die üblichen Rechte nach umask erhalten
+        temp = os.path.join(directory, f'.tmp-{secrets.token_hex(8)}')
+        fd = os.open(temp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0),
+                     0o666)
+        try:
+            with open(source, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+                if not (self.link and self._clone(src, dst)):
+                    shutil.copyfileobj(src, dst)
+            if read_only:
+                os.chmod(temp, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            os.replace(temp, target)
+        except BaseException:
+            if os.path.exists(temp):
+                os.unlink(temp)
+            raise
+    
+    @staticmethod
+    def _clone(src, dst):
+        """Klont src nach dst ohne Datenkopie (FICLONE). Gibt False zurück, wenn das nicht geht."""
+        if not sys.platform.startswith('linux'):
+            return False
+        import fcntl
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            return False
+        return True
+    
+    def entries(self):
+        """Liefert (pfad, größe, letzte_nutzung) aller Einträge"""
+        for entry in self.directory.glob('??/*'):
+            if entry.name.startswith('.tmp-'):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            yield entry, stat.st_size, stat.st_mtime
+    
+    def size(self):
+        """Gesamtgröße aller Einträge in Bytes"""
+        return sum(size for _, size, _ in self.entries())
+    
+    def evict(self):
+        """
+        Entfernt die am längsten nicht genutzten Einträge, bis max_bytes
+        eingehalten wird. Gibt die Anzahl entfernter Einträge zurück.
+        """
+        if not self.max_bytes:
+            return 0
+        
+        entries = sorted(self.entries(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for entry, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.chmod(entry, stat.S_IWUSR | stat.S_IRUSR)  # Windows löscht keine schreibgeschützten Dateien
+                entry.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+class ConversionManifest:
+    """
+    Manifest eines Ausgabebaums (SQLite). Je Ausgabedatei werden Quelle,
+    Änderungszeit (ns), Größe und Parameter-Fingerabdruck gespeichert.
+    Beim Öffnen wird der gesamte Inhalt einmal geladen, damit die Prüfung
+    je Datei nur einen stat()-Aufruf kostet.
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS outputs ('
+            'output TEXT PRIMARY KEY, source TEXT NOT NULL, mtime_ns INTEGER NOT NULL, '
+            'size INTEGER NOT NULL, params TEXT NOT NULL)')
+        self.entries = {
+            output: (source, mtime_ns, size, params)
+            for output, source, mtime_ns, size, params
+            in self.connection.execute('SELECT output, source, mtime_ns, size, params FROM outputs')
+        }
+        self.pending = []
+    
+    def is_current(self, source, output, stat, params):
+        """
+        Prüft ob output aus der unveränderten Quelle mit denselben Parametern
+        erzeugt wurde und noch existiert. stat ist os.stat(source).
+        """
+        entry = self.entries.get(str(output))
+        return (entry == (str(source), stat.st_mtime_ns, stat.st_size, params)
+                and os.path.exists(output))
+    
+    def record(self, source, output, stat, params):
+        """Merkt eine erfolgreiche Konvertierung vor; stat stammt von vor der Konvertierung"""
+        entry = (str(source), stat.st_mtime_ns, stat.st_size, params)
+        self.entries[str(output)] = entry
+        self.pending.append((str(output),) + entry)
+        if len(self.pending) >= MANIFEST_COMMIT_EVERY:
+            self.flush()
+    
+    def flush(self):
+        """Schreibt vorgemerkte Einträge in einer Transaktion"""
+        if not self.pending:
+            return
+        with self.connection:
+            self.connection.executemany(
+                'INSERT OR REPLACE INTO outputs VALUES (?, ?, ?, ?, ?)', self.pending)
+        self.pending = []
+    
+    def close(self):
+        self.flush()
+        self.connection.close()
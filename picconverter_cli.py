@@ -5,124 +5,557 @@ PicConverter CLI - Bildkonvertierungs-Tool mit Kommandozeilen-Interface
 
 import os
 import sys
+import glob
+import json
+import math
+import time
+import atexit
+import cProfile
 from pathlib import Path
-from PIL import Image
 import argparse
 
+from PIL import Image
+
+from picconverter_core import (
+    SUPPORTED_FORMATS, QUALITY_SETTINGS, STAGE_LABELS, FIT_PALETTE_FORMATS, FIT_QUALITY_FORMATS,
+    AUTO_QUALITY_FORMATS, DEFAULT_BACKGROUND, DEFAULT_RESAMPLE, RESAMPLE_CHOICES,
+    ConversionJob, Converter, StageTimer,
+    default_chunksize, format_extension, get_file_size_mb, inspect_many, load_rendition_profile,
+    merge_profiles, parse_byte_size, parse_color, parse_rendition_spec, resolve_quality,
+)
+from picconverter_cache import (MANIFEST_NAME, ConversionCache, ConversionManifest,
+                                job_fingerprint)
+from picconverter_quality import DEFAULT_MIN_SSIM, require_numpy
+from picconverter_scheduler import MemoryScheduler
+from picconverter_server import serve
+from picconverter_stream import memory_required, open_unbounded
+
+
+def is_batch_input(inputs):
+    """Prüft ob die Eingaben den Batch-Modus erfordern"""
+    if len(inputs) != 1:
+        return True
+    
+    entry = inputs[0]
+    return (entry.startswith('@') or glob.has_magic(entry)
+            or Path(entry).is_dir())
+
+
+def _glob_base(pattern):
+    """Gibt den Verzeichnisanteil eines Glob-Musters ohne Platzhalter zurück"""
+    base = []
+    for part in Path(pattern).parts:
+        if glob.has_magic(part):
+            break
+        base.append(part)
+    return Path(*base) if base else Path('.')
+
+
+def _is_image_file(path):
+    return path.is_file() and path.suffix[1:].lower() in SUPPORTED_FORMATS
+
+
+def _scan_images(base):
+    """
+    Durchläuft ein Verzeichnis rekursiv in derselben Reihenfolge wie os.walk
+    und liefert (pfad, relativer_pfad, eindeutiger_schlüssel) aller Bilder.
+    os.scandir liefert den Dateityp mit, daher fällt je Datei kein stat() an;
+    realpath wird nur je Verzeichnis (und für verlinkte Dateien) berechnet.
+    """
+    pending = [(str(base), Path())]
+    while pending:
+        directory, relative = pending.pop()
+        real = os.path.realpath(directory)
+        with os.scandir(directory) as scan:
+            entries = sorted(scan, key=lambda item: item.name)
+        
+        subdirs = []
+        for item in entries:
+            if item.is_dir(follow_symlinks=False):
+                subdirs.append((item.path, relative / item.name))
+            elif (os.path.splitext(item.name)[1][1:].lower() in SUPPORTED_FORMATS
+                  and item.is_file()):
+                key = (os.path.realpath(item.path) if item.is_symlink()
+                       else os.path.join(real, item.name))
+                yield Path(item.path), relative / item.name, key
+        pending.extend(reversed(subdirs))
+
+
+def expand_inputs(inputs):
+    """
+    Expandiert Dateien, Verzeichnisse, Globs und @Dateilisten.
+    Gibt eine Liste von (Quelldatei, relativer Pfad) zurück - der relative
+    Pfad wird für die Spiegelung der Verzeichnisstruktur verwendet.
+    """
+    sources = []
+    seen = set()
+    
+    def add(path, base, relative=None, key=None):
+        key = key or os.path.realpath(path)
+        if key in seen:
+            return
+        seen.add(key)
+        if relative is None:
+            try:
+                relative = path.relative_to(base)
+            except ValueError:
+                relative = Path(path.name)
+        sources.append((path, relative))
+    
+    for entry in inputs:
+        if entry.startswith('@'):
+            # Dateiliste: ein Pfad pro Zeile, leere Zeilen und # werden ignoriert
+            with open(entry[1:], encoding='utf-8') as f:
+                listed = [line.strip() for line in f]
+            for line in listed:
+                if line and not line.startswith('#'):
+                    path = Path(line)
+                    add(path, path.parent)
+        elif glob.has_magic(entry):
+            base = _glob_base(entry)
+            for match in sorted(glob.glob(entry, recursive=True)):
+                path = Path(match)
+                if _is_image_file(path):
+                    add(path, base)
+        elif Path(entry).is_dir():
+            base = Path(entry)
+            for path, relative, key in _scan_images(base):
+                add(path, base, relative, key)
+        else:
+            path = Path(entry)
+            add(path, path.parent)
+    
+    return sources
+
 
-# Unterstützte Formate
-SUPPORTED_FORMATS = {
-    'jpg': 'JPEG',
-    'jpeg': 'JPEG',
-    'png': 'PNG',
-    'bmp': 'BMP',
-    'tiff': 'TIFF',
-    'tif': 'TIFF',
-    'gif': 'GIF',
-    'webp': 'WebP',
-    'ico': 'ICO'
-}
+def print_cache_summary(cache, hits, misses):
+    """Gibt Treffer und Fehlschläge des Caches sowie dessen Belegung aus"""
+    mb = 1024 * 1024
+    limit = f" von {cache.max_bytes / mb:.0f} MB" if cache.max_bytes else ""
+    print(f"Cache: {hits} Treffer, {misses} Fehlschläge "
+          f"({cache.size() / mb:.1f} MB{limit} belegt)")
 
-# Qualitäts-/Kompressionseinstellungen je Format
-QUALITY_SETTINGS = {
-    'JPEG': {'min': 1, 'max': 100, 'default': 85, 'name': 'Qualität'},
-    'PNG': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
-    'WebP': {'min': 0, 'max': 100, 'default': 80, 'name': 'Qualität'},
-    'TIFF': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
-}
 
+def percentile(values, fraction):
+    """Perzentil nach dem Nearest-Rank-Verfahren; values muss sortiert sein"""
+    index = math.ceil(len(values) * fraction) - 1
+    return values[max(0, min(len(values) - 1, index))]
 
-def get_file_size_mb(filepath):
-    """Gibt die Dateigröße in MB zurück"""
-    return os.path.getsize(filepath) / (1024 * 1024)
 
+def stage_rows(stages):
+    """Sortiert gemessene Schritte in Ablaufreihenfolge (siehe STAGE_LABELS)"""
+    order = list(STAGE_LABELS)
+    return sorted(stages.items(), key=lambda item: order.index(item[0])
+                  if item[0] in order else len(order))
 
-def estimate_output_size(image, output_format, quality, width=None, height=None):
+
+def print_stage_table(stages):
+    """Gibt Dauer, Anteil und Speicher-Höchststand je Schritt einer Konvertierung aus"""
+    total = sum(entry['seconds'] for entry in stages.values())
+    mb = 1024 * 1024
+    print(f"\n{'Schritt':<22} {'Zeit':>10} {'Anteil':>7} {'Spitzen-RSS':>12}")
+    print('-' * 54)
+    for stage, entry in stage_rows(stages):
+        share = entry['seconds'] / total * 100 if total > 0 else 0.0
+        peak = '-' if entry['peak_rss'] is None else f"{entry['peak_rss'] / mb:.0f} MB"
+        print(f"{STAGE_LABELS.get(stage, stage):<22} {entry['seconds'] * 1000:>8.1f}ms "
+              f"{share:>6.1f}% {peak:>12}")
+    print(f"{'Gesamt':<22} {total * 1000:>8.1f}ms")
+
+
+def summarize_stages(results):
     """
-    Schätzt die Größe der Ausgabedatei
+    Fasst die Schrittzeiten vieler ConversionResults zusammen: Anzahl,
+    Mittelwert, Perzentile und Maximum in Sekunden sowie den höchsten
+    Speicher-Höchststand eines Workers je Schritt
     """
+    samples = {}
+    peaks = {}
+    for result in results:
+        if not result.stages:
+            continue
+        for stage, entry in result.stages.items():
+            samples.setdefault(stage, []).append(entry['seconds'])
+            if entry['peak_rss'] is not None:
+                peaks[stage] = max(peaks.get(stage, 0), entry['peak_rss'])
+        samples.setdefault('total', []).append(result.elapsed)
+    
+    summary = {}
+    for stage, values in samples.items():
+        values.sort()
+        summary[stage] = {
+            'count': len(values),
+            'mean_s': sum(values) / len(values),
+            'p50_s': percentile(values, 0.50),
+            'p90_s': percentile(values, 0.90),
+            'p99_s': percentile(values, 0.99),
+            'max_s': values[-1],
+            'peak_rss': peaks.get(stage),
+        }
+    return summary
+
+
+def print_stage_summary(summary):
+    """Gibt die Perzentile je Schritt eines Batch-Laufs aus"""
+    mb = 1024 * 1024
+    print(f"\n{'Schritt':<22} {'Anzahl':>7} {'Mittel':>9} {'p50':>9} {'p90':>9} "
+          f"{'p99':>9} {'Max':>9} {'Spitzen-RSS':>12}")
+    print('-' * 92)
+    rows = stage_rows({stage: entry for stage, entry in summary.items() if stage != 'total'})
+    if 'total' in summary:
+        rows.append(('total', summary['total']))
+    for stage, entry in rows:
+        label = 'Gesamt je Datei' if stage == 'total' else STAGE_LABELS.get(stage, stage)
+        peak = '-' if entry['peak_rss'] is None else f"{entry['peak_rss'] / mb:.0f} MB"
+        print(f"{label:<22} {entry['count']:>7} "
+              + ' '.join(f"{entry[key] * 1000:>7.1f}ms"
+                         for key in ('mean_s', 'p50_s', 'p90_s', 'p99_s', 'max_s'))
+              + f" {peak:>12}")
+
+
+def write_metrics(path, metrics):
+    """Schreibt Messwerte als JSON; Fehler werden gemeldet, brechen aber nicht ab"""
     try:
-        # Temporäres Bild erstellen
-        temp_img = image.copy()
-        
-        # Auflösung ändern falls angegeben
-        if width and height:
-            temp_img = temp_img.resize((width, height), Image.Resampling.LANCZOS)
-        
-        # Temporäre Datei erstellen
-        temp_path = Path('/tmp') / f'temp_estimate.{output_format.lower()}'
-        
-        # Speichern mit entsprechenden Parametern
-        save_kwargs = {}
-        if output_format == 'JPEG':
-            save_kwargs['quality'] = quality
-            save_kwargs['optimize'] = True
-        elif output_format == 'PNG':
-            save_kwargs['compress_level'] = 9 - quality  # Umgekehrt für PNG
-        elif output_format == 'WebP':
-            save_kwargs['quality'] = quality
-        elif output_format == 'TIFF':
-            save_kwargs['compression'] = 'tiff_lzw'
-        
-        temp_img.save(temp_path, format=output_format, **save_kwargs)
-        
-        # Größe lesen
-        size_mb = get_file_size_mb(temp_path)
-        
-        # Temporäre Datei löschen
-        if temp_path.exists():
-            temp_path.unlink()
-        
-        return size_mb
-    except Exception as e:
-        return None
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+    except OSError as e:
+        print(f"Warnung: Metriken konnten nicht geschrieben werden: {e}", file=sys.stderr)
 
 
-def convert_image(input_path, output_path, output_format, quality=None, width=None, height=None):
+def start_cprofile(path):
+    """Profiliert den Hauptprozess bis zum Programmende und führt die Worker-Profile zusammen"""
+    profiler = cProfile.Profile()
+    
+    def finish():
+        profiler.disable()
+        count = merge_profiles(path, [profiler])
+        print(f"cProfile-Profil ({count} Prozess(e)): {path}", file=sys.stderr)
+    
+    atexit.register(finish)
+    profiler.enable()
+
+
+def run_batch(args, converter, job):
+    """Konvertiert viele Bilder parallel in einem Prozess-Pool"""
+    try:
+        sources = expand_inputs(args.input)
+    except OSError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if not sources:
+        print("Fehler: Keine Bilddateien gefunden!", file=sys.stderr)
+        sys.exit(1)
+    
+    output_root = Path(args.output) if args.output else None
+    
+    manifest = None
+    if args.incremental:
+        manifest_path = args.manifest or (output_root / MANIFEST_NAME if output_root else None)
+        if manifest_path is None:
+            print("Fehler: --incremental benötigt -o oder --manifest", file=sys.stderr)
+            sys.exit(1)
+        manifest = ConversionManifest(manifest_path)
+        params = job_fingerprint(job)
+    
+    # Aufgaben erstellen und Zielverzeichnisse einmalig anlegen
+    tasks = []
+    source_stats = {}
+    skipped = 0
+    created_dirs = set()
+    for source, relative in sources:
+        if output_root is not None:
+            target = output_root / relative.with_suffix(f'.{args.format}')
+        else:
+            target = source.with_suffix(f'.{args.format}')
+        
+        # Inkrementell: unveränderte Quellen mit vorhandener Ausgabe nicht öffnen
+        if manifest is not None:
+            try:
+                stat = os.stat(source)
+            except OSError:
+                stat = None
+            if stat is not None:
+                if manifest.is_current(source, target, stat, params):
+                    skipped += 1
+                    continue
+                source_stats[str(target)] = stat
+        
+        if target.parent not in created_dirs:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(target.parent)
+        
+        tasks.append((source, target, job))
+    
+    workers = args.jobs or os.cpu_count() or 1
+    chunksize = args.chunksize or default_chunksize(len(tasks), workers)
+    scheduler = None
+    if args.memory_budget:
+        try:
+            scheduler = MemoryScheduler(converter, args.memory_budget, workers)
+        except ValueError as e:
+            print(f"Fehler: {e}", file=sys.stderr)
+            sys.exit(1)
+    
+    mb = 1024 * 1024
+    print(f"\n{'='*60}")
+    print(f"Batch-Konvertierung: {len(tasks)} Dateien -> {job.output_format}")
+    if scheduler is not None:
+        print(f"Worker: {workers}, Speicherbudget: {args.memory_budget / mb:.0f} MB "
+              f"(davon {scheduler.job_budget / mb:.0f} MB für Bilder)")
+    else:
+        print(f"Worker: {workers}, Chunkgröße: {chunksize}")
+    if output_root is not None:
+        print(f"Ausgabeverzeichnis: {output_root}")
+    if manifest is not None:
+        print(f"Inkrementell: {skipped} unveränderte Dateien übersprungen")
+    print(f"{'='*60}\n")
+    
+    succeeded = 0
+    failed = 0
+    cache_hits = 0
+    total_in = 0
+    total_out = 0
+    results = []
+    start = time.perf_counter()
+    
+    if not tasks:
+        batch = ()
+    elif scheduler is not None:
+        batch = scheduler.run(tasks, args.cprofile)
+    else:
+        batch = converter.convert_many(tasks, workers, chunksize, args.cprofile)
+    for result in batch:
+        if converter.timings:
+            results.append(result)
+        total_in += result.input_bytes
+        cache_hits += result.cached
+        if result.success:
+            succeeded += 1
+            total_out += result.output_bytes
+            if result.output_path in source_stats:
+                manifest.record(result.input_path, result.output_path,
+                                source_stats[result.output_path], params)
+        else:
+            failed += 1
+            print(f"✗ {result.input_path}: {result.error}", file=sys.stderr)
+    
+    elapsed = time.perf_counter() - start
+    if manifest is not None:
+        manifest.close()
+    
+    print(f"\n{'='*60}")
+    print(f"Erfolgreich: {succeeded}, Fehlgeschlagen: {failed}"
+          + (f", Übersprungen: {skipped}" if manifest is not None else ""))
+    print(f"Dauer: {elapsed:.2f} s")
+    if elapsed > 0:
+        print(f"Durchsatz: {len(tasks) / elapsed:.1f} Bilder/s, "
+              f"{total_in / mb / elapsed:.2f} MB/s gelesen, "
+              f"{total_out / mb / elapsed:.2f} MB/s geschrieben")
+    print(f"Eingabe: {total_in / mb:.2f} MB, Ausgabe: {total_out / mb:.2f} MB")
+    if converter.cache is not None:
+        print_cache_summary(converter.cache, cache_hits, len(tasks) - cache_hits)
+    if scheduler is not None:
+        print(f"Scheduler: höchstens {scheduler.peak_in_flight} Aufträge und "
+              f"{scheduler.peak_in_flight_bytes / mb:.0f} MB gleichzeitig, "
+              f"{scheduler.held_back}x auf Speicher gewartet"
+              + (f", {scheduler.oversized} über Budget allein" if scheduler.oversized else ""))
+    print(f"{'='*60}")
+    
+    if converter.timings:
+        summary = summarize_stages(results)
+        if args.timings:
+            print_stage_summary(summary)
+        if args.metrics_json:
+            write_metrics(args.metrics_json, {
+                'mode': 'batch',
+                'format': job.output_format,
+                'workers': workers,
+                'elapsed_s': elapsed,
+                'succeeded': succeeded,
+                'failed': failed,
+                'skipped': skipped,
+                'stages': summary,
+                'scheduler': scheduler.metrics() if scheduler is not None else None,
+                'files': [{
+                    'input': result.input_path,
+                    'output': result.output_path,
+                    'success': result.success,
+                    'error': result.error,
+                    'cached': result.cached,
+                    'input_bytes': result.input_bytes,
+                    'output_bytes': result.output_bytes,
+                    'elapsed_s': result.elapsed,
+                    'stages': result.stages,
+                } for result in results],
+            })
+    
+    if failed:
+        sys.exit(1)
+
+
+def run_renditions(args, converter, renditions):
+    """Erzeugt alle Renditions je Eingabebild aus einem einzigen Dekodiervorgang"""
+    try:
+        sources = expand_inputs(args.input)
+    except OSError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    if not sources:
+        print("Fehler: Keine Bilddateien gefunden!", file=sys.stderr)
+        sys.exit(1)
+    
+    output_root = Path(args.output) if args.output else None
+    
+    tasks = []
+    for source, relative in sources:
+        target_dir = (output_root / relative.parent) if output_root is not None else source.parent
+        target_dir.mkdir(parents=True, exist_ok=True)
+        outputs = []
+        for rendition in renditions:
+            extension = format_extension(rendition.job.output_format)
+            outputs.append((target_dir / f"{source.stem}_{rendition.name}.{extension}",
+                            rendition.job))
+        tasks.append((source, outputs))
+    
+    print(f"\n{'='*60}")
+    print(f"Renditions: {len(renditions)} je Bild, {len(tasks)} Eingabedatei(en)")
+    print(f"{'='*60}\n")
+    
+    start = time.perf_counter()
+    if len(tasks) == 1:
+        source, outputs = tasks[0]
+        all_results = [converter.render(source, outputs)]
+    else:
+        workers = args.jobs or os.cpu_count() or 1
+        chunksize = args.chunksize or default_chunksize(len(tasks), workers)
+        all_results = converter.render_many(tasks, workers, chunksize, args.cprofile)
+    
+    decode_total = 0.0
+    times = [0.0] * len(renditions)
+    sizes = [0] * len(renditions)
+    failed = 0
+    for decode_time, results in all_results:
+        decode_total += decode_time
+        for index, result in enumerate(results):
+            times[index] += result.elapsed
+            sizes[index] += result.output_bytes
+            if not result.success:
+                failed += 1
+                print(f"✗ {result.output_path}: {result.error}", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+    
+    # Zeiten und Bytes je Rendition (bei mehreren Bildern summiert)
+    print(f"{'Rendition':<16} {'Format':<6} {'Qualität':>8} {'Zeit':>10} {'Größe':>12}")
+    print('-' * 56)
+    print(f"{'(dekodieren)':<16} {'':<6} {'':>8} {decode_total * 1000:>8.1f}ms")
+    for index, rendition in enumerate(renditions):
+        quality = '-' if rendition.job.quality is None else rendition.job.quality
+        print(f"{rendition.name:<16} {rendition.job.output_format:<6} {quality:>8} "
+              f"{times[index] * 1000:>8.1f}ms {sizes[index] / 1024:>10.1f}KB")
+    
+    print(f"\nGesamtdauer: {elapsed:.2f} s, Fehlgeschlagen: {failed}")
+    
+    if failed:
+        sys.exit(1)
+
+
+def report_timings(args, timer, input_path, output_path):
+    """Gibt die Schrittzeiten einer Einzelkonvertierung aus bzw. speichert sie"""
+    if args.timings:
+        print_stage_table(timer.stages)
+    if args.metrics_json:
+        write_metrics(args.metrics_json, {
+            'mode': 'single',
+            'input': str(input_path),
+            'output': None if output_path is None else str(output_path),
+            'elapsed_s': timer.total,
+            'stages': timer.stages,
+        })
+
+
+def print_fit(fit, output_format):
+    """Gibt die von der Zielgrößen-Suche gewählte Einstellung aus"""
+    settings = []
+    if fit.job.quality is not None:
+        q_name = QUALITY_SETTINGS.get(output_format, {}).get('name', 'Qualität')
+        settings.append(f"{q_name} {fit.job.quality}")
+    if fit.colors is not None:
+        settings.append(f"{fit.colors} Farben")
+    chosen = ', '.join(settings) or 'Standard'
+    print(f"Gewählt: {chosen} -> {len(fit.data) / 1024:.1f} KB ({fit.probes} Proben)")
+
+
+def print_quality_fit(fit, output_format):
+    """Gibt die von der automatischen Qualitätswahl gewählte Qualität aus"""
+    q_name = QUALITY_SETTINGS[output_format]['name']
+    print(f"Gewählt: {q_name} {fit.job.quality} (SSIM {fit.ssim:.4f}, {fit.probes} Proben)")
+    if not fit.fits:
+        print(f"Warnung: Mindest-SSIM {fit.job.min_ssim} auch mit höchster Qualität "
+              f"nicht erreicht", file=sys.stderr)
+
+
+def print_estimate(estimated_size, original_size, error_bound=None):
+    """Gibt die geschätzte Ausgabegröße und die Kompression aus"""
+    if error_bound is not None:
+        print(f"Geschätzte Ausgabegröße: {estimated_size:.2f} MB (±{error_bound:.2f} MB)")
+    else:
+        print(f"Geschätzte Ausgabegröße: {estimated_size:.2f} MB")
+    if original_size > 0:
+        compression_ratio = (1 - estimated_size / original_size) * 100
+        print(f"Kompression: {compression_ratio:+.1f}%")
+
+
+def run_inspect(argv):
     """
-    Konvertiert ein Bild in das gewünschte Format
+    Unterbefehl inspect: liest nur die Header und gibt je Datei eine
+    JSON-Zeile aus, sobald sie vorliegt (Reihenfolge der Fertigstellung)
     """
+    parser = argparse.ArgumentParser(
+        prog=f"{os.path.basename(sys.argv[0])} inspect",
+        description='Liest nur die Header der Bilder, ohne Pixel zu dekodieren, und gibt je '
+                    'Datei eine JSON-Zeile aus (path, format, mode, width, height, bytes, '
+                    'frames, has_alpha, icc, exif; bei Fehlern path und error)')
+    parser.add_argument('input', nargs='+',
+                       help='Eingabedatei(en), Verzeichnisse, Glob-Muster oder @Dateiliste')
+    parser.add_argument('-j', '--jobs', type=int,
+                       help='Anzahl Threads (Standard: CPU-Kerne + 4, höchstens 32)')
+    args = parser.parse_args(argv)
+    
     try:
-        # Bild öffnen
-        img = Image.open(input_path)
-        
-        # RGB konvertieren falls nötig (für Formate die kein RGBA unterstützen)
-        if output_format in ['JPEG', 'BMP'] and img.mode in ('RGBA', 'LA', 'P'):
-            # Transparenz entfernen
-            background = Image.new('RGB', img.size, (255, 255, 255))
-            if img.mode == 'P':
-                img = img.convert('RGBA')
-            background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = background
-        elif img.mode not in ('RGB', 'RGBA', 'L', 'P'):
-            img = img.convert('RGB')
-        
-        # Auflösung ändern falls angegeben
-        if width and height:
-            img = img.resize((width, height), Image.Resampling.LANCZOS)
-        
-        # Speichern mit entsprechenden Parametern
-        save_kwargs = {}
-        if output_format == 'JPEG':
-            save_kwargs['quality'] = quality if quality is not None else QUALITY_SETTINGS['JPEG']['default']
-            save_kwargs['optimize'] = True
-        elif output_format == 'PNG':
-            if quality is not None:
-                save_kwargs['compress_level'] = 9 - quality
-        elif output_format == 'WebP':
-            save_kwargs['quality'] = quality if quality is not None else QUALITY_SETTINGS['WebP']['default']
-        elif output_format == 'TIFF':
-            save_kwargs['compression'] = 'tiff_lzw'
-            if quality is not None:
-                save_kwargs['compression'] = 'tiff_lzw'
-        
-        img.save(output_path, format=output_format, **save_kwargs)
-        return True, None
-    except Exception as e:
-        return False, str(e)
+        sources = expand_inputs(args.input)
+    except OSError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    # Es werden nur Header gelesen - der Schutz vor Dekompressionsbomben greift hier nicht
+    Image.MAX_IMAGE_PIXELS = None
+    
+    start = time.perf_counter()
+    count = failed = 0
+    try:
+        for entry in inspect_many((path for path, _ in sources), args.jobs):
+            print(json.dumps(entry, ensure_ascii=False), flush=True)
+            count += 1
+            failed += 'error' in entry
+    except BrokenPipeError:
+        # Leser vorzeitig beendet (z.B. | head): ohne Traceback aufhören
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    
+    print(f"{count} Dateien geprüft, {failed} Fehler "
+          f"({time.perf_counter() - start:.2f} s)", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 
 def main():
+    # Unterbefehl vor argparse abfangen - die Eingaben sind beliebig viele Positionsargumente
+    if sys.argv[1:2] == ['inspect']:
+        run_inspect(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description='PicConverter CLI - Konvertiert Bilder zwischen verschiedenen Formaten',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -133,29 +566,242 @@ Beispiele:
   %(prog)s bild.jpg -f png -o ausgabe.png
   %(prog)s bild.jpg -f jpg -q 90 -w 1920 --height 1080
   %(prog)s bild.png -f webp -q 85
+  %(prog)s fotos/ -f webp -o konvertiert/ -j 8
+  %(prog)s "scans/**/*.tif" @liste.txt -f jpg -q 90 -o ausgabe/
+  %(prog)s foto.jpg --size 150x150:webp:70 --size 800x:jpg:85 --size original:jpg:90
+  %(prog)s riesig.tif -f png --max-memory 512M
+  %(prog)s --serve -j 4 --cache-dir cache/
+  %(prog)s inspect fotos/ > bestand.jsonl     (nur Header lesen, JSON Lines)
         """
     )
     
-    parser.add_argument('input', help='Pfad zur Eingabedatei')
+    parser.add_argument('input', nargs='*',
+                       help='Eingabedatei(en), Verzeichnisse, Glob-Muster oder @Dateiliste')
     parser.add_argument('-f', '--format', '--to', dest='format',
                        choices=list(SUPPORTED_FORMATS.keys()),
-                       required=True,
-                       help='Zielformat für die Konvertierung')
+                       help='Zielformat für die Konvertierung (erforderlich, außer alle '
+                            'Renditions geben ein eigenes Format an)')
     parser.add_argument('-o', '--output', dest='output',
-                       help='Ausgabedatei (optional, Standard: Eingabename mit neuem Format)')
+                       help='Ausgabedatei bzw. Ausgabeverzeichnis im Batch-Modus '
+                            '(optional, Standard: Eingabename mit neuem Format)')
     parser.add_argument('-q', '--quality', type=int,
                        help='Qualität/Kompression (JPEG/WebP: 1-100, PNG: 0-9)')
     parser.add_argument('-w', '--width', type=int,
                        help='Breite der Ausgabedatei in Pixeln')
     parser.add_argument('--height', type=int,
                        help='Höhe der Ausgabedatei in Pixeln')
+    parser.add_argument('--exact-decode', action='store_true',
+                       help='Immer in voller Auflösung dekodieren (kein verkleinertes '
+                            'Laden per JPEG-draft/reduce beim Herunterskalieren)')
+    parser.add_argument('--resample', choices=RESAMPLE_CHOICES, default=DEFAULT_RESAMPLE,
+                       help='Skalierung: fast (reduce + bilinear), balanced (reduce + bikubisch), '
+                            'best (LANCZOS) oder auto (nach Verkleinerungsfaktor) '
+                            f'(Standard: {DEFAULT_RESAMPLE})')
+    parser.add_argument('--background', metavar='FARBE',
+                       help='Hintergrundfarbe für transparente Bereiche bei JPEG/BMP, '
+                            'z.B. #1e78c8 (Standard: weiß)')
+    parser.add_argument('--dedupe-frames', nargs='?', const=0, type=int, metavar='TOLERANZ',
+                       help='Animationen: aufeinanderfolgende gleiche Frames zu einem längeren '
+                            'zusammenfassen. TOLERANZ ist die erlaubte Abweichung je Kanal '
+                            '(0-255, Standard: 0 = nur identische)')
+    parser.add_argument('--target-size', metavar='GRÖSSE',
+                       help='Maximale Dateigröße, z.B. 500KB. Wählt die beste Qualität '
+                            '(JPEG/WebP), Kompression bzw. Palettengröße (PNG/GIF), die passt')
+    parser.add_argument('--auto-quality', action='store_true',
+                       help='Wählt je Bild die niedrigste Qualität (JPEG/WebP), die die '
+                            'Mindest-SSIM erreicht (benötigt NumPy)')
+    parser.add_argument('--min-ssim', type=float, metavar='WERT',
+                       help=f'Mindest-SSIM für --auto-quality (0-1, Standard: {DEFAULT_MIN_SSIM})')
     parser.add_argument('--estimate', action='store_true',
                        help='Zeigt geschätzte Ausgabegröße ohne zu konvertieren')
+    parser.add_argument('--estimate-mode', choices=['exact', 'fast'], default='exact',
+                       help='Schätzverfahren: exact kodiert das ganze Bild, fast rechnet '
+                            'aus Stichproben-Kacheln hoch und gibt eine Fehlerschranke aus')
+    parser.add_argument('--size', action='append', dest='sizes', metavar='BxH[:FORMAT[:QUALITÄT]]',
+                       help='Rendition erzeugen, mehrfach angebbar (z.B. 150x150:webp:70, '
+                            '800x, original:jpg:85). Alle Renditions entstehen aus einem '
+                            'Dekodiervorgang; -o ist dann das Ausgabeverzeichnis')
+    parser.add_argument('--profile',
+                       help='Rendition-Profil als JSON- oder YAML-Datei')
+    parser.add_argument('--max-memory', metavar='GRÖSSE',
+                       help='Speicherbudget, z.B. 512M oder 2G. Größere Bilder werden '
+                            'streifenweise konvertiert (Eingabe BMP/TIFF unkomprimiert/PNG, '
+                            'Ausgabe BMP/TIFF/PNG, nur ganzzahlige Verkleinerung)')
+    parser.add_argument('--cache-dir',
+                       help='Verzeichnis für den Ergebnis-Cache. Bereits konvertierte Bilder '
+                            '(gleicher Inhalt, gleiche Parameter) werden verlinkt statt neu konvertiert')
+    parser.add_argument('--cache-size', default='2G', metavar='GRÖSSE',
+                       help='Maximale Cache-Größe, älteste Einträge werden verdrängt (Standard: 2G)')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Batch-Modus: nur geänderte Dateien konvertieren (Manifest mit '
+                            'Änderungszeit, Größe und Parametern im Ausgabeverzeichnis)')
+    parser.add_argument('--manifest',
+                       help=f'Pfad des Manifests für --incremental (Standard: '
+                            f'<Ausgabeverzeichnis>/{MANIFEST_NAME})')
+    parser.add_argument('--timings', action='store_true',
+                       help='Zeit und Speicher-Höchststand je Verarbeitungsschritt ausgeben '
+                            '(Batch-Modus: Perzentile über alle Dateien)')
+    parser.add_argument('--metrics-json', metavar='DATEI',
+                       help='Zeiten je Verarbeitungsschritt als JSON speichern')
+    parser.add_argument('--cprofile', metavar='DATEI',
+                       help='cProfile-Profil aller Prozesse speichern (auswertbar mit '
+                            'python -m pstats oder snakeviz)')
+    parser.add_argument('-j', '--jobs', type=int,
+                       help='Anzahl Worker-Prozesse im Batch-Modus (Standard: CPU-Kerne)')
+    parser.add_argument('--chunksize', type=int,
+                       help='Dateien pro Worker-Auftrag im Batch-Modus (Standard: automatisch)')
+    parser.add_argument('--memory-budget', metavar='GRÖSSE',
+                       help='Gemeinsames Speicherbudget aller Worker im Batch-Modus, z.B. 8G. '
+                            'Der Bedarf wird aus den Headern geschätzt, große Bilder laufen '
+                            'zuerst, kleinere füllen die Lücken')
+    parser.add_argument('--serve', nargs='?', const='', metavar='ADRESSE',
+                       help='Als Server mit warmen Worker-Prozessen starten; Aufträge per '
+                            'picconverter_client.py. ADRESSE: Socket-Pfad oder http://host:port')
     
     args = parser.parse_args()
     
+    max_memory = None
+    if args.max_memory:
+        try:
+            max_memory = parse_byte_size(args.max_memory)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    target_bytes = None
+    if args.target_size:
+        try:
+            target_bytes = parse_byte_size(args.target_size)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    background = DEFAULT_BACKGROUND
+    if args.background:
+        try:
+            background = parse_color(args.background)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if args.dedupe_frames is not None and not 0 <= args.dedupe_frames <= 255:
+        parser.error('--dedupe-frames: Toleranz muss zwischen 0 und 255 liegen')
+    
+    min_ssim = None
+    if args.min_ssim is not None and not args.auto_quality:
+        parser.error('--min-ssim ist nur zusammen mit --auto-quality verfügbar')
+    if args.auto_quality:
+        min_ssim = DEFAULT_MIN_SSIM if args.min_ssim is None else args.min_ssim
+        if not 0 < min_ssim <= 1:
+            parser.error('--min-ssim muss zwischen 0 und 1 liegen')
+        if target_bytes:
+            parser.error('--auto-quality und --target-size schließen sich aus')
+        try:
+            require_numpy()
+        except ValueError as e:
+            parser.error(str(e))
+    
+    cache = None
+    if args.cache_dir:
+        try:
+            cache = ConversionCache(args.cache_dir, parse_byte_size(args.cache_size))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    
+    converter = Converter(cache, timings=args.timings or bool(args.metrics_json))
+    if args.cprofile:
+        start_cprofile(args.cprofile)
+    
+    # Server-Modus: Bildoptionen kommen mit jedem Auftrag
+    if args.serve is not None:
+        if args.input:
+            parser.error('--serve erwartet keine Eingabedateien')
+        try:
+            serve(args.serve or None, converter, args.jobs)
+        except (OSError, ValueError) as e:
+            print(f"Fehler: {e}", file=sys.stderr)
+            sys.exit(1)
+        return
+    if not args.input:
+        parser.error('Eingabedatei(en) fehlen')
+    
+    # Renditions: mehrere Ausgaben je Bild aus einem Dekodiervorgang
+    if args.sizes or args.profile:
+        if max_memory:
+            parser.error('--max-memory wird mit Renditions nicht unterstützt')
+        if converter.timings:
+            parser.error('--timings/--metrics-json werden mit Renditions nicht unterstützt')
+        if target_bytes:
+            parser.error('--target-size wird mit Renditions nicht unterstützt')
+        if min_ssim:
+            parser.error('--auto-quality wird mit Renditions nicht unterstützt')
+        if args.incremental:
+            parser.error('--incremental wird mit Renditions nicht unterstützt')
+        default_format = SUPPORTED_FORMATS[args.format] if args.format else None
+        try:
+            renditions = []
+            if args.profile:
+                renditions.extend(load_rendition_profile(args.profile, default_format,
+                                                         args.quality))
+            for spec in args.sizes or []:
+                renditions.append(parse_rendition_spec(spec, default_format, args.quality))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        
+        for rendition in renditions:
+            rendition.job.exact_decode = args.exact_decode
+            rendition.job.resample = args.resample
+            rendition.job.background = background
+        run_renditions(args, converter, renditions)
+        return
+    
+    if not args.format:
+        parser.error('-f/--format ist erforderlich')
+    
+    # Format bestimmen
+    output_format = SUPPORTED_FORMATS[args.format.lower()]
+    
+    if target_bytes:
+        if output_format not in FIT_QUALITY_FORMATS + FIT_PALETTE_FORMATS:
+            parser.error(f'--target-size wird für {output_format} nicht unterstützt '
+                         f'(möglich: JPEG, WebP, PNG, GIF)')
+        if args.quality is not None:
+            parser.error('-q und --target-size schließen sich aus - die Qualität wird gesucht')
+    if min_ssim:
+        if output_format not in AUTO_QUALITY_FORMATS:
+            parser.error(f'--auto-quality wird für {output_format} nicht unterstützt '
+                         f'(möglich: JPEG, WebP)')
+        if args.quality is not None:
+            parser.error('-q und --auto-quality schließen sich aus - die Qualität wird gesucht')
+    
+    # Standard-Qualität setzen und validieren
+    quality, warning = resolve_quality(output_format, args.quality)
+    if warning:
+        print(warning, file=sys.stderr)
+    
+    if args.incremental and not is_batch_input(args.input):
+        parser.error('--incremental ist nur im Batch-Modus verfügbar')
+    if args.memory_budget:
+        if not is_batch_input(args.input):
+            parser.error('--memory-budget ist nur im Batch-Modus verfügbar')
+        if args.chunksize:
+            parser.error('--chunksize und --memory-budget schließen sich aus - '
+                         'der Scheduler vergibt Aufträge einzeln')
+        try:
+            args.memory_budget = parse_byte_size(args.memory_budget)
+        except ValueError as e:
+            parser.error(str(e))
+    
+    if is_batch_input(args.input):
+        if args.estimate:
+            parser.error('--estimate wird im Batch-Modus nicht unterstützt')
+        job = ConversionJob(output_format, quality, args.width, args.height,
+                            exact_decode=args.exact_decode, max_memory=max_memory,
+                            target_bytes=target_bytes, min_ssim=min_ssim,
+                            background=background, dedupe_frames=args.dedupe_frames,
+                            resample=args.resample)
+        run_batch(args, converter, job)
+        return
+    
     # Eingabedatei prüfen
-    input_path = Path(args.input)
+    input_path = Path(args.input[0])
     if not input_path.exists():
         print(f"Fehler: Datei '{input_path}' existiert nicht!", file=sys.stderr)
         sys.exit(1)
@@ -166,27 +812,11 @@ Beispiele:
     else:
         output_path = input_path.parent / f"{input_path.stem}.{args.format}"
     
-    # Format bestimmen
-    output_format = SUPPORTED_FORMATS[args.format.lower()]
-    
-    # Standard-Qualität setzen falls nicht angegeben
-    quality = args.quality
-    if quality is None:
-        if output_format in QUALITY_SETTINGS:
-            quality = QUALITY_SETTINGS[output_format]['default']
-    
-    # Qualität validieren
-    if quality is not None and output_format in QUALITY_SETTINGS:
-        q_min = QUALITY_SETTINGS[output_format]['min']
-        q_max = QUALITY_SETTINGS[output_format]['max']
-        if not (q_min <= quality <= q_max):
-            print(f"Warnung: Qualität {quality} außerhalb des Bereichs [{q_min}-{q_max}]. "
-                  f"Verwende Standardwert.", file=sys.stderr)
-            quality = QUALITY_SETTINGS[output_format]['default']
-    
     # Bild öffnen für Informationen
+    timer = StageTimer()
     try:
-        img = Image.open(input_path)
+        with timer.stage('open'):
+            img = open_unbounded(input_path) if max_memory else converter.open(input_path)
         original_size = get_file_size_mb(input_path)
         
         print(f"\n{'='*60}")
@@ -196,55 +826,153 @@ Beispiele:
         print(f"Originalformat: {img.format}")
         print(f"{'='*60}\n")
         
-        # Zielauflösung
-        target_width = args.width or img.size[0]
-        target_height = args.height or img.size[1]
+        job = ConversionJob(output_format, quality, args.width, args.height,
+                            exact_decode=args.exact_decode, max_memory=max_memory,
+                            target_bytes=target_bytes, min_ssim=min_ssim,
+                            background=background, dedupe_frames=args.dedupe_frames,
+                            resample=args.resample)
+        
+        # Animierte Eingabe nach GIF/WebP: alle Frames kodieren
+        try:
+            animated = converter.animates(img, job)
+        except ValueError as e:
+            print(f"Fehler: {e}", file=sys.stderr)
+            sys.exit(1)
+        if animated:
+            print(f"Animation: {img.n_frames} Frames")
         
+        # Zielauflösung
         if args.width or args.height:
+            target_width, target_height = job.target_size(img.size)
             print(f"Zielauflösung: {target_width}x{target_height} Pixel")
         
         # Qualität anzeigen
-        if quality is not None:
+        if target_bytes:
+            print(f"Zielgröße: höchstens {target_bytes / 1024:.1f} KB")
+        elif min_ssim:
+            print(f"Automatische Qualität: Mindest-SSIM {min_ssim}")
+        elif quality is not None:
             q_name = QUALITY_SETTINGS.get(output_format, {}).get('name', 'Qualität')
             print(f"{q_name}: {quality}")
         
-        # Größenprognose
-        print(f"\nBerechne Größenprognose...")
-        estimated_size = estimate_output_size(img, output_format, quality, target_width, target_height)
+        # Bild übersteigt das Speicherbudget: streifenweise ohne Größenprognose
+        required = memory_required(img)
+        if max_memory and required > max_memory:
+            img.close()
+            if args.estimate or target_bytes or min_ssim:
+                print("Größenprognose, Zielgröße und automatische Qualität sind im "
+                      "Streaming-Modus nicht verfügbar.", file=sys.stderr)
+                sys.exit(1)
+            
+            print(f"\nStreaming-Modus: voraussichtlicher Speicherbedarf "
+                  f"({required / (1024 * 1024):.0f} MB) übersteigt das Speicherbudget "
+                  f"({max_memory / (1024 * 1024):.0f} MB)")
+            print(f"Konvertiere nach: {output_path}")
+            print(f"Format: {output_format}\n")
+            
+            success, error = converter.convert(input_path, output_path, job, timer)
+            if not success:
+                print(f"✗ Fehler bei der Konvertierung: {error}", file=sys.stderr)
+                sys.exit(1)
+            
+            print(f"✓ Konvertierung erfolgreich!")
+            print(f"  Ausgabedatei: {output_path}")
+            print(f"  Endgröße: {get_file_size_mb(output_path):.2f} MB")
+            if cache is not None:
+                cache.evict()
+                print_cache_summary(cache, cache.hits, cache.misses)
+            report_timings(args, timer, input_path, output_path)
+            return
         
-        if estimated_size is not None:
-            print(f"Geschätzte Ausgabegröße: {estimated_size:.2f} MB")
-            if original_size > 0:
-                compression_ratio = (1 - estimated_size / original_size) * 100
-                print(f"Kompression: {compression_ratio:+.1f}%")
-        else:
-            print("Konnte Größe nicht schätzen.")
+        # Cache-Treffer: gespeicherte Ausgabe bereitstellen, nichts dekodieren
+        cache_key = None
+        if cache is not None and not args.estimate:
+            with timer.stage('cache'):
+                cache_key = cache.key(input_path, job)
+                hit = cache.fetch(cache_key, output_path)
+            if hit:
+                img.close()
+                print(f"\n✓ Aus dem Cache übernommen: {output_path}")
+                print(f"  Endgröße: {get_file_size_mb(output_path):.2f} MB")
+                print_cache_summary(cache, cache.hits, cache.misses)
+                report_timings(args, timer, input_path, output_path)
+                return
         
-        # Nur Schätzung anzeigen?
-        if args.estimate:
-            print("\nNur Schätzung angefordert. Keine Konvertierung durchgeführt.")
-            sys.exit(0)
+        # Zielgröße und automatische Qualität kodieren ohnehin das ganze Bild
+        searching = bool(target_bytes or min_ssim)
+        if args.estimate_mode == 'fast' and not searching and not animated:
+            # Schnellschätzung über Stichproben-Kacheln ohne volle Kodierung
+            print(f"\nBerechne Schnellschätzung...")
+            with timer.stage('estimate'):
+                result = converter.estimate_fast(img, job)
+            if result is not None:
+                print_estimate(result[0], original_size, result[1])
+            else:
+                print("Konnte Größe nicht schätzen.")
+            
+            if args.estimate:
+                print("\nNur Schätzung angefordert. Keine Konvertierung durchgeführt.")
+                report_timings(args, timer, input_path, None)
+                sys.exit(0)
+        
+        # Einmal dekodieren und skalieren - exakte Schätzung und Konvertierung
+        # verwenden denselben kodierten Puffer
+        exact = args.estimate_mode == 'exact' or searching or animated
+        if exact:
+            print(f"\nBerechne Größenprognose...")
+        try:
+            if animated:
+                encoded = converter.encode_animation(img, job, timer)
+            else:
+                prepared = converter.prepare(img, job, timer)
+                if min_ssim:
+                    fit = converter.fit_quality(prepared, job, timer)
+                    print_quality_fit(fit, output_format)
+                    job = fit.job
+                if target_bytes:
+                    fit = converter.fit_size(prepared, job, timer=timer)
+                    print_fit(fit, output_format)
+                    if not fit.fits:
+                        print(f"✗ Zielgröße nicht erreichbar - kleinste Ausgabe: "
+                              f"{len(fit.data) / 1024:.1f} KB", file=sys.stderr)
+                        sys.exit(1)
+                    encoded = fit.data
+                else:
+                    encoded = converter.encode(prepared, job, timer)
+        except Exception as e:
+            print(f"✗ Fehler bei der Konvertierung: {e}", file=sys.stderr)
+            sys.exit(1)
+        
+        if exact:
+            print_estimate(len(encoded) / (1024 * 1024), original_size)
+            
+            # Nur Schätzung anzeigen?
+            if args.estimate:
+                print("\nNur Schätzung angefordert. Keine Konvertierung durchgeführt.")
+                report_timings(args, timer, input_path, None)
+                sys.exit(0)
         
         print(f"\nKonvertiere nach: {output_path}")
         print(f"Format: {output_format}\n")
         
-        # Konvertierung durchführen
-        success, error = convert_image(
-            input_path, output_path, output_format,
-            quality, target_width, target_height
-        )
+        # Bereits kodierten Puffer direkt schreiben
+        with timer.stage('write'), open(output_path, 'wb') as f:
+            f.write(encoded)
         
-        if success:
-            final_size = get_file_size_mb(output_path)
-            print(f"✓ Konvertierung erfolgreich!")
-            print(f"  Ausgabedatei: {output_path}")
-            print(f"  Endgröße: {final_size:.2f} MB")
-            if estimated_size:
-                diff = abs(final_size - estimated_size)
-                print(f"  Abweichung von Schätzung: {diff:.2f} MB")
-        else:
-            print(f"✗ Fehler bei der Konvertierung: {error}", file=sys.stderr)
-            sys.exit(1)
+        final_size = get_file_size_mb(output_path)
+        print(f"✓ Konvertierung erfolgreich!")
+        print(f"  Ausgabedatei: {output_path}")
+        print(f"  Endgröße: {final_size:.2f} MB")
+        
+        if cache_key is not None:
+            try:
+                cache.store(cache_key, output_path)
+            except OSError as e:
+                print(f"Warnung: Ausgabe konnte nicht gecacht werden: {e}", file=sys.stderr)
+            cache.evict()
+            print_cache_summary(cache, cache.hits, cache.misses)
+        
+        report_timings(args, timer, input_path, output_path)
             
     except Exception as e:
         print(f"Fehler: {e}", file=sys.stderr)
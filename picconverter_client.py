@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+PicConverter Client - Schlanker Client für den Konvertierungs-Server
+
+Importiert weder Pillow noch den Konverter, sondern reicht Aufträge an einen
+laufenden Server (picconverter_cli.py --serve) weiter. Die Parameter heißen
+wie die CLI-Optionen; Pfade werden vor dem Senden absolut gemacht, da der
+Server ein anderes Arbeitsverzeichnis haben kann. http.client und der
+Thread-Pool werden erst bei Bedarf importiert - der Start des Clients zählt
+bei jedem Aufruf mit.
+"""
+
+import os
+import sys
+import json
+import socket
+import argparse
+import tempfile
+import threading
+
+DEFAULT_HTTP_PORT = 8765
+
+
+def default_address():
+    """Unix-Socket im Temp-Verzeichnis, ohne Unix-Sockets lokales HTTP"""
+    if hasattr(socket, 'AF_UNIX'):
+        user = os.getuid() if hasattr(os, 'getuid') else 'user'
+        return os.path.join(tempfile.gettempdir(), f'picconverter-{user}.sock')
+    return f'http://127.0.0.1:{DEFAULT_HTTP_PORT}'
+
+
+def parse_address(address):
+    """
+    Wandelt eine Adresse in ('unix', pfad) oder ('http', host, port) um.
+    HTTP: 'http://host:port', 'host:port' oder ':port'; alles andere ist ein Socket-Pfad.
+    """
+    address = str(address or default_address())
+    if address.startswith('http://'):
+        address = address[len('http://'):].rstrip('/')
+    elif os.sep in address or '/' in address or ':' not in address:
+        return ('unix', address)
+    
+    host, _, port = address.rpartition(':')
+    if not port.isdigit():
+        raise ValueError(f"Ungültige Server-Adresse: {address}")
+    return ('http', host or '127.0.0.1', int(port))
+
+
+class ConversionClient:
+    """
+    Verbindung zu einem Konvertierungs-Server. Die Verbindung bleibt für
+    mehrere Aufträge offen; je Thread ein eigener Client.
+    """
+    
+    def __init__(self, address=None, timeout=None):
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self._connection = None
+        self._reader = None
+    
+    def _connect(self):
+        if self.address[0] == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.address[1])
+            except OSError:
+                sock.close()
+                raise
+            self._connection = sock
+            self._reader = sock.makefile('rb')
+        else:
+            import http.client
+            self._connection = http.client.HTTPConnection(self.address[1], self.address[2],
+                                                          timeout=self.timeout)
+    
+    def request(self, payload):
+        """Sendet einen Auftrag und gibt die Antwort des Servers als dict zurück"""
+        if self._connection is None:
+            self._connect()
+        body = json.dumps(payload).encode()
+        try:
+            if self.address[0] == 'unix':
+                self._connection.sendall(body + b'\n')
+                line = self._reader.readline()
+                if not line:
+                    raise ConnectionError("Server hat die Verbindung geschlossen")
+                return json.loads(line)
+            
+            self._connection.request('POST', '/', body, {'Content-Type': 'application/json'})
+            return json.loads(self._connection.getresponse().read())
+        except Exception:
+            # Verbindung in unklarem Zustand - beim nächsten Auftrag neu aufbauen
+            self.close()
+            raise
+    
+    def convert(self, input_path, output_format, output=None, **options):
+        """
+        Konvertiert ein Bild auf dem Server. options entsprechen den
+        CLI-Optionen (quality, width, height, target_size, ...), output_dir
+        legt nur das Ausgabeverzeichnis fest.
+        """
+        payload = {'input': os.path.abspath(input_path), 'format': output_format}
+        if output is not None:
+            payload['output'] = os.path.abspath(output)
+        if options.get('output_dir') is not None:
+            options['output_dir'] = os.path.abspath(options['output_dir'])
+        payload.update((key, value) for key, value in options.items() if value is not None)
+        return self.request(payload)
+    
+    def status(self):
+        return self.request({'command': 'status'})
+    
+    def shutdown(self):
+        return self.request({'command': 'shutdown'})
+    
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def submit_all(submit, inputs, jobs):
+    """Eine Eingabe direkt, mehrere parallel in jobs Threads mit je eigener Verbindung"""
+    if len(inputs) == 1:
+        yield submit(inputs[0])
+        return
+    
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max(1, jobs)) as executor:
+        yield from executor.map(submit, inputs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reicht Konvertierungen an einen laufenden PicConverter-Server weiter',
+        epilog='Server starten: python picconverter_cli.py --serve [ADRESSE]')
+    parser.add_argument('input', nargs='*',
+                       help='Eingabedateien')
+    parser.add_argument('-f', '--format', '--to', dest='format',
+                       help='Zielformat (z.B. jpg, png, webp)')
+    parser.add_argument('-o', '--output',
+                       help='Ausgabedatei, bei mehreren Eingaben Ausgabeverzeichnis')
+    parser.add_argument('-q', '--quality', type=int,
+                       help='Qualität (1-100 für JPEG/WebP, 0-9 für PNG)')
+    parser.add_argument('-w', '--width', type=int,
+                       help='Breite der Ausgabedatei in Pixeln')
+    parser.add_argument('--height', type=int,
+                       help='Höhe der Ausgabedatei in Pixeln')
+    parser.add_argument('--exact-decode', action='store_true',
+                       help='Immer in voller Auflösung dekodieren')
+    parser.add_argument('--resample', choices=('fast', 'balanced', 'best', 'auto'),
+                       help='Skalierung: fast, balanced, best oder auto')
+    parser.add_argument('--background', metavar='FARBE',
+                       help='Hintergrundfarbe für transparente Bereiche bei JPEG/BMP')
+    parser.add_argument('--dedupe-frames', nargs='?', const=0, type=int, metavar='TOLERANZ',
+                       help='Gleiche Frames einer Animation zusammenfassen')
+    parser.add_argument('--target-size', metavar='GRÖSSE',
+                       help='Maximale Dateigröße, z.B. 500KB')
+    parser.add_argument('--auto-quality', action='store_true',
+                       help='Niedrigste Qualität mit ausreichender SSIM wählen')
+    parser.add_argument('--min-ssim', type=float, metavar='WERT',
+                       help='Mindest-SSIM für --auto-quality')
+    parser.add_argument('--max-memory', metavar='GRÖSSE',
+                       help='Speicherbudget, darüber wird streifenweise konvertiert')
+    parser.add_argument('--server', metavar='ADRESSE',
+                       help=f'Socket-Pfad oder http://host:port (Standard: {default_address()})')
+    parser.add_argument('-j', '--jobs', type=int, default=4,
+                       help='Gleichzeitige Aufträge bei mehreren Eingaben (Standard: 4)')
+    parser.add_argument('--status', action='store_true',
+                       help='Zustand des Servers anzeigen')
+    parser.add_argument('--shutdown', action='store_true',
+                       help='Server beenden')
+    args = parser.parse_args()
+    
+    try:
+        if args.status or args.shutdown:
+            with ConversionClient(args.server) as client:
+                response = client.status() if args.status else client.shutdown()
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+            return
+        
+        if not args.input:
+            parser.error('Eingabedateien fehlen')
+        if not args.format:
+            parser.error('-f/--format ist erforderlich')
+        
+        options = {
+            'quality': args.quality, 'width': args.width, 'height': args.height,
+            'exact_decode': args.exact_decode or None, 'background': args.background,
+            'target_size': args.target_size, 'auto_quality': args.auto_quality or None,
+            'min_ssim': args.min_ssim, 'max_memory': args.max_memory,
+            'dedupe_frames': args.dedupe_frames, 'resample': args.resample,
+        }
+        if len(args.input) == 1:
+            output, output_dir = args.output, None
+        else:
+            output, output_dir = None, args.output
+        
+        # Je Thread eine offene Verbindung, der Server verteilt auf seine Worker
+        local = threading.local()
+        clients = []
+        
+        def submit(input_path):
+            if not hasattr(local, 'client'):
+                local.client = ConversionClient(args.server)
+                clients.append(local.client)
+            return input_path, local.client.convert(input_path, args.format, output,
+                                                    output_dir=output_dir, **options)
+        
+        failed = 0
+        try:
+            for input_path, response in submit_all(submit, args.input, args.jobs):
+                if response.get('ok'):
+                    print(f"✓ {input_path} -> {response['output']} "
+                          f"({response['output_bytes'] / 1024:.1f} KB, "
+                          f"{response['elapsed_s'] * 1000:.1f} ms)")
+                else:
+                    failed += 1
+                    print(f"✗ {input_path}: {response.get('error')}", file=sys.stderr)
+        finally:
+            for client in clients:
+                client.close()
+    except OSError as e:
+        print(f"Fehler: Server nicht erreichbar ({e})", file=sys.stderr)
+        sys.exit(2)
+    except ValueError as e:
+        print(f"Fehler: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
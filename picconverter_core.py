@@ -0,0 +1,1426 @@
+#!/usr/bin/env python3
+"""
+PicConverter Core - Gemeinsame Konvertierungs-Engine für CLI und GUI
+
+Stellt ConversionJob (Beschreibung einer Konvertierung) und Converter
+(Dekodieren, Vorbereiten, Kodieren, Schätzen, Batch-Verarbeitung) bereit.
+Das Modul importiert kein tkinter und kann direkt eingebettet werden:
+
+    from picconverter_core import ConversionJob, Converter
+
+    job = ConversionJob('webp', quality=80, width=1920)
+    success, error = Converter().convert('foto.jpg', 'foto.webp', job)
+"""
+
+import io
+import os
+import json
+import math
+import re
+import sys
+import time
+import signal
+import cProfile
+import itertools
+import pstats
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, replace
+from typing import Optional
+
+from PIL import Image, ImageColor
+
+from picconverter_animation import ANIMATION_FORMATS, is_animated, save_animation
+from picconverter_mmap import load_mapped
+from picconverter_quality import DEFAULT_MIN_SSIM, SsimProbe
+from picconverter_stream import memory_required, open_unbounded, stream_convert
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+# Unterstützte Formate (Dateiendung -> Pillow-Format)
+SUPPORTED_FORMATS = {
+    'jpg': 'JPEG',
+    'jpeg': 'JPEG',
+    'png': 'PNG',
+    'bmp': 'BMP',
+    'tiff': 'TIFF',
+    'tif': 'TIFF',
+    'gif': 'GIF',
+    'webp': 'WebP',
+    'ico': 'ICO'
+}
+
+# Qualitäts-/Kompressionseinstellungen je Format
+QUALITY_SETTINGS = {
+    'JPEG': {'min': 1, 'max': 100, 'default': 85, 'name': 'Qualität'},
+    'PNG': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
+    'WebP': {'min': 0, 'max': 100, 'default': 80, 'name': 'Qualität'},
+    'TIFF': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
+}
+
+# Schnellschätzung: Pixelbudget und Raster der Stichproben-Kacheln, Grundfehler
+FAST_ESTIMATE_PIXELS = 1024 * 1024
+FAST_ESTIMATE_GRID = 4
+FAST_ESTIMATE_BASE_ERROR = 0.10
+FAST_ESTIMATE_CONTEXT_RATIO = 8
+FAST_ESTIMATE_CONTEXT_ERROR = 0.12
+
+# Zielgrößen-Suche: Formate mit Qualitäts- bzw. Kompressionsstufe und Formate,
+# bei denen zusätzlich die Palettengröße verringert werden darf
+FIT_QUALITY_FORMATS = ('JPEG', 'WebP', 'PNG')
+FIT_PALETTE_FORMATS = ('PNG', 'GIF')
+FIT_MIN_COLORS = 2
+FIT_MAX_COLORS = 256
+
+# Automatische Qualität (SSIM) nur für verlustbehaftete Formate
+AUTO_QUALITY_FORMATS = ('JPEG', 'WebP')
+
+# Formate ohne Transparenz: Alphakanal wird auf eine Hintergrundfarbe gelegt
+FLATTEN_FORMATS = ('JPEG', 'BMP')
+DEFAULT_BACKGROUND = (255, 255, 255)
+
+# Verkleinertes Dekodieren: Mindestabstand zur Zielgröße vor dem Skalieren
+DRAFT_REDUCING_GAP = 2.0
+REDUCIBLE_MODES = ('L', 'LA', 'RGB', 'RGBA', 'RGBa', 'La', 'I', 'F', 'CMYK')
+
+# Skalierungsstufen (--resample): Filter und reducing_gap für resize(). Mit
+# reducing_gap wird vorab per reduce() (Blockmittel) bis auf das gap-fache
+# der Zielgröße verkleinert, der Filter rechnet dann nur noch den Rest
+RESAMPLE_TIERS = {
+    'fast': (Image.Resampling.BILINEAR, 1.0),
+    'balanced': (Image.Resampling.BICUBIC, 2.0),
+    'best': (Image.Resampling.LANCZOS, None),
+}
+RESAMPLE_CHOICES = tuple(RESAMPLE_TIERS) + ('auto',)
+DEFAULT_RESAMPLE = 'best'
+
+# 'auto': ab diesem Verkleinerungsfaktor 'balanced', ab AUTO_FAST_SCALE 'fast'
+AUTO_BALANCED_SCALE = 2.0
+AUTO_FAST_SCALE = 4.0
+
+# Verarbeitungsschritte der Zeitmessung in Ablaufreihenfolge
+STAGE_LABELS = {
+    'cache': 'Cache',
+    'open': 'Öffnen',
+    'estimate': 'Schätzen',
+    'decode': 'Dekodieren',
+    'flatten': 'Transparenz entfernen',
+    'convert': 'Farbmodus',
+    'resize': 'Skalieren',
+    'fit': 'Einstellung suchen',
+    'save': 'Kodieren',
+    'write': 'Schreiben',
+    'stream': 'Streaming',
+    'frames': 'Frames analysieren',
+    'animation': 'Animation kodieren',
+}
+
+
+def get_file_size_mb(filepath):
+    """Gibt die Dateigröße in MB zurück"""
+    return os.path.getsize(filepath) / (1024 * 1024)
+
+
+def normalize_format(name):
+    """
+    Wandelt eine Dateiendung ('jpg') oder einen Pillow-Formatnamen ('JPEG')
+    in den Pillow-Formatnamen um
+    """
+    key = name.lower().lstrip('.')
+    if key in SUPPORTED_FORMATS:
+        return SUPPORTED_FORMATS[key]
+    
+    for output_format in SUPPORTED_FORMATS.values():
+        if output_format.lower() == key:
+            return output_format
+    
+    raise ValueError(f"Nicht unterstütztes Format: {name}")
+
+
+def format_extension(output_format):
+    """Gibt die übliche Dateiendung für ein Pillow-Format zurück ('JPEG' -> 'jpg')"""
+    for extension, name in SUPPORTED_FORMATS.items():
+        if name == output_format:
+            return extension
+    raise ValueError(f"Nicht unterstütztes Format: {output_format}")
+
+
+def resolve_quality(output_format, quality):
+    """
+    Setzt die Standard-Qualität und validiert den Bereich.
+    Gibt (qualität, warnung) zurück - warnung ist None wenn alles passt.
+    """
+    if output_format not in QUALITY_SETTINGS:
+        return quality, None
+    
+    settings = QUALITY_SETTINGS[output_format]
+    if quality is None:
+        return settings['default'], None
+    
+    if not (settings['min'] <= quality <= settings['max']):
+        warning = (f"Warnung: Qualität {quality} außerhalb des Bereichs "
+                   f"[{settings['min']}-{settings['max']}]. Verwende Standardwert.")
+        return settings['default'], warning
+    
+    return quality, None
+
+
+def check_quality(output_format, quality, name='quality'):
+    """
+    ValueError, wenn quality außerhalb des Bereichs des Formats liegt - für
+    Aufrufer, bei denen ein stiller Standardwert wie in resolve_quality() einen
+    Tippfehler verdecken würde. name benennt die Angabe in der Meldung.
+    """
+    settings = QUALITY_SETTINGS.get(output_format)
+    if quality is not None and settings and not settings['min'] <= quality <= settings['max']:
+        raise ValueError(f"{name} muss für {output_format} zwischen {settings['min']} "
+                         f"und {settings['max']} liegen")
+
+
+def parse_byte_size(text):
+    """Wandelt eine Größenangabe wie '512M', '2GB' oder '1048576' in Bytes um"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:I?B)?\s*', str(text), re.IGNORECASE)
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Ungültige Größenangabe: {text}")
+    exponent = ' KMGT'.index(match.group(2).upper() or ' ')
+    return int(float(match.group(1)) * 1024 ** exponent)
+
+
+def get_save_kwargs(output_format, quality=None):
+    """Gibt die Speicherparameter für das Zielformat zurück"""
+    save_kwargs = {}
+    if output_format == 'JPEG':
+        save_kwargs['quality'] = quality if quality is not None else QUALITY_SETTINGS['JPEG']['default']
+        save_kwargs['optimize'] = True
+    elif output_format == 'PNG':
+        if quality is not None:
+            save_kwargs['compress_level'] = 9 - quality  # Umgekehrt für PNG
+    elif output_format == 'WebP':
+        save_kwargs['quality'] = quality if quality is not None else QUALITY_SETTINGS['WebP']['default']
+    elif output_format == 'TIFF':
+        save_kwargs['compression'] = 'tiff_lzw'
+    return save_kwargs
+
+
+def resample_tier(strategy, source_size, size):
+    """
+    Gibt die Skalierungsstufe für source_size -> size zurück. 'auto' wählt
+    nach dem Verkleinerungsfaktor: kaum verkleinern und vergrößern mit
+    'best', starkes Verkleinern mit 'balanced' bzw. 'fast'.
+    """
+    if strategy != 'auto':
+        return strategy
+    scale = min(source_size[0] / size[0], source_size[1] / size[1])
+    if scale >= AUTO_FAST_SCALE:
+        return 'fast'
+    if scale >= AUTO_BALANCED_SCALE:
+        return 'balanced'
+    return 'best'
+
+
+def resample_filter(strategy, source_size, size):
+    """Gibt (filter, reducing_gap) für resize() nach der Skalierungsstufe zurück"""
+    return RESAMPLE_TIERS[resample_tier(strategy, source_size, size)]
+
+
+def resize_image(img, size, strategy=DEFAULT_RESAMPLE, box=None):
+    """Skaliert img (bzw. den Ausschnitt box) auf size mit der Skalierungsstufe strategy"""
+    source_size = img.size if box is None else (box[2] - box[0], box[3] - box[1])
+    resample, reducing_gap = resample_filter(strategy, source_size, size)
+    return img.resize(size, resample, box=box, reducing_gap=reducing_gap)
+
+
+def parse_color(text):
+    """Wandelt eine Farbangabe wie '#rrggbb', '#rgb' oder 'white' in ein RGB-Tupel um"""
+    try:
+        return ImageColor.getrgb(str(text).strip())[:3]
+    except ValueError:
+        raise ValueError(f"Ungültige Farbangabe: {text}")
+
+
+def flatten_alpha(img, background=DEFAULT_BACKGROUND):
+    """
+    Legt ein Bild mit Transparenz auf die Hintergrundfarbe und gibt ein
+    RGB-Bild zurück. paste() mischt mit dem Alphakanal des Bildes selbst als
+    Maske in einem Durchgang direkt in die Ausgabe (keine Kopie per split()),
+    Palettenbilder werden über ihre Palette gemischt.
+    """
+    background = tuple(background)
+    if img.mode == 'P':
+        return _flatten_palette(img, background)
+    
+    if img.mode in ('RGBa', 'La'):
+        # Vormultipliziertes Alpha erst zurückrechnen
+        img = img.convert(img.mode.upper())
+    elif img.mode == 'PA':
+        img = img.convert('RGBA')
+    elif img.mode in ('L', 'RGB') and 'transparency' in img.info:
+        # Farbschlüssel (tRNS) als Alphakanal
+        img = img.convert('RGBA')
+    elif img.mode not in ('RGBA', 'LA'):
+        return img if img.mode == 'RGB' else img.convert('RGB')
+    
+    flat = Image.new('RGB', img.size, background)
+    flat.paste(img, mask=img)
+    return flat
+
+
+def _flatten_palette(img, background):
+    """
+    Mischt die Palette statt der Pixel mit der Hintergrundfarbe - berücksichtigt
+    RGBA-Paletten und tRNS-Transparenz (Einzelindex oder Alpha je Eintrag)
+    """
+    entries = img.getpalette('RGBA') or []
+    alphas = entries[3::4]
+    transparency = img.info.get('transparency')
+    if isinstance(transparency, int):
+        if transparency < len(alphas):
+            alphas[transparency] = 0
+    elif isinstance(transparency, bytes):
+        for index, alpha in enumerate(transparency[:len(alphas)]):
+            alphas[index] = alpha
+    
+    palette = []
+    for index, alpha in enumerate(alphas):
+        for channel in range(3):
+            palette.append((entries[index * 4 + channel] * alpha
+                            + background[channel] * (255 - alpha) + 127) // 255)
+    
+    flat = img.copy()
+    flat.info.pop('transparency', None)
+    flat.putpalette(palette)
+    return flat.convert('RGB')
+
+
+def peak_rss_bytes():
+    """Speicher-Höchststand (RSS) des Prozesses in Bytes, None ohne resource-Modul"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageTimer:
+    """
+    Misst Dauer und Speicher-Höchststand je Verarbeitungsschritt einer
+    Konvertierung. stages bildet den Schritt (siehe STAGE_LABELS) auf
+    {'seconds': ..., 'peak_rss': ...} ab; peak_rss ist der RSS-Höchststand
+    des Prozesses am Ende des Schritts und steigt daher nie.
+    """
+    def __init__(self):
+        self.stages = {}
+    
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            entry = self.stages.setdefault(name, {'seconds': 0.0, 'peak_rss': None})
+            entry['seconds'] += time.perf_counter() - start
+            entry['peak_rss'] = peak_rss_bytes()
+    
+    @property
+    def total(self):
+        return sum(entry['seconds'] for entry in self.stages.values())
+
+
+class _NullTimer:
+    """Ersatz ohne Messung, wenn kein StageTimer übergeben wurde"""
+    @contextmanager
+    def stage(self, name):
+        yield
+
+
+NULL_TIMER = _NullTimer()
+
+
+class EstimateCancelled(Exception):
+    """Eine laufende Schätzung wurde über ihr cancel-Event abgebrochen"""
+
+
+class ConversionTimeout(Exception):
+    """Eine Konvertierung im Worker hat ihr Zeitlimit überschritten"""
+
+
+class ByteCounter:
+    """
+    Dateiähnliches Ziel, das nur die geschriebenen Bytes zählt.
+    Unterstützt seek/tell, da einige Encoder (z.B. TIFF) zurückspringen.
+    Ist cancel (threading.Event) gesetzt, bricht der nächste Schreibvorgang
+    die Kodierung mit EstimateCancelled ab.
+    """
+    def __init__(self, cancel=None):
+        self.position = 0
+        self.size = 0
+        self.cancel = cancel
+    
+    def write(self, data):
+        if self.cancel is not None and self.cancel.is_set():
+            raise EstimateCancelled()
+        length = len(data)
+        self.position += length
+        self.size = max(self.size, self.position)
+        return length
+    
+    def tell(self):
+        return self.position
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = offset
+        return self.position
+    
+    def flush(self):
+        pass
+
+
+@dataclass
+class ConversionJob:
+    """
+    Beschreibt eine Konvertierung. output_format akzeptiert Dateiendungen
+    ('jpg') und Pillow-Formatnamen ('JPEG'). Ist nur width oder height
+    angegeben, bleibt die andere Kante unverändert - mit keep_aspect=True
+    wird sie stattdessen aus dem Seitenverhältnis berechnet. exact_decode=True
+    erzwingt das Dekodieren in voller Auflösung vor dem Skalieren. Mit
+    max_memory (Bytes) werden Bilder, deren dekodierte Pixel das Budget
+    übersteigen, streifenweise konvertiert (siehe picconverter_stream).
+    Mit target_bytes wird quality ignoriert und stattdessen die beste
+    Einstellung gesucht, deren Ausgabe höchstens so groß ist (siehe
+    Converter.fit_size()); mit min_ssim die niedrigste Qualität, die diese
+    SSIM erreicht (siehe Converter.fit_quality()). background ist die
+    RGB-Farbe, auf die transparente Bereiche bei JPEG/BMP gelegt werden.
+    Animierte Eingaben werden nach GIF/WebP mit allen Frames konvertiert;
+    mit dedupe_frames (Toleranz je Kanal, 0 = nur identische) werden
+    aufeinanderfolgende gleiche Frames zu einem längeren zusammengefasst.
+    resample ist die Skalierungsstufe (siehe RESAMPLE_CHOICES).
+    """
+    output_format: str
+    quality: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    exact_decode: bool = False
+    keep_aspect: bool = False
+    max_memory: Optional[int] = None
+    target_bytes: Optional[int] = None
+    min_ssim: Optional[float] = None
+    background: tuple = DEFAULT_BACKGROUND
+    dedupe_frames: Optional[int] = None
+    resample: str = DEFAULT_RESAMPLE
+    
+    def __post_init__(self):
+        self.output_format = normalize_format(self.output_format)
+        if self.resample not in RESAMPLE_CHOICES:
+            raise ValueError(f"Unbekannte Skalierung: {self.resample} "
+                             f"(erlaubt: {', '.join(RESAMPLE_CHOICES)})")
+    
+    def target_size(self, size):
+        """Gibt die Zielauflösung für ein Bild der Größe size zurück"""
+        if self.keep_aspect and bool(self.width) != bool(self.height):
+            if self.width:
+                return (self.width, max(1, round(size[1] * self.width / size[0])))
+            return (max(1, round(size[0] * self.height / size[1])), self.height)
+        return (self.width or size[0], self.height or size[1])
+
+
+@dataclass
+class SizeFit:
+    """
+    Ergebnis der Zielgrößen-Suche: job enthält die gewählte Qualität, image
+    das zu speichernde Bild (bei verringerter Palette quantisiert), data die
+    kodierte Ausgabe. fits ist False, wenn selbst die kleinste Einstellung
+    über der Zielgröße liegt - data ist dann diese kleinste Ausgabe.
+    """
+    job: ConversionJob
+    image: Image.Image
+    data: bytes
+    probes: int
+    fits: bool
+    colors: Optional[int] = None
+
+
+@dataclass
+class QualityFit:
+    """
+    Ergebnis der automatischen Qualitätswahl: job enthält die gewählte
+    Qualität, ssim den auf dem Proxy gemessenen Wert. fits ist False, wenn
+    selbst die höchste Qualität unter min_ssim bleibt - job verwendet dann diese.
+    """
+    job: ConversionJob
+    ssim: float
+    probes: int
+    fits: bool
+
+
+@dataclass
+class Rendition:
+    """Eine Ausgabevariante eines Rendition-Sets, z.B. 'thumb' oder 'medium'"""
+    name: str
+    job: ConversionJob
+
+
+@dataclass
+class ConversionResult:
+    """Ergebnis einer Konvertierung im Batch-Betrieb"""
+    input_path: str
+    output_path: str
+    success: bool
+    error: Optional[str] = None
+    input_bytes: int = 0
+    output_bytes: int = 0
+    elapsed: float = 0.0
+    cached: bool = False
+    stages: Optional[dict] = None
+
+
+class Converter:
+    """
+    Konvertierungs-Engine - alle Front-Ends laufen über diese Klasse.
+    Mit einem ConversionCache werden bereits erzeugte Ausgaben wiederverwendet.
+    Mit timings=True enthält jedes ConversionResult aus convert_file() die
+    Zeiten je Verarbeitungsschritt (StageTimer.stages). frame_workers ist die
+    Anzahl der Threads, die Frames langer Animationen skalieren (Standard:
+    ein Thread je CPU-Kern).
+    """
+    
+    def __init__(self, cache=None, timings=False, frame_workers=None):
+        self.cache = cache
+        self.timings = timings
+        self.frame_workers = frame_workers or os.cpu_count() or 1
+    
+    def open(self, input_path):
+        """Öffnet ein Bild (nur Header, Pixel werden erst bei Bedarf dekodiert)"""
+        return Image.open(input_path)
+    
+    def prepare(self, img, job, timer=None):
+        """
+        Dekodiert, konvertiert den Farbmodus und skaliert ein geöffnetes Bild.
+        Das Ergebnis kann beliebig oft kodiert werden, ohne erneut zu dekodieren.
+        Mit einem StageTimer werden die einzelnen Schritte gemessen.
+        """
+        timer = timer or NULL_TIMER
+        output_format = job.output_format
+        
+        # Zielgröße vor dem verkleinerten Dekodieren festlegen
+        size = job.target_size(img.size)
+        with timer.stage('decode'):
+            # Unkomprimierte Eingaben direkt aus der abgebildeten Datei, sonst wie gewohnt
+            load_mapped(img)
+            if not job.exact_decode:
+                img = self._reduce_on_load(img, size)
+            img.load()
+        
+        # RGB konvertieren falls nötig (für Formate die kein RGBA unterstützen)
+        if output_format in FLATTEN_FORMATS and (img.mode in ('RGBA', 'LA', 'PA', 'RGBa', 'La', 'P')
+                                                 or 'transparency' in img.info):
+            # Transparenz entfernen
+            with timer.stage('flatten'):
+                img = flatten_alpha(img, job.background)
+        elif img.mode not in ('RGB', 'RGBA', 'L', 'P'):
+            with timer.stage('convert'):
+                img = img.convert('RGB')
+        
+        # Auflösung ändern falls angegeben
+        if size != img.size:
+            with timer.stage('resize'):
+                img = resize_image(img, size, job.resample)
+        
+        return img
+    
+    def _reduce_on_load(self, img, size):
+        """
+        Verkleinert beim Laden um eine Zweierpotenz, wenn deutlich herunterskaliert
+        wird. JPEG wird per draft() direkt in reduzierter Auflösung dekodiert,
+        andere Formate per reduce(). Es bleibt mindestens DRAFT_REDUCING_GAP-fache
+        Zielgröße übrig, damit das abschließende Skalieren die Qualität bestimmt.
+        """
+        scale = min(img.size[0] / size[0], img.size[1] / size[1]) / DRAFT_REDUCING_GAP
+        if scale < 2:
+            return img
+        
+        # draft() wirkt nur vor dem Laden und nur bei JPEG, sonst keine Änderung
+        if img.format == 'JPEG':
+            img.draft(None, (math.ceil(size[0] * DRAFT_REDUCING_GAP),
+                             math.ceil(size[1] * DRAFT_REDUCING_GAP)))
+            scale = min(img.size[0] / size[0], img.size[1] / size[1]) / DRAFT_REDUCING_GAP
+        
+        factor = 2 ** int(math.log2(scale)) if scale >= 2 else 1
+        if factor > 1 and img.mode in REDUCIBLE_MODES:
+            img = img.reduce(factor)
+        
+        return img
+    
+    def save(self, img, fp, job, timer=None):
+        """Kodiert ein vorbereitetes Bild in eine Datei oder ein dateiähnliches Objekt"""
+        with (timer or NULL_TIMER).stage('save'):
+            img.save(fp, format=job.output_format,
+                     **get_save_kwargs(job.output_format, job.quality))
+    
+    def encode(self, img, job, timer=None):
+        """Kodiert ein vorbereitetes Bild in einen Puffer und gibt die Bytes zurück"""
+        buffer = io.BytesIO()
+        self.save(img, buffer, job, timer)
+        return buffer.getvalue()
+    
+    def encode_animation(self, img, job, timer=None):
+        """
+        Kodiert alle Frames eines geöffneten animierten Bildes als GIF/WebP
+        (siehe picconverter_animation) und gibt die Bytes zurück
+        """
+        buffer = io.BytesIO()
+        save_animation(img, buffer, job, self.frame_workers, timer)
+        return buffer.getvalue()
+    
+    def encoded_size(self, img, job, cancel=None):
+        """Gibt die kodierte Größe eines vorbereiteten Bildes in Bytes zurück"""
+        counter = ByteCounter(cancel)
+        self.save(img, counter, job)
+        return counter.size
+    
+    def fit_size(self, img, job, cancel=None, timer=None):
+        """
+        Sucht für ein vorbereitetes Bild die Einstellung mit der besten
+        Qualität, deren Ausgabe höchstens job.target_bytes groß ist.
+        Binärsuche über die Qualität (JPEG/WebP) bzw. Kompressionsstufe (PNG);
+        reicht auch die stärkste Stufe nicht, wird bei PNG und GIF die
+        Palettengröße verringert. Alle Proben kodieren im Speicher und
+        verwenden dasselbe dekodierte, skalierte Bild. Gibt ein SizeFit zurück.
+        """
+        output_format = job.output_format
+        if output_format not in FIT_QUALITY_FORMATS + FIT_PALETTE_FORMATS:
+            raise ValueError(f"Zielgröße wird für {output_format} nicht unterstützt")
+        
+        probes = 0
+        
+        def size_of(image, probe_job):
+            nonlocal probes
+            probes += 1
+            return self.encoded_size(image, probe_job, cancel)
+        
+        def search(low, high, probe):
+            """Höchster Wert in [low, high], dessen Ausgabe passt, sonst None"""
+            best = None
+            while low <= high:
+                middle = (low + high) // 2
+                if probe(middle) <= job.target_bytes:
+                    best = middle
+                    low = middle + 1
+                else:
+                    high = middle - 1
+            return best
+        
+        with (timer or NULL_TIMER).stage('fit'):
+            # Qualität bzw. Kompressionsstufe (PNG: kleinere Qualität = stärkere Kompression)
+            if output_format in FIT_QUALITY_FORMATS:
+                settings = QUALITY_SETTINGS[output_format]
+                lowest = replace(job, quality=settings['min'])
+                # Verlustfreies PNG: die Stufen unterscheiden sich kaum, die starken sind
+                # langsam - passt die stärkste nicht, gleich zur Palette wechseln
+                if output_format != 'PNG' or size_of(img, lowest) <= job.target_bytes:
+                    quality = search(settings['min'] + (output_format == 'PNG'), settings['max'],
+                                     lambda value: size_of(img, replace(job, quality=value)))
+                    if quality is None and output_format == 'PNG':
+                        quality = settings['min']
+                    if quality is not None:
+                        fitted = replace(job, quality=quality)
+                        return SizeFit(fitted, img, self.encode(img, fitted), probes, True)
+            else:
+                lowest = job
+                # Palettenbilder unverändert probieren, andere direkt quantisieren
+                if img.mode == 'P' and size_of(img, job) <= job.target_bytes:
+                    return SizeFit(job, img, self.encode(img, job), probes, True)
+            
+            if output_format not in FIT_PALETTE_FORMATS:
+                return SizeFit(lowest, img, self.encode(img, lowest), probes, False)
+            
+            # Palettengröße verringern, bei PNG mit der (schnellen) Standardstufe
+            palette_job = job
+            if output_format in QUALITY_SETTINGS:
+                palette_job = replace(job, quality=QUALITY_SETTINGS[output_format]['default'])
+            source = img
+            if img.mode not in ('RGB', 'RGBA'):
+                has_alpha = img.mode in ('LA', 'PA') or 'transparency' in img.info
+                source = img.convert('RGBA' if has_alpha else 'RGB')
+            quantized = {}
+            
+            def quantize(colors):
+                if colors not in quantized:
+                    quantized[colors] = source.quantize(colors, method=Image.Quantize.FASTOCTREE)
+                return quantized[colors]
+            
+            colors = search(FIT_MIN_COLORS, FIT_MAX_COLORS,
+                            lambda value: size_of(quantize(value), palette_job))
+            fits = colors is not None
+            colors = colors or FIT_MIN_COLORS
+            image = quantize(colors)
+            return SizeFit(palette_job, image, self.encode(image, palette_job), probes, fits, colors)
+    
+    def fit_quality(self, img, job, timer=None):
+        """
+        Sucht für ein vorbereitetes Bild die niedrigste Qualität, deren
+        Ergebnis mindestens job.min_ssim erreicht (Binärsuche). Gemessen wird
+        auf einem Kachel-Mosaik in Zielauflösung (siehe picconverter_quality),
+        nicht auf dem ganzen Bild. Gibt ein QualityFit zurück.
+        """
+        output_format = job.output_format
+        if output_format not in AUTO_QUALITY_FORMATS:
+            raise ValueError(f"Automatische Qualität wird für {output_format} nicht unterstützt")
+        
+        with (timer or NULL_TIMER).stage('fit'):
+            probe = SsimProbe(img)
+            settings = QUALITY_SETTINGS[output_format]
+            low, high = settings['min'], settings['max']
+            scores = {}
+            best = None
+            while low <= high:
+                middle = (low + high) // 2
+                scores[middle] = probe.score(self.encode(probe.image,
+                                                         replace(job, quality=middle)))
+                if scores[middle] >= job.min_ssim:
+                    best = middle
+                    high = middle - 1
+                else:
+                    low = middle + 1
+            
+            if best is None:
+                best = settings['max']
+                if best not in scores:
+                    scores[best] = probe.score(self.encode(probe.image,
+                                                           replace(job, quality=best)))
+            return QualityFit(replace(job, quality=best), scores[best], len(scores),
+                              scores[best] >= job.min_ssim)
+    
+    def estimate(self, img, job, cancel=None):
+        """
+        Schätzt die Größe der Ausgabedatei in MB ohne Dateisystemzugriff.
+        Gibt None zurück, wenn das Bild nicht kodiert werden kann. Mit cancel
+        (threading.Event) lässt sich die Schätzung aus einem anderen Thread
+        abbrechen, dann wird EstimateCancelled ausgelöst.
+        """
+        try:
+            return self.encoded_size(self.prepare(img, job), job, cancel) / (1024 * 1024)
+        except EstimateCancelled:
+            raise
+        except Exception:
+            return None
+    
+    def estimate_fast(self, img, job, cancel=None):
+        """
+        Schätzt die Ausgabegröße anhand weniger Stichproben-Kacheln.
+        Die Kacheln werden gleichmäßig über das Bild verteilt in Zielauflösung
+        erzeugt und einzeln kodiert. Der Anteil über einer gleichfarbigen
+        Referenzkachel wird auf das ganze Bild hochgerechnet, die Fehlerschranke
+        ergibt sich aus der Streuung zwischen den Kacheln plus einem Grundfehler.
+        Gibt (größe_mb, fehlerschranke_mb) oder None zurück; cancel wie bei estimate().
+        """
+        try:
+            output_format = job.output_format
+            target_width, target_height = job.target_size(img.size)
+            target_pixels = target_width * target_height
+            
+            grid = FAST_ESTIMATE_GRID
+            tile = int(math.sqrt(FAST_ESTIMATE_PIXELS / (grid * grid)))
+            
+            # Kleine Ziele werden exakt kodiert - das ist bereits schnell genug
+            if target_width < tile * grid or target_height < tile * grid:
+                size_mb = self.estimate(img, job)
+                return (size_mb, 0.0) if size_mb is not None else None
+            
+            with self._open_proxy_source(img, (target_width, target_height)) as source:
+                # Gleiche Einstellungen wie der Auftrag, nur ohne Skalierung
+                unscaled = replace(job, width=None, height=None)
+                
+                # ICO speichert höchstens 256x256 - ein Vorschaubild mit mindestens
+                # 256 Pixeln Kantenlänge liefert dieselben Symbolgrößen
+                if output_format == 'ICO':
+                    factor = 256 / min(target_width, target_height)
+                    icon_size = (math.ceil(target_width * factor),
+                                 math.ceil(target_height * factor))
+                    icon = source.resize(icon_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+                    icon = self.prepare(icon, unscaled)
+                    size_mb = self.encoded_size(icon, unscaled, cancel) / (1024 * 1024)
+                    return size_mb, size_mb * FAST_ESTIMATE_BASE_ERROR
+                
+                palette = self._global_palette(source) if output_format == 'GIF' else None
+                scale_x = source.size[0] / target_width
+                scale_y = source.size[1] / target_height
+                tile_pixels = tile * tile
+                
+                samples = []
+                for row in range(grid):
+                    for column in range(grid):
+                        # Kacheln gleichmäßig im Zielbild verteilen
+                        left = (target_width - tile) * column // (grid - 1)
+                        top = (target_height - tile) * row // (grid - 1)
+                        box = (left * scale_x, top * scale_y,
+                               (left + tile) * scale_x, (top + tile) * scale_y)
+                        sample = resize_image(source, (tile, tile), job.resample, box=box)
+                        if palette is not None:
+                            sample = sample.convert('RGB').quantize(
+                                palette=palette, dither=Image.Dither.NONE)
+                        samples.append(self.prepare(sample, unscaled))
+                
+                # Referenz: gleichfarbige Flächen in Kachel- und doppelter Kachelgröße
+                flat = samples[0].resize((1, 1))
+                flat_single = self.encoded_size(flat.resize((tile, tile)), unscaled, cancel)
+                flat_double = self.encoded_size(flat.resize((tile * 2, tile * 2)), unscaled,
+                                                cancel)
+                flat_density = max(0, flat_double - flat_single) / (3 * tile_pixels)
+                
+                densities = []
+                for sample in samples:
+                    payload = self.encoded_size(sample, unscaled, cancel) - flat_single
+                    densities.append(max(0, payload) / tile_pixels)
+                
+                count = len(densities)
+                mean = sum(densities) / count
+                variance = sum((d - mean) ** 2 for d in densities) / (count - 1)
+                
+                estimate = (flat_single + flat_density * (target_pixels - tile_pixels)
+                            + mean * target_pixels)
+                
+                # ~95%-Intervall des Mittelwerts plus Grundfehler (Kachelränder).
+                # Stark komprimierbare Inhalte leben von Wiederholungen über große
+                # Distanzen, die einzelne Kacheln nicht sehen - die Unsicherheit
+                # wächst daher mit dem Logarithmus des Kompressionsverhältnisses.
+                raw_bytes = target_pixels * len(samples[0].getbands())
+                ratio = raw_bytes / max(1.0, estimate)
+                relative_error = FAST_ESTIMATE_BASE_ERROR
+                if ratio > FAST_ESTIMATE_CONTEXT_RATIO:
+                    relative_error += FAST_ESTIMATE_CONTEXT_ERROR * math.log2(
+                        ratio / FAST_ESTIMATE_CONTEXT_RATIO)
+                
+                standard_error = 2 * math.sqrt(variance / count) * target_pixels
+                bound = standard_error + estimate * relative_error
+                
+                return estimate / (1024 * 1024), bound / (1024 * 1024)
+        except EstimateCancelled:
+            raise
+        except Exception:
+            return None
+    
+    @contextmanager
+    def _open_proxy_source(self, img, size):
+        """
+        Öffnet die Quelle für die Schnellschätzung. JPEG-Dateien werden über
+        einen eigenen Dateihandle mit draft() verkleinert dekodiert, damit das
+        übergebene Bild für die eigentliche Konvertierung unverändert bleibt;
+        dieser Handle wird beim Verlassen geschlossen.
+        """
+        filename = getattr(img, 'filename', None)
+        if img.format == 'JPEG' and filename:
+            with Image.open(filename) as source:
+                source.draft('RGB', size)
+                yield source
+        else:
+            yield img
+    
+    def _global_palette(self, source):
+        """Erzeugt eine gemeinsame Palette für alle GIF-Kacheln aus einem Vorschaubild"""
+        preview = source.convert('RGB')
+        preview.thumbnail((256, 256), Image.Resampling.BILINEAR)
+        return preview.quantize(256)
+    
+    def convert(self, input_path, output_path, job, timer=None):
+        """
+        Konvertiert ein Bild in das gewünschte Format.
+        Gibt (erfolg, fehlermeldung) zurück; timer wie bei prepare().
+        """
+        success, error, _ = self._convert_cached(input_path, output_path, job, timer)
+        return success, error
+    
+    def _convert_cached(self, input_path, output_path, job, timer=None):
+        """
+        Wie convert(), stellt bei einem Cache-Treffer aber die gespeicherte
+        Ausgabe bereit. Gibt (erfolg, fehlermeldung, cache_treffer) zurück.
+        """
+        if self.cache is None:
+            success, error = self._convert(input_path, output_path, job, timer)
+            return success, error, False
+        
+        try:
+            with (timer or NULL_TIMER).stage('cache'):
+                key = self.cache.key(input_path, job)
+                hit = self.cache.fetch(key, output_path)
+        except OSError as e:
+            return False, str(e), False
+        if hit:
+            return True, None, True
+        
+        success, error = self._convert(input_path, output_path, job, timer)
+        if success:
+            try:
+                self.cache.store(key, output_path)
+            except OSError:
+                pass  # Ein nicht beschreibbarer Cache darf die Konvertierung nicht scheitern lassen
+        return success, error, False
+    
+    def convert_bytes(self, data, job, timer=None):
+        """
+        Konvertiert ein Bild im Speicher: data sind die kodierten Eingabe-Bytes,
+        zurückgegeben werden die kodierten Ausgabe-Bytes. Ohne Cache und ohne
+        Streaming - übersteigt das Bild job.max_memory, wird abgelehnt. Fehler
+        lösen wie bei encode() Exceptions aus.
+        """
+        timer = timer or NULL_TIMER
+        with timer.stage('open'):
+            img = self.open(io.BytesIO(data))
+        with img:
+            if job.max_memory and memory_required(img) > job.max_memory:
+                raise ValueError("Bild übersteigt das Speicherbudget - Streaming ist nur "
+                                 "mit Dateien möglich")
+            if self.animates(img, job):
+                return self.encode_animation(img, job, timer)
+            prepared = self.prepare(img, job, timer)
+            job, data = self._fit(prepared, job, timer)
+            return data if data is not None else self.encode(prepared, job, timer)
+    
+    def animates(self, img, job):
+        """
+        True, wenn alle Frames von img konvertiert werden (animierte Eingabe,
+        Ausgabe GIF/WebP). Zielgröße und automatische Qualität lösen dann
+        ValueError aus.
+        """
+        if job.output_format not in ANIMATION_FORMATS or not is_animated(img):
+            return False
+        if job.target_bytes or job.min_ssim:
+            raise ValueError("Zielgröße und automatische Qualität werden für "
+                             "Animationen nicht unterstützt")
+        return True
+    
+    def _fit(self, prepared, job, timer):
+        """
+        Wendet automatische Qualität und Zielgröße an. Gibt (job, daten) zurück -
+        daten sind bei Zielgröße bereits kodiert, sonst None.
+        """
+        if job.min_ssim:
+            job = self.fit_quality(prepared, job, timer).job
+        if not job.target_bytes:
+            return job, None
+        
+        fit = self.fit_size(prepared, job, timer=timer)
+        if not fit.fits:
+            raise ValueError(f"Zielgröße {job.target_bytes} Bytes nicht erreichbar "
+                             f"(kleinste Ausgabe: {len(fit.data)} Bytes)")
+        return fit.job, fit.data
+    
+    def _convert(self, input_path, output_path, job, timer=None):
+        """Konvertiert ohne Cache, gibt (erfolg, fehlermeldung) zurück"""
+        timer = timer or NULL_TIMER
+        try:
+            # Mit Speicherbudget übernimmt das Streaming den Schutz vor Riesenbildern
+            opener = open_unbounded if job.max_memory else self.open
+            with timer.stage('open'):
+                img = opener(input_path)
+            with img:
+                if self.animates(img, job):
+                    save_animation(img, output_path, job, self.frame_workers, timer)
+                    return True, None
+                if job.max_memory and memory_required(img) > job.max_memory:
+                    if job.target_bytes or job.min_ssim:
+                        raise ValueError("Zielgröße und automatische Qualität werden im "
+                                         "Streaming-Modus nicht unterstützt")
+                    with timer.stage('stream'):
+                        stream_convert(img, output_path, job, self)
+                    return True, None
+                prepared = self.prepare(img, job, timer)
+                job, data = self._fit(prepared, job, timer)
+                if data is not None:
+                    with timer.stage('write'), open(output_path, 'wb') as f:
+                        f.write(data)
+                else:
+                    self.save(prepared, output_path, job, timer)
+            return True, None
+        except Exception as e:
+            return False, str(e)
+    
+    def convert_file(self, input_path, output_path, job):
+        """Konvertiert ein Bild und gibt ein ConversionResult mit Größen und Dauer zurück"""
+        start = time.perf_counter()
+        result = ConversionResult(str(input_path), str(output_path), False)
+        timer = StageTimer() if self.timings else None
+        try:
+            result.input_bytes = os.path.getsize(input_path)
+            result.success, result.error, result.cached = self._convert_cached(
+                input_path, output_path, job, timer)
+            if result.success:
+                result.output_bytes = os.path.getsize(output_path)
+        except Exception as e:
+            result.error = str(e)
+        
+        result.elapsed = time.perf_counter() - start
+        if timer is not None:
+            result.stages = timer.stages
+        return result
+    
+    def render(self, input_path, renditions):
+        """
+        Erzeugt mehrere Ausgabevarianten aus einmal dekodierten Pixeln.
+        renditions ist eine Folge von (ausgabe, ConversionJob). Die Varianten
+        werden absteigend nach Größe als Kaskade erzeugt, jede aus der kleinsten
+        bereits erzeugten, die in beiden Kanten mindestens so groß ist (sonst
+        aus dem dekodierten Bild). Gibt (dekodierdauer, ergebnisse)
+        zurück - die Ergebnisse in der Reihenfolge der Eingabe, elapsed
+        umfasst Skalieren und Kodieren der jeweiligen Variante.
+        """
+        renditions = list(renditions)
+        results = [ConversionResult(str(input_path), str(output_path), False)
+                   for output_path, _ in renditions]
+        
+        start = time.perf_counter()
+        try:
+            img = self.open(input_path)
+            source_size = img.size
+            sizes = [job.target_size(source_size) for _, job in renditions]
+            
+            # Nur so weit verkleinert dekodieren, wie die breiteste und die
+            # höchste Variante erlauben - bei gemischten Seitenverhältnissen
+            # können das verschiedene sein
+            bound = (max(width for width, _ in sizes), max(height for _, height in sizes))
+            load_mapped(img)
+            if not any(job.exact_decode for _, job in renditions):
+                img = self._reduce_on_load(img, bound)
+            img.load()
+            
+            # Palettenbilder vorab umwandeln, damit die Kaskade mit Filter skaliert
+            if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+                has_alpha = img.mode in ('PA', 'RGBa') or 'transparency' in img.info
+                img = img.convert('RGBA' if has_alpha else 'RGB')
+        except Exception as e:
+            for result in results:
+                result.error = str(e)
+            return time.perf_counter() - start, results
+        
+        decode_time = time.perf_counter() - start
+        for result in results:
+            result.input_bytes = os.path.getsize(input_path)
+        
+        order = sorted(range(len(renditions)),
+                       key=lambda index: sizes[index][0] * sizes[index][1], reverse=True)
+        produced = [img]
+        for index in order:
+            output_path, job = renditions[index]
+            result = results[index]
+            size = sizes[index]
+            start = time.perf_counter()
+            try:
+                # Nie aus einer Zwischenstufe vergrößern, die in einer Kante zu klein ist
+                sources = [image for image in produced
+                           if image.size[0] >= size[0] and image.size[1] >= size[1]]
+                current = min(sources, key=lambda image: image.size[0] * image.size[1],
+                              default=img)
+                if size != current.size:
+                    current = resize_image(current, size, job.resample)
+                    produced.append(current)
+                prepared = self.prepare(current, job)
+                self.save(prepared, output_path, job)
+                result.success = True
+                result.output_bytes = os.path.getsize(output_path)
+            except Exception as e:
+                result.error = str(e)
+            result.elapsed = time.perf_counter() - start
+        
+        return decode_time, results
+    
+    def pool(self, workers=None, profile_path=None):
+        """
+        Erstellt einen Prozess-Pool, dessen Worker mit dem Cache und den
+        Einstellungen dieses Converters arbeiten. Für eigene Warteschlangen
+        zusammen mit submit(). Mit profile_path schreibt jeder Worker ein
+        cProfile-Profil nach '<profile_path>.<pid>' (siehe merge_profiles()).
+        """
+        workers = workers or os.cpu_count() or 1
+        # Die Kerne teilen sich die Worker, Animationen skalieren je Worker mit dem Rest
+        frame_workers = max(1, (os.cpu_count() or 1) // workers)
+        return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                   initargs=(self.cache, self.timings, profile_path,
+                                             frame_workers))
+    
+    def submit(self, pool, input_path, output_path, job):
+        """Reicht eine Konvertierung an einen Pool aus pool() ein; das Future liefert ein ConversionResult"""
+        return pool.submit(_convert_task, (input_path, output_path, job))
+    
+    def submit_bytes(self, pool, data, job, timeout=None):
+        """
+        Wie submit() für convert_bytes(): das Future liefert die Ausgabe-Bytes.
+        Mit timeout bricht der Worker die Konvertierung selbst ab (ConversionTimeout).
+        """
+        return pool.submit(_convert_bytes_task, (data, job, timeout))
+    
+    def render_many(self, tasks, workers=None, chunksize=None, profile_path=None):
+        """
+        Erzeugt Rendition-Sets für viele Bilder parallel im Prozess-Pool.
+        tasks ist eine Folge von (eingabe, [(ausgabe, ConversionJob), ...]);
+        geliefert werden (dekodierdauer, ergebnisse) je Eingabe.
+        """
+        tasks = list(tasks)
+        workers = workers or os.cpu_count() or 1
+        chunksize = chunksize or default_chunksize(len(tasks), workers)
+        
+        with self.pool(workers, profile_path) as executor:
+            yield from executor.map(_render_task, tasks, chunksize=chunksize)
+    
+    def convert_many(self, tasks, workers=None, chunksize=None, profile_path=None):
+        """
+        Konvertiert viele Bilder parallel in einem Prozess-Pool.
+        tasks ist eine Folge von (eingabe, ausgabe, ConversionJob); die
+        Ergebnisse werden in derselben Reihenfolge als ConversionResult geliefert.
+        Mit Cache wird dessen Größe nach dem letzten Ergebnis begrenzt;
+        profile_path wie bei pool().
+        """
+        tasks = list(tasks)
+        workers = workers or os.cpu_count() or 1
+        chunksize = chunksize or default_chunksize(len(tasks), workers)
+        
+        with self.pool(workers, profile_path) as executor:
+            yield from executor.map(_convert_task, tasks, chunksize=chunksize)
+        
+        if self.cache is not None:
+            self.cache.evict()
+
+
+def parse_rendition_spec(spec, default_format=None, default_quality=None):
+    """
+    Liest eine Rendition-Angabe der Form 'BxH[:format[:qualität]]'.
+    Eine Kante darf fehlen ('800x', 'x600') und wird dann aus dem
+    Seitenverhältnis berechnet; 'original' behält die Quellauflösung.
+    """
+    parts = spec.split(':')
+    if len(parts) > 3:
+        raise ValueError(f"Ungültige Rendition-Angabe: {spec}")
+    
+    size = parts[0].strip().lower()
+    output_format = parts[1] if len(parts) > 1 and parts[1] else default_format
+    quality = int(parts[2]) if len(parts) > 2 and parts[2] else default_quality
+    
+    if output_format is None:
+        raise ValueError(f"Kein Format für Rendition '{spec}' angegeben")
+    
+    width = height = None
+    if size != 'original':
+        try:
+            width_text, height_text = size.split('x')
+            width = int(width_text) if width_text else None
+            height = int(height_text) if height_text else None
+        except ValueError:
+            raise ValueError(f"Ungültige Größe in Rendition-Angabe: {spec}")
+        if not width and not height:
+            raise ValueError(f"Ungültige Größe in Rendition-Angabe: {spec}")
+    
+    job = ConversionJob(output_format, quality, width, height, keep_aspect=True)
+    check_quality(job.output_format, job.quality, f"Qualität in Rendition '{spec}'")
+    job.quality, _ = resolve_quality(job.output_format, job.quality)
+    return Rendition(size, job)
+
+
+def load_rendition_profile(path, default_format=None, default_quality=None):
+    """
+    Lädt ein Rendition-Profil aus JSON oder YAML (YAML benötigt PyYAML):
+    
+        {"renditions": [{"name": "thumb", "width": 150, "format": "webp", "quality": 70}, ...]}
+    """
+    with open(path, encoding='utf-8') as f:
+        if str(path).lower().endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML-Profile benötigen PyYAML (pip install PyYAML)")
+            profile = yaml.safe_load(f)
+        else:
+            profile = json.load(f)
+    
+    entries = profile.get('renditions', []) if isinstance(profile, dict) else profile
+    renditions = []
+    for index, entry in enumerate(entries):
+        output_format = entry.get('format', default_format)
+        if output_format is None:
+            raise ValueError(f"Kein Format für Rendition {index + 1} im Profil angegeben")
+        job = ConversionJob(output_format, entry.get('quality', default_quality),
+                            entry.get('width'), entry.get('height'), keep_aspect=True)
+        check_quality(job.output_format, job.quality,
+                      f"Qualität in Rendition {index + 1} im Profil")
+        job.quality, _ = resolve_quality(job.output_format, job.quality)
+        name = entry.get('name') or (f"{job.width or ''}x{job.height or ''}"
+                                     if job.width or job.height else 'original')
+        renditions.append(Rendition(name, job))
+    return renditions
+
+
+# Optionen für job_from_options() - benannt wie die CLI-Optionen
+JOB_OPTION_KEYS = ('format', 'quality', 'width', 'height', 'exact_decode', 'background',
+                   'target_size', 'auto_quality', 'min_ssim', 'max_memory', 'dedupe_frames',
+                   'resample')
+
+
+def job_from_options(options):
+    """
+    Baut einen ConversionJob aus einem dict mit den Namen der CLI-Optionen
+    (format, quality, width, height, exact_decode, background, target_size,
+    auto_quality, min_ssim, max_memory, dedupe_frames, resample). Prüft wie die CLI;
+    ungültige oder unbekannte Angaben lösen ValueError aus.
+    """
+    unknown = set(options) - set(JOB_OPTION_KEYS)
+    if unknown:
+        raise ValueError(f"Unbekannte Parameter: {', '.join(sorted(unknown))}")
+    if not options.get('format'):
+        raise ValueError("'format' ist erforderlich")
+    
+    output_format = normalize_format(str(options['format']))
+    quality = options.get('quality')
+    target_bytes = parse_byte_size(options['target_size']) if options.get('target_size') else None
+    max_memory = parse_byte_size(options['max_memory']) if options.get('max_memory') else None
+    
+    min_ssim = None
+    if options.get('auto_quality'):
+        min_ssim = float(options.get('min_ssim') or DEFAULT_MIN_SSIM)
+        if not 0 < min_ssim <= 1:
+            raise ValueError("min_ssim muss zwischen 0 und 1 liegen")
+        if output_format not in AUTO_QUALITY_FORMATS:
+            raise ValueError(f"Automatische Qualität wird für {output_format} nicht unterstützt")
+        if target_bytes:
+            raise ValueError("auto_quality und target_size schließen sich aus")
+    elif options.get('min_ssim') is not None:
+        raise ValueError("min_ssim ist nur zusammen mit auto_quality verfügbar")
+    if target_bytes and output_format not in FIT_QUALITY_FORMATS + FIT_PALETTE_FORMATS:
+        raise ValueError(f"Zielgröße wird für {output_format} nicht unterstützt")
+    if (target_bytes or min_ssim) and quality is not None:
+        raise ValueError("quality schließt sich mit target_size und auto_quality aus")
+    
+    # Kein stiller Standardwert wie in der CLI: der Auftrag wird abgelehnt
+    quality = None if quality is None else int(quality)
+    check_quality(output_format, quality)
+    quality, _ = resolve_quality(output_format, quality)
+    background = (parse_color(options['background']) if options.get('background')
+                  else DEFAULT_BACKGROUND)
+    width = int(options['width']) if options.get('width') else None
+    height = int(options['height']) if options.get('height') else None
+    dedupe_frames = options.get('dedupe_frames')
+    if dedupe_frames is not None:
+        dedupe_frames = int(dedupe_frames)
+        if not 0 <= dedupe_frames <= 255:
+            raise ValueError("dedupe_frames muss zwischen 0 und 255 liegen")
+    return ConversionJob(output_format, quality, width, height,
+                         exact_decode=bool(options.get('exact_decode')), max_memory=max_memory,
+                         target_bytes=target_bytes, min_ssim=min_ssim, background=background,
+                         dedupe_frames=dedupe_frames,
+                         resample=options.get('resample') or DEFAULT_RESAMPLE)
+
+
+# Dateien je Thread, deren Header gleichzeitig gelesen werden
+INSPECT_IN_FLIGHT_PER_WORKER = 4
+
+
+def inspect_image(path):
+    """
+    Liest nur den Header eines Bildes und gibt dessen Eckdaten als dict
+    zurück: path, format, mode, width, height, bytes, frames, has_alpha,
+    icc, exif (bei TIFF: EXIF-IFD vorhanden). Pixel werden nicht dekodiert -
+    frames zählt bei GIF/TIFF die Frame-Header. Nicht lesbare Dateien lösen
+    OSError aus.
+    """
+    file_bytes = os.path.getsize(path)
+    with Image.open(path) as img:
+        info = img.info
+        has_alpha = (img.mode in ('RGBA', 'LA', 'PA', 'RGBa', 'La') or 'transparency' in info
+                     or (img.mode == 'P' and img.palette is not None
+                         and img.palette.mode == 'RGBA'))
+        # TIFF verweist per Tag 34665 auf das EXIF-IFD, statt es in info abzulegen
+        exif = bool(info.get('exif')) or 34665 in getattr(img, 'tag_v2', {})
+        return {'path': str(path), 'format': img.format, 'mode': img.mode,
+                'width': img.size[0], 'height': img.size[1], 'bytes': file_bytes,
+                'frames': getattr(img, 'n_frames', 1), 'has_alpha': has_alpha,
+                'icc': bool(info.get('icc_profile')), 'exif': exif}
+
+
+def _inspect_entry(path):
+    """inspect_image() mit Fehlern als {'path': ..., 'error': ...}"""
+    try:
+        return inspect_image(path)
+    except Exception as e:
+        return {'path': str(path), 'error': str(e) or type(e).__name__}
+
+
+def inspect_many(paths, workers=None):
+    """
+    Liest die Header vieler Bilder in Threads - beim Öffnen wird vor allem
+    auf das Dateisystem gewartet - und liefert die dicts von inspect_image()
+    in der Reihenfolge der Fertigstellung, bei Fehlern {'path', 'error'}.
+    paths darf ein Iterator sein; je Thread sind höchstens
+    INSPECT_IN_FLIGHT_PER_WORKER Dateien gleichzeitig unterwegs.
+    """
+    paths = iter(paths)
+    workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    if workers == 1:
+        yield from map(_inspect_entry, paths)
+        return
+    
+    with ThreadPoolExecutor(workers) as executor:
+        pending = {executor.submit(_inspect_entry, path)
+                   for path in itertools.islice(paths, workers * INSPECT_IN_FLIGHT_PER_WORKER)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+            pending.update(executor.submit(_inspect_entry, path)
+                           for path in itertools.islice(paths, len(done)))
+
+
+def default_chunksize(task_count, workers):
+    """Wählt eine Chunkgröße, die jedem Worker mehrere Aufträge lässt"""
+    return max(1, min(64, task_count // (workers * 4)))
+
+
+# Converter (und ggf. Profiler) je Worker-Prozess - beim Start oder ersten Auftrag angelegt
+_worker_converter = None
+_worker_profiler = None
+_worker_profile_path = None
+
+
+def merge_profiles(profile_path, extra=()):
+    """
+    Fasst die cProfile-Profile der Worker ('<profile_path>.<pid>') und die
+    Profile aus extra (cProfile.Profile) in profile_path zusammen und
+    entfernt die Einzeldateien. Gibt die Anzahl zusammengefasster Profile zurück.
+    """
+    directory = os.path.dirname(os.path.abspath(profile_path))
+    prefix = os.path.basename(profile_path) + '.'
+    parts = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(prefix) and name[len(prefix):].isdigit()]
+    sources = list(extra) + parts
+    if not sources:
+        return 0
+    
+    stats = pstats.Stats(sources[0])
+    for source in sources[1:]:
+        stats.add(source)
+    stats.dump_stats(profile_path)
+    for part in parts:
+        os.unlink(part)
+    return len(sources)
+
+
+def _init_worker(cache, timings=False, profile_path=None, frame_workers=None):
+    """
+    Legt den Converter eines Worker-Prozesses mit Cache und Einstellungen des
+    Aufrufers an, mit profile_path zusätzlich einen cProfile-Profiler
+    """
+    global _worker_converter, _worker_profiler, _worker_profile_path
+    _worker_converter = Converter(cache, timings, frame_workers)
+    if profile_path:
+        _worker_profiler = cProfile.Profile()
+        _worker_profile_path = f"{profile_path}.{os.getpid()}"
+
+
+def _profiled(function, *args):
+    """Führt function im Worker aus und schreibt dessen Profil fort, falls aktiviert"""
+    if _worker_profiler is None:
+        return function(*args)
+    
+    _worker_profiler.enable()
+    try:
+        return function(*args)
+    finally:
+        _worker_profiler.disable()
+        # Nach jeder Aufgabe schreiben - der Pool meldet das Ende eines Workers nicht
+        _worker_profiler.dump_stats(_worker_profile_path)
+
+
+def _convert_task(task):
+    """
+    Konvertiert ein einzelnes Bild im Worker-Prozess.
+    Muss auf Modulebene liegen, damit es an den Prozess-Pool übergeben werden kann.
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = Converter()
+    
+    input_path, output_path, job = task
+    return _profiled(_worker_converter.convert_file, input_path, output_path, job)
+
+
+def _raise_timeout(signum, frame):
+    raise ConversionTimeout("Zeitlimit der Konvertierung überschritten")
+
+
+def _convert_bytes_task(task):
+    """
+    Konvertiert Bytes im Worker-Prozess (siehe Converter.convert_bytes()).
+    Mit timeout (Sekunden) bricht ein Zeitgeber die Arbeit im Worker ab
+    (nur Unix, zwischen zwei Pillow-Aufrufen), damit ein aufgegebener
+    Auftrag den Worker nicht weiter belegt.
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = Converter()
+    
+    data, job, timeout = task
+    if not timeout or not hasattr(signal, 'setitimer'):
+        return _profiled(_worker_converter.convert_bytes, data, job)
+    
+    previous = signal.signal(signal.SIGALRM, _raise_timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return _profiled(_worker_converter.convert_bytes, data, job)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _render_task(task):
+    """Erzeugt ein Rendition-Set im Worker-Prozess"""
+    global _worker_converter
+    if _worker_converter is None:
+        _worker_converter = Converter()
+    
+    input_path, renditions = task
+    return _profiled(_worker_converter.render, input_path, renditions)
+
+
+# Funktionsschnittstelle - dünne Hüllen um Converter für bestehende Aufrufer
+
+def prepare_image(img, output_format, width=None, height=None, resample=DEFAULT_RESAMPLE):
+    """Dekodiert, konvertiert den Farbmodus und skaliert ein geöffnetes Bild"""
+    return Converter().prepare(img, ConversionJob(output_format, None, width, height,
+                                                  resample=resample))
+
+
+def encode_image(img, output_format, quality=None):
+    """Kodiert ein vorbereitetes Bild in einen Puffer und gibt die Bytes zurück"""
+    return Converter().encode(img, ConversionJob(output_format, quality))
+
+
+def estimate_output_size(image, output_format, quality, width=None, height=None,
+                         mode='exact', resample=DEFAULT_RESAMPLE):
+    """
+    Schätzt die Größe der Ausgabedatei ohne Dateisystemzugriff.
+    mode='fast' verwendet die Schnellschätzung über Stichproben-Kacheln.
+    """
+    job = ConversionJob(output_format, quality, width, height, resample=resample)
+    if mode == 'fast':
+        result = Converter().estimate_fast(image, job)
+        return result[0] if result else None
+    return Converter().estimate(image, job)
+
+
+def estimate_output_size_fast(image, output_format, quality, width=None, height=None,
+                              resample=DEFAULT_RESAMPLE):
+    """Schnellschätzung - gibt (größe_mb, fehlerschranke_mb) oder None zurück"""
+    return Converter().estimate_fast(image, ConversionJob(output_format, quality, width, height,
+                                                          resample=resample))
+
+
+def convert_image(input_path, output_path, output_format, quality=None, width=None, height=None,
+                  timer=None, resample=DEFAULT_RESAMPLE):
+    """
+    Konvertiert ein Bild in das gewünschte Format; timer wie bei Converter.prepare(),
+    resample ist die Skalierungsstufe (siehe RESAMPLE_CHOICES)
+    """
+    job = ConversionJob(output_format, quality, width, height, resample=resample)
+    return Converter().convert(input_path, output_path, job, timer)
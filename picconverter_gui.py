@@ -18,7 +18,15 @@ except ImportError:
     print("\nOder mit pip:", file=sys.stderr)
     print("  pip install Pillow[tk]", file=sys.stderr)
     sys.exit(1)
+import time
 import threading
+from dataclasses import dataclass
+from typing import Optional
+
+from picconverter_core import (DEFAULT_RESAMPLE, QUALITY_SETTINGS, RESAMPLE_CHOICES, STAGE_LABELS,
+                               ConversionJob, Converter, EstimateCancelled, StageTimer,
+                               format_extension, normalize_format, parse_byte_size,
+                               resample_filter)
 
 
 # Unterstützte Formate
@@ -32,13 +40,23 @@ SUPPORTED_FORMATS = {
     'ICO (.ico)': 'ICO'
 }
 
-# Qualitäts-/Kompressionseinstellungen je Format
-QUALITY_SETTINGS = {
-    'JPEG': {'min': 1, 'max': 100, 'default': 85, 'name': 'Qualität'},
-    'PNG': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
-    'WebP': {'min': 0, 'max': 100, 'default': 80, 'name': 'Qualität'},
-    'TIFF': {'min': 0, 'max': 9, 'default': 6, 'name': 'Kompression'},
-}
+# Zustände von Konvertierungsaufträgen (Einzeldatei und Warteschlange)
+JOB_WAITING = 'Wartend'
+JOB_RUNNING = 'Läuft'
+JOB_DONE = 'Fertig'
+JOB_FAILED = 'Fehler'
+JOB_CANCELLED = 'Abgebrochen'
+
+# Warteschlange: eingereichte Aufträge je Worker (hält den Pool ausgelastet,
+# Pause und Abbruch greifen trotzdem schnell) und Abfrageintervall
+QUEUE_IN_FLIGHT_PER_WORKER = 2
+QUEUE_POLL_MS = 100
+
+# Maximale Größe der Vorschau
+PREVIEW_SIZE = (400, 300)
+
+# Verzögerung der Live-Schätzung nach der letzten Eingabe (Regler, Auflösung)
+ESTIMATE_DEBOUNCE_MS = 250
 
 # Modernes Farbschema
 COLORS = {
@@ -67,6 +85,7 @@ class ModernButton(tk.Canvas):
         self.bg_color = kwargs.pop('bg', COLORS['accent'])
         self.hover_color = kwargs.pop('hover_bg', COLORS['accent_hover'])
         self.fg_color = kwargs.pop('fg', COLORS['bg'])
+        self.normal_colors = (self.bg_color, self.hover_color)
         
         # Canvas initialisieren
         super().__init__(parent, highlightthickness=0, width=button_width, 
@@ -100,6 +119,21 @@ class ModernButton(tk.Canvas):
         self.create_text(x1/2, y1/2, text=self.text, fill=fg, 
                         font=('Segoe UI', 10, 'bold'))
         
+    def set_enabled(self, enabled, bg=None, hover_bg=None):
+        """Aktiviert/deaktiviert den Button; deaktiviert wird er grau dargestellt"""
+        self.enabled = enabled
+        if enabled:
+            self.bg_color = bg or self.normal_colors[0]
+            self.hover_color = hover_bg or self.normal_colors[1]
+        else:
+            self.bg_color = COLORS['border']
+            self.hover_color = COLORS['border']
+        self.draw_button()
+    
+    def set_text(self, text):
+        self.text = text
+        self.draw_button()
+    
     def on_click(self, event):
         if self.command and self.enabled:
             self.command()
@@ -112,6 +146,29 @@ class ModernButton(tk.Canvas):
         self.draw_button(hover=False)
 
 
+@dataclass
+class QueueJob:
+    """Eine Datei in der Warteschlange samt Zustand und Ergebnis"""
+    input_path: Path
+    item: str
+    state: str = JOB_WAITING
+    output_path: Optional[Path] = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+    input_bytes: int = 0
+    output_bytes: int = 0
+    future: object = None
+
+
+def is_supported_image(path):
+    """Prüft anhand der Dateiendung, ob PicConverter die Datei lesen kann"""
+    try:
+        normalize_format(Path(path).suffix)
+        return True
+    except ValueError:
+        return False
+
+
 class PicConverterGUI:
     def __init__(self, root):
         self.root = root
@@ -125,11 +182,39 @@ class PicConverterGUI:
         self.input_path = None
         self.image = None
         self.preview_image = None
+        self.preview_generation = 0
         self.output_path = None
+        self.converter = Converter()
+        
+        # Live-Schätzung: ein Hintergrund-Thread bearbeitet immer nur die
+        # neueste Anfrage, Ergebnisse werden je Parametersatz gemerkt
+        self.estimate_cache = {}
+        self.estimate_after_id = None
+        self.estimate_generation = 0
+        self.estimate_request = None
+        self.estimate_running = False
+        self.estimate_lock = threading.Lock()
+        self.estimate_cancel = threading.Event()
+        self.estimate_source = None
+        
+        # Zustand der Einzelkonvertierung und der Warteschlange
+        self.convert_state = None
+        self.queue_jobs = []
+        self.queue_pool = None
+        self.queue_workers = 1
+        self.queue_paused = False
+        self.queue_polling = False
+        self.queue_profile_job = None
+        self.queue_output_dir = None
+        # Für Durchsatz und Restzeit: Start und Ergebnisse des laufenden Durchgangs
+        self.queue_started = None
+        self.queue_run_done = 0
+        self.queue_run_bytes = 0
         
         self.setup_styles()
         self.setup_ui()
-        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+    
     def setup_styles(self):
         """Konfiguriert moderne Styles"""
         style = ttk.Style()
@@ -180,6 +265,17 @@ class PicConverterGUI:
         style.configure('TCheckbutton', background=COLORS['bg'],
                        foreground=COLORS['fg'], font=('Segoe UI', 10))
         
+        # Warteschlange
+        style.configure('Treeview', background=COLORS['tertiary'],
+                       fieldbackground=COLORS['tertiary'], foreground=COLORS['fg'],
+                       font=('Segoe UI', 9), rowheight=22)
+        style.configure('Treeview.Heading', background=COLORS['secondary'],
+                       foreground=COLORS['accent'], font=('Segoe UI', 9, 'bold'))
+        style.configure('TProgressbar', troughcolor=COLORS['secondary'],
+                       background=COLORS['success'])
+        style.configure('TSpinbox', fieldbackground=COLORS['secondary'],
+                       foreground=COLORS['fg'], arrowcolor=COLORS['accent'])
+    
     def setup_ui(self):
         # Canvas mit Scrollbar
         canvas = tk.Canvas(self.root, bg=COLORS['bg'], highlightthickness=0)
@@ -333,6 +429,8 @@ class PicConverterGUI:
         
         self.width_var = tk.StringVar()
         self.height_var = tk.StringVar()
+        self.width_var.trace_add('write', self.schedule_estimate)
+        self.height_var.trace_add('write', self.schedule_estimate)
         
         ttk.Label(resolution_frame, text="Breite:").grid(row=0, column=1, padx=(15, 5))
         width_entry = ttk.Entry(resolution_frame, textvariable=self.width_var, width=10)
@@ -348,9 +446,19 @@ class PicConverterGUI:
         
         self.aspect_ratio_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(resolution_frame, text="Seitenverhältnis beibehalten",
-                       variable=self.aspect_ratio_var).grid(row=1, column=1, columnspan=6,
+                       variable=self.aspect_ratio_var,
+                       command=self.schedule_estimate).grid(row=1, column=1, columnspan=6,
                                                            sticky=tk.W, pady=(10, 0))
         
+        # Skalierungsstufe: fast/balanced sind bei starkem Verkleinern deutlich schneller
+        ttk.Label(resolution_frame, text="Skalierung:").grid(row=2, column=1, sticky=tk.W,
+                                                              padx=(15, 5), pady=(10, 0))
+        self.resample_var = tk.StringVar(value=DEFAULT_RESAMPLE)
+        resample_combo = ttk.Combobox(resolution_frame, textvariable=self.resample_var,
+                                      values=list(RESAMPLE_CHOICES), state="readonly", width=10)
+        resample_combo.grid(row=2, column=2, columnspan=3, sticky=tk.W, padx=5, pady=(10, 0))
+        resample_combo.bind('<<ComboboxSelected>>', self.schedule_estimate)
+        
         # Größenschätzung
         estimate_frame = ttk.Frame(settings_content)
         estimate_frame.grid(row=3, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
@@ -366,6 +474,23 @@ class PicConverterGUI:
                                    bg=COLORS['tertiary'], hover_bg=COLORS['border'])
         estimate_btn.grid(row=0, column=1, padx=(15, 0))
         
+        self.fast_estimate_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(estimate_frame, text="Schnellschätzung (Stichproben)",
+                       variable=self.fast_estimate_var,
+                       command=self.schedule_estimate).grid(row=1, column=0, columnspan=2,
+                                                            sticky=tk.W, pady=(10, 0))
+        
+        # Zielgröße: Qualität bzw. Palette wird passend gesucht
+        target_frame = ttk.Frame(estimate_frame)
+        target_frame.grid(row=2, column=0, columnspan=2, sticky=tk.W, pady=(10, 0))
+        ttk.Label(target_frame, text="Zielgröße:").grid(row=0, column=0, sticky=tk.W)
+        self.target_size_var = tk.StringVar()
+        self.target_size_var.trace_add('write', self.schedule_estimate)
+        ttk.Entry(target_frame, textvariable=self.target_size_var, width=10).grid(
+            row=0, column=1, padx=(10, 5))
+        ttk.Label(target_frame, text="z.B. 500KB - ersetzt die Qualität (JPEG/WebP/PNG/GIF)",
+                  foreground=COLORS['border']).grid(row=0, column=2, sticky=tk.W)
+        
         estimate_frame.columnconfigure(0, weight=1)
         settings_content.columnconfigure(0, weight=1)
         
@@ -393,13 +518,15 @@ class PicConverterGUI:
                                           bg=COLORS['success'],
                                           hover_bg='#94e2d5')
         self.convert_button.grid(row=6, column=0, pady=20)
-        self.convert_button_enabled = False
         self.update_convert_button_state()
         
+        # Warteschlange Card
+        self.setup_queue_card(main_frame)
+        
         # Statusleiste
         status_frame = tk.Frame(main_frame, bg=COLORS['secondary'],
                                height=40, relief='flat')
-        status_frame.grid(row=7, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        status_frame.grid(row=8, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
         status_frame.grid_propagate(False)
         
         self.status_var = tk.StringVar(value="Bereit")
@@ -433,16 +560,98 @@ class PicConverterGUI:
         
         return card
     
+    def setup_queue_card(self, parent):
+        """Warteschlange für viele Dateien mit gemeinsamem Zielprofil"""
+        queue_card = self.create_card(parent, "📋 Warteschlange")
+        queue_card.grid(row=7, column=0, sticky=(tk.W, tk.E), pady=(0, 15))
+        
+        queue_content = ttk.Frame(queue_card)
+        queue_content.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=20, pady=15)
+        
+        # Dateien hinzufügen
+        add_frame = ttk.Frame(queue_content)
+        add_frame.grid(row=0, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ModernButton(add_frame, "Dateien hinzufügen", command=self.queue_add_files,
+                     width=160, height=34).grid(row=0, column=0)
+        ModernButton(add_frame, "Ordner hinzufügen", command=self.queue_add_folder,
+                     width=160, height=34).grid(row=0, column=1, padx=(10, 0))
+        ModernButton(add_frame, "Zielordner", command=self.queue_select_output,
+                     width=120, height=34).grid(row=0, column=2, padx=(10, 0))
+        self.queue_clear_button = ModernButton(add_frame, "Leeren", command=self.queue_clear,
+                                               width=90, height=34, bg=COLORS['tertiary'],
+                                               hover_bg=COLORS['border'], fg=COLORS['fg'])
+        self.queue_clear_button.grid(row=0, column=3, padx=(10, 0))
+        
+        self.queue_output_label = ttk.Label(queue_content,
+                                            text="Ziel: neben der jeweiligen Quelldatei")
+        self.queue_output_label.grid(row=1, column=0, sticky=tk.W, pady=(0, 10))
+        
+        # Dateiliste
+        list_frame = ttk.Frame(queue_content)
+        list_frame.grid(row=2, column=0, sticky=(tk.W, tk.E))
+        
+        self.queue_tree = ttk.Treeview(list_frame, columns=('state', 'time', 'size'),
+                                       height=6, selectmode='none')
+        self.queue_tree.heading('#0', text='Datei', anchor=tk.W)
+        self.queue_tree.heading('state', text='Status', anchor=tk.W)
+        self.queue_tree.heading('time', text='Dauer', anchor=tk.E)
+        self.queue_tree.heading('size', text='Größe', anchor=tk.E)
+        self.queue_tree.column('#0', width=320, stretch=True)
+        self.queue_tree.column('state', width=110, stretch=False)
+        self.queue_tree.column('time', width=70, stretch=False, anchor=tk.E)
+        self.queue_tree.column('size', width=130, stretch=False, anchor=tk.E)
+        self.queue_tree.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        
+        tree_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL,
+                                       command=self.queue_tree.yview)
+        tree_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.queue_tree.configure(yscrollcommand=tree_scrollbar.set)
+        list_frame.columnconfigure(0, weight=1)
+        
+        # Fortschritt
+        self.queue_progress = ttk.Progressbar(queue_content, mode='determinate')
+        self.queue_progress.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=(10, 5))
+        
+        self.queue_progress_var = tk.StringVar(value="Keine Dateien in der Warteschlange")
+        ttk.Label(queue_content, textvariable=self.queue_progress_var).grid(
+            row=4, column=0, sticky=tk.W)
+        
+        # Steuerung
+        control_frame = ttk.Frame(queue_content)
+        control_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=(10, 0))
+        
+        ttk.Label(control_frame, text="Worker:").grid(row=0, column=0, sticky=tk.W)
+        self.queue_workers_var = tk.StringVar(value=str(os.cpu_count() or 1))
+        ttk.Spinbox(control_frame, from_=1, to=max(1, (os.cpu_count() or 1) * 2),
+                    textvariable=self.queue_workers_var, width=4).grid(
+            row=0, column=1, padx=(5, 15))
+        
+        self.queue_start_button = ModernButton(control_frame, "▶ Start",
+                                               command=self.queue_start, width=100, height=34,
+                                               bg=COLORS['success'], hover_bg='#94e2d5')
+        self.queue_start_button.grid(row=0, column=2)
+        self.queue_pause_button = ModernButton(control_frame, "⏸ Pause",
+                                               command=self.queue_toggle_pause,
+                                               width=120, height=34)
+        self.queue_pause_button.grid(row=0, column=3, padx=(10, 0))
+        self.queue_cancel_button = ModernButton(control_frame, "⏹ Abbrechen",
+                                                command=self.queue_cancel, width=120, height=34,
+                                                bg=COLORS['error'], hover_bg='#eba0ac')
+        self.queue_cancel_button.grid(row=0, column=4, padx=(10, 0))
+        self.queue_retry_button = ModernButton(control_frame, "↻ Fehlgeschlagene wiederholen",
+                                               command=self.queue_retry_failed,
+                                               width=230, height=34,
+                                               bg=COLORS['warning'], hover_bg='#f5e0dc')
+        self.queue_retry_button.grid(row=0, column=5, padx=(10, 0))
+        
+        queue_content.columnconfigure(0, weight=1)
+        self.update_queue_buttons()
+    
     def update_convert_button_state(self):
-        """Aktualisiert den Zustand des Konvertieren-Buttons"""
-        self.convert_button.enabled = self.convert_button_enabled
-        if self.convert_button_enabled:
-            self.convert_button.bg_color = COLORS['success']
-            self.convert_button.hover_color = '#94e2d5'
-        else:
-            self.convert_button.bg_color = COLORS['border']
-            self.convert_button.hover_color = COLORS['border']
-        self.convert_button.draw_button()
+        """Aktiviert den Konvertieren-Button, wenn ein Bild geladen ist und keine Konvertierung läuft"""
+        self.convert_button.set_enabled(self.image is not None
+                                        and self.convert_state != JOB_RUNNING)
     
     def select_file(self):
         """Wählt eine Datei aus via Dialog"""
@@ -469,7 +678,9 @@ class PicConverterGUI:
     
     def load_image(self):
         try:
+            # Nur den Header lesen - dekodiert wird im Hintergrund
             self.image = Image.open(self.input_path)
+            self.estimate_source = None
             
             # Bildinformationen
             info = f"📄 Datei: {self.input_path.name}\n"
@@ -482,13 +693,14 @@ class PicConverterGUI:
             self.info_text.insert(1.0, info)
             self.info_text.config(state=tk.DISABLED)
             
-            # Vorschau
-            preview_size = (400, 300)
-            preview_img = self.image.copy()
-            preview_img.thumbnail(preview_size, Image.Resampling.LANCZOS)
-            
-            self.preview_image = ImageTk.PhotoImage(preview_img)
-            self.preview_label.config(image=self.preview_image, text="", bg=COLORS['tertiary'])
+            # Vorschau im Hintergrund erzeugen
+            self.preview_generation += 1
+            self.preview_label.config(image='', text="⏳ Vorschau wird geladen...")
+            thread = threading.Thread(target=self._preview_thread,
+                                      args=(self.preview_generation, self.input_path,
+                                            self.resample_var.get()))
+            thread.daemon = True
+            thread.start()
             
             # Eingabelabel
             short_name = self.input_path.name
@@ -497,12 +709,15 @@ class PicConverterGUI:
             self.input_label.config(text=f"✓ {short_name}",
                                    foreground=COLORS['success'])
             
-            # Standardauflösung
+            # Gemerkte Schätzungen gehören zum vorherigen Bild
+            self.estimate_cache.clear()
+            
+            # Standardauflösung (löst die Live-Schätzung aus)
             self.width_var.set(str(self.image.size[0]))
             self.height_var.set(str(self.image.size[1]))
             
             # Button aktivieren
-            self.convert_button_enabled = True
+            self.convert_state = None
             self.update_convert_button_state()
             
             # Ausgabedatei
@@ -514,6 +729,50 @@ class PicConverterGUI:
             messagebox.showerror("Fehler", f"Fehler beim Laden des Bildes:\n{e}")
             self.status_var.set("✗ Fehler beim Laden")
     
+    def _preview_thread(self, generation, path, resample=DEFAULT_RESAMPLE):
+        """
+        Erzeugt die Vorschau ohne Vollbild-Kopie. JPEG wird zuerst in der
+        kleinsten Stufe dekodiert (draft, bis 1/8); reicht diese nicht für eine
+        scharfe Vorschau, folgt eine zweite Stufe per thumbnail(), das JPEG
+        verkleinert dekodiert und andere Formate per reduce() vorverkleinert.
+        Die zweite Stufe skaliert mit der gewählten Skalierungsstufe resample.
+        """
+        try:
+            with Image.open(path) as img:
+                if img.format == 'JPEG':
+                    img.draft(None, (PREVIEW_SIZE[0] // 4, PREVIEW_SIZE[1] // 4))
+                    sharp = (img.size[0] >= PREVIEW_SIZE[0] * 2
+                             or img.size[1] >= PREVIEW_SIZE[1] * 2)
+                    coarse_filter = (Image.Resampling.LANCZOS if sharp
+                                     else Image.Resampling.BILINEAR)
+                    img.thumbnail(PREVIEW_SIZE, coarse_filter, reducing_gap=None)
+                    self.root.after(0, self._show_preview, generation, img.copy())
+                    if sharp:
+                        return
+            
+            with Image.open(path) as img:
+                method, reducing_gap = resample_filter(resample, img.size, PREVIEW_SIZE)
+                # Ohne eigenes reducing_gap wie thumbnail() bisher: Vorverkleinern bis 2x
+                img.thumbnail(PREVIEW_SIZE, method, reducing_gap=reducing_gap or 2.0)
+                self.root.after(0, self._show_preview, generation, img.copy())
+        except Exception as e:
+            self.root.after(0, self._preview_failed, generation, e)
+    
+    def _show_preview(self, generation, preview_img):
+        """Zeigt eine Vorschaustufe an, sofern inzwischen kein anderes Bild gewählt wurde"""
+        if generation != self.preview_generation:
+            return
+        if preview_img.mode not in ('1', 'L', 'P', 'RGB', 'RGBA'):
+            preview_img = preview_img.convert('RGB')
+        self.preview_image = ImageTk.PhotoImage(preview_img)
+        self.preview_label.config(image=self.preview_image, text="", bg=COLORS['tertiary'])
+    
+    def _preview_failed(self, generation, error):
+        if generation != self.preview_generation:
+            return
+        self.preview_label.config(image='', text="Keine Vorschau verfügbar")
+        self.status_var.set(f"✗ Vorschau fehlgeschlagen: {error}")
+    
     def on_format_change(self, event=None):
         format_name = self.format_var.get()
         output_format = SUPPORTED_FORMATS[format_name]
@@ -527,12 +786,14 @@ class PicConverterGUI:
         else:
             self.quality_label.config(text="Qualität: (nicht verfügbar)")
             self.quality_value_label.config(text="--")
+            self.schedule_estimate()
         
         self.update_output_path()
     
     def on_quality_change(self, event=None):
         value = int(self.quality_var.get())
         self.quality_value_label.config(text=str(value))
+        self.schedule_estimate()
     
     def update_output_path(self):
         if self.input_path:
@@ -578,89 +839,180 @@ class PicConverterGUI:
             self.output_path = Path(filename)
             self.output_label.config(text=self.output_path.name)
     
+    def read_settings(self):
+        """
+        Liest Zielformat, Qualität und Auflösung aus der Oberfläche.
+        Gibt (format, qualität, breite, höhe) zurück - wie bei der Konvertierung.
+        """
+        format_name = self.format_var.get()
+        output_format = SUPPORTED_FORMATS[format_name]
+        
+        quality = None
+        if output_format in QUALITY_SETTINGS:
+            quality = int(self.quality_var.get())
+        
+        width = None
+        height = None
+        try:
+            if self.width_var.get():
+                width = int(self.width_var.get())
+            if self.height_var.get():
+                height = int(self.height_var.get())
+        except ValueError:
+            pass
+        
+        if self.aspect_ratio_var.get() and width and height and self.image:
+            original_ratio = self.image.size[0] / self.image.size[1]
+            if width / height != original_ratio:
+                width = int(height * original_ratio)
+        
+        return output_format, quality, width, height
+    
+    def read_target_bytes(self):
+        """Zielgröße aus der Oberfläche in Bytes, None wenn leer oder ungültig"""
+        text = self.target_size_var.get().strip()
+        if not text:
+            return None
+        try:
+            return parse_byte_size(text)
+        except ValueError:
+            return None
+    
+    def schedule_estimate(self, *args):
+        """
+        Startet die Live-Schätzung nach ESTIMATE_DEBOUNCE_MS neu. Eine laufende
+        Schätzung ist damit veraltet und wird sofort abgebrochen.
+        """
+        if not self.image:
+            return
+        if self.estimate_after_id is not None:
+            self.root.after_cancel(self.estimate_after_id)
+        self.estimate_cancel.set()
+        self.estimate_after_id = self.root.after(ESTIMATE_DEBOUNCE_MS, self.estimate_size)
+    
     def estimate_size(self):
+        """Schätzt die Ausgabegröße im Hintergrund (bzw. sofort aus dem Speicher)"""
+        self.estimate_after_id = None
         if not self.image:
             messagebox.showwarning("Warnung", "Bitte wählen Sie zuerst eine Eingabedatei aus.")
             return
         
-        try:
-            format_name = self.format_var.get()
-            output_format = SUPPORTED_FORMATS[format_name]
-            
-            quality = int(self.quality_var.get()) if output_format in QUALITY_SETTINGS else None
+        output_format, quality, width, height = self.read_settings()
+        if (width is not None and width <= 0) or (height is not None and height <= 0):
+            return
+        key = (str(self.input_path), output_format, quality, width, height,
+               self.fast_estimate_var.get(), self.read_target_bytes(), self.resample_var.get())
+        
+        # Bereits berechnet (z.B. Regler hin und zurück): sofort anzeigen
+        if key in self.estimate_cache:
+            self.show_estimate(*self.estimate_cache[key])
+            return
+        
+        self.estimate_generation += 1
+        self.estimate_label.config(text="Geschätzte Ausgabegröße: wird berechnet...")
+        with self.estimate_lock:
+            self.estimate_cancel.set()
+            self.estimate_request = (self.estimate_generation, key)
+            if not self.estimate_running:
+                self.estimate_running = True
+                threading.Thread(target=self._estimate_thread, daemon=True).start()
+    
+    def _estimate_thread(self):
+        """Bearbeitet Schätzanfragen, bis keine neue mehr vorliegt"""
+        while True:
+            with self.estimate_lock:
+                request = self.estimate_request
+                self.estimate_request = None
+                self.estimate_cancel.clear()
+                if request is None:
+                    self.estimate_running = False
+                    return
             
-            width = None
-            height = None
+            generation, key = request
+            path, output_format, quality, width, height, fast, target_bytes, resample = key
+            job = ConversionJob(output_format, quality, width, height, target_bytes=target_bytes,
+                                resample=resample)
             try:
-                if self.width_var.get():
-                    width = int(self.width_var.get())
-                if self.height_var.get():
-                    height = int(self.height_var.get())
-            except ValueError:
-                pass
+                if target_bytes:
+                    # Zielgröße: dieselbe Suche wie bei der Konvertierung
+                    prepared = self.converter.prepare(self._estimate_image(path), job)
+                    fit = self.converter.fit_size(prepared, job, self.estimate_cancel)
+                    result = (len(fit.data) / (1024 * 1024), None, self.describe_fit(fit))
+                elif fast:
+                    # Frischer Header je Schätzung - draft() verändert das Bild
+                    with self.converter.open(path) as image:
+                        result = self.converter.estimate_fast(image, job, self.estimate_cancel)
+                else:
+                    size = self.calculate_estimated_size(self._estimate_image(path), output_format,
+                                                         quality, width, height,
+                                                         self.estimate_cancel, resample)
+                    result = (size, None) if size is not None else None
+            except EstimateCancelled:
+                continue
+            except Exception:
+                result = None
             
-            estimated_size = self.calculate_estimated_size(self.image, output_format,
-                                                          quality, width, height)
-            
-            if estimated_size is not None:
-                original_size = os.path.getsize(self.input_path) / (1024 * 1024)
-                self.estimate_label.config(
-                    text=f"Geschätzte Ausgabegröße: {estimated_size:.2f} MB "
-                         f"(Original: {original_size:.2f} MB)"
-                )
-                if original_size > 0:
-                    compression = (1 - estimated_size / original_size) * 100
-                    if compression > 0:
-                        self.status_var.set(f"📉 Schätzung: -{compression:.1f}% kleiner")
-                    else:
-                        self.status_var.set(f"📈 Schätzung: +{abs(compression):.1f}% größer")
+            self.root.after(0, self._estimate_done, generation, key, result)
+    
+    def _estimate_image(self, path):
+        """Vollständig dekodiertes Bild für die exakte Schätzung (einmal je Datei, im Worker)"""
+        source = self.estimate_source
+        if source is None or source[0] != path:
+            image = self.converter.open(path)
+            image.load()
+            source = self.estimate_source = (path, image)
+        return source[1]
+    
+    def _estimate_done(self, generation, key, result):
+        """Übernimmt ein Schätzergebnis im Tk-Thread"""
+        if result is not None:
+            self.estimate_cache[key] = result
+        if generation != self.estimate_generation:
+            return  # Inzwischen wurden andere Einstellungen angefragt
+        if result is None:
+            self.estimate_label.config(text="Konnte Größe nicht schätzen")
+            self.status_var.set("✗ Fehler bei Größenberechnung")
+        else:
+            self.show_estimate(*result)
+    
+    def describe_fit(self, fit):
+        """Beschreibt die von der Zielgrößen-Suche gewählte Einstellung"""
+        if not fit.fits:
+            return "Zielgröße nicht erreichbar"
+        settings = []
+        if fit.job.quality is not None:
+            settings.append(f"{QUALITY_SETTINGS[fit.job.output_format]['name']} {fit.job.quality}")
+        if fit.colors is not None:
+            settings.append(f"{fit.colors} Farben")
+        return ', '.join(settings) or "Standard"
+    
+    def show_estimate(self, estimated_size, error_bound=None, fit_note=None):
+        """Zeigt eine Schätzung samt Vergleich zur Originalgröße an"""
+        original_size = os.path.getsize(self.input_path) / (1024 * 1024)
+        bound_text = f" ±{error_bound:.2f}" if error_bound is not None else ""
+        fit_text = f" - {fit_note}" if fit_note else ""
+        self.estimate_label.config(
+            text=f"Geschätzte Ausgabegröße: {estimated_size:.2f}{bound_text} MB "
+                 f"(Original: {original_size:.2f} MB){fit_text}"
+        )
+        if original_size > 0:
+            compression = (1 - estimated_size / original_size) * 100
+            if compression > 0:
+                self.status_var.set(f"📉 Schätzung: -{compression:.1f}% kleiner")
             else:
-                self.estimate_label.config(text="Konnte Größe nicht schätzen")
-                self.status_var.set("✗ Fehler bei Größenberechnung")
-                
-        except Exception as e:
-            messagebox.showerror("Fehler", f"Fehler bei der Größenberechnung:\n{e}")
+                self.status_var.set(f"📈 Schätzung: +{abs(compression):.1f}% größer")
     
-    def calculate_estimated_size(self, image, output_format, quality, width=None, height=None):
-        try:
-            import tempfile
-            
-            temp_img = image.copy()
-            
-            if width and height:
-                temp_img = temp_img.resize((width, height), Image.Resampling.LANCZOS)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f'.{output_format.lower()}') as tmp:
-                temp_path = tmp.name
-            
-            save_kwargs = {}
-            if output_format == 'JPEG':
-                save_kwargs['quality'] = quality if quality else 85
-                save_kwargs['optimize'] = True
-            elif output_format == 'PNG':
-                if quality is not None:
-                    save_kwargs['compress_level'] = 9 - quality
-            elif output_format == 'WebP':
-                save_kwargs['quality'] = quality if quality else 80
-            elif output_format == 'TIFF':
-                save_kwargs['compression'] = 'tiff_lzw'
-            
-            temp_img.save(temp_path, format=output_format, **save_kwargs)
-            
-            size_mb = os.path.getsize(temp_path) / (1024 * 1024)
-            
-            os.unlink(temp_path)
-            
-            return size_mb
-        except Exception:
-            return None
+    def calculate_estimated_size(self, image, output_format, quality, width=None, height=None,
+                                 cancel=None, resample=DEFAULT_RESAMPLE):
+        job = ConversionJob(output_format, quality, width, height, resample=resample)
+        return self.converter.estimate(image, job, cancel)
     
     def convert_image(self):
         if not self.image:
             messagebox.showwarning("Warnung", "Bitte wählen Sie zuerst eine Eingabedatei aus.")
             return
         
-        self.convert_button_enabled = False
+        self.convert_state = JOB_RUNNING
         self.update_convert_button_state()
         self.status_var.set("⏳ Konvertiere...")
         
@@ -669,32 +1021,14 @@ class PicConverterGUI:
         thread.start()
     
     def _convert_thread(self):
+        success = False
         try:
-            format_name = self.format_var.get()
-            output_format = SUPPORTED_FORMATS[format_name]
-            
-            quality = None
-            if output_format in QUALITY_SETTINGS:
-                quality = int(self.quality_var.get())
-            
-            width = None
-            height = None
-            try:
-                if self.width_var.get():
-                    width = int(self.width_var.get())
-                if self.height_var.get():
-                    height = int(self.height_var.get())
-            except ValueError:
-                pass
-            
-            if self.aspect_ratio_var.get() and width and height and self.image:
-                original_ratio = self.image.size[0] / self.image.size[1]
-                if width / height != original_ratio:
-                    width = int(height * original_ratio)
+            output_format, quality, width, height = self.read_settings()
             
+            timer = StageTimer()
             success, error = self.perform_conversion(
                 self.input_path, self.output_path, output_format,
-                quality, width, height
+                quality, width, height, timer, self.read_target_bytes(), self.resample_var.get()
             )
             
             if success:
@@ -705,7 +1039,11 @@ class PicConverterGUI:
                     f"📁 Ausgabedatei: {self.output_path.name}\n"
                     f"💾 Größe: {final_size:.2f} MB"
                 ))
-                self.root.after(0, lambda: self.status_var.set("✓ Konvertierung abgeschlossen"))
+                # Zeiten je Schritt, damit langsame Konvertierungen erklärbar sind
+                stages = ' · '.join(f"{STAGE_LABELS.get(stage, stage)} {entry['seconds'] * 1000:.0f} ms"
+                                    for stage, entry in timer.stages.items())
+                self.root.after(0, lambda: self.status_var.set(
+                    f"✓ Konvertierung abgeschlossen ({stages})"))
             else:
                 self.root.after(0, lambda: messagebox.showerror("Fehler",
                                                                 f"Fehler bei der Konvertierung:\n{error}"))
@@ -715,42 +1053,303 @@ class PicConverterGUI:
             self.root.after(0, lambda: messagebox.showerror("Fehler", f"Unerwarteter Fehler:\n{e}"))
             self.root.after(0, lambda: self.status_var.set("✗ Fehler"))
         finally:
-            self.convert_button_enabled = True
+            self.convert_state = JOB_DONE if success else JOB_FAILED
             self.root.after(0, self.update_convert_button_state)
     
     def perform_conversion(self, input_path, output_path, output_format,
-                          quality=None, width=None, height=None):
+                          quality=None, width=None, height=None, timer=None, target_bytes=None,
+                          resample=DEFAULT_RESAMPLE):
+        job = ConversionJob(output_format, quality, width, height, target_bytes=target_bytes,
+                            resample=resample)
+        return self.converter.convert(input_path, output_path, job, timer)
+    
+    # ---- Warteschlange ----
+    
+    def queue_add_files(self):
+        filenames = filedialog.askopenfilenames(
+            title="Bilder zur Warteschlange hinzufügen",
+            filetypes=[("Alle Bilder", "*.jpg *.jpeg *.png *.bmp *.tiff *.tif *.gif *.webp *.ico"),
+                       ("Alle Dateien", "*.*")]
+        )
+        self.queue_add_paths(Path(filename) for filename in filenames)
+    
+    def queue_add_folder(self):
+        directory = filedialog.askdirectory(title="Ordner zur Warteschlange hinzufügen")
+        if not directory:
+            return
+        
+        paths = []
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            paths.extend(Path(root) / name for name in sorted(files)
+                         if is_supported_image(name))
+        self.queue_add_paths(paths)
+    
+    def queue_add_paths(self, paths):
+        """Fügt Dateien hinzu; bereits enthaltene werden übersprungen"""
+        known = {job.input_path for job in self.queue_jobs}
+        added = 0
+        for path in paths:
+            path = path.resolve()
+            if path in known or not is_supported_image(path):
+                continue
+            known.add(path)
+            item = self.queue_tree.insert('', tk.END, text=path.name,
+                                          values=(JOB_WAITING, '', ''))
+            self.queue_jobs.append(QueueJob(path, item))
+            added += 1
+        
+        if added:
+            self.status_var.set(f"📋 {added} Datei(en) zur Warteschlange hinzugefügt")
+        self.update_queue_progress()
+        self.update_queue_buttons()
+    
+    def queue_select_output(self):
+        directory = filedialog.askdirectory(title="Zielordner für die Warteschlange")
+        if directory:
+            self.queue_output_dir = Path(directory)
+            self.queue_output_label.config(text=f"Ziel: {self.queue_output_dir}")
+    
+    def queue_clear(self):
+        if self.queue_pool is not None:
+            return
+        self.queue_tree.delete(*self.queue_tree.get_children())
+        self.queue_jobs = []
+        self.update_queue_progress()
+        self.update_queue_buttons()
+    
+    def queue_profile(self):
+        """
+        Erstellt den ConversionJob für alle Dateien der Warteschlange aus den
+        aktuellen Einstellungen. Entspricht die Auflösung dem geladenen Bild
+        (Vorgabe beim Laden), behält jede Datei ihre eigene Auflösung.
+        """
+        output_format, quality, width, height = self.read_settings()
+        keep_aspect = self.aspect_ratio_var.get()
+        
+        if self.image is not None and (width, height) == self.image.size:
+            width = height = None
+        if keep_aspect and width and height:
+            # Seitenverhältnis je Datei: die Höhe bestimmt die Skalierung
+            width = None
+        
+        return ConversionJob(output_format, quality, width, height, keep_aspect=keep_aspect,
+                             target_bytes=self.read_target_bytes(), resample=self.resample_var.get())
+    
+    def queue_output_path(self, input_path, job):
+        """Zielpfad einer Datei - im Zielordner oder neben der Quelle"""
+        directory = self.queue_output_dir or input_path.parent
+        output_path = directory / f"{input_path.stem}.{format_extension(job.output_format)}"
+        if output_path == input_path:
+            output_path = directory / f"{input_path.stem}_konvertiert{input_path.suffix}"
+        return output_path
+    
+    def queue_start(self):
+        if self.queue_pool is not None:
+            return
+        if not any(job.state == JOB_WAITING for job in self.queue_jobs):
+            messagebox.showwarning("Warnung", "Die Warteschlange enthält keine wartenden Dateien.")
+            return
+        
         try:
-            img = Image.open(input_path)
-            
-            if output_format in ['JPEG', 'BMP'] and img.mode in ('RGBA', 'LA', 'P'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            elif img.mode not in ('RGB', 'RGBA', 'L', 'P'):
-                img = img.convert('RGB')
-            
-            if width and height:
-                img = img.resize((width, height), Image.Resampling.LANCZOS)
-            
-            save_kwargs = {}
-            if output_format == 'JPEG':
-                save_kwargs['quality'] = quality if quality else 85
-                save_kwargs['optimize'] = True
-            elif output_format == 'PNG':
-                if quality is not None:
-                    save_kwargs['compress_level'] = 9 - quality
-            elif output_format == 'WebP':
-                save_kwargs['quality'] = quality if quality else 80
-            elif output_format == 'TIFF':
-                save_kwargs['compression'] = 'tiff_lzw'
-            
-            img.save(output_path, format=output_format, **save_kwargs)
-            return True, None
+            job = self.queue_profile()
+            self.queue_workers = max(1, int(self.queue_workers_var.get()))
+        except ValueError as e:
+            messagebox.showerror("Fehler", f"Ungültige Einstellungen:\n{e}")
+            return
+        
+        self.queue_profile_job = job
+        self.queue_pool = self.converter.pool(self.queue_workers)
+        self.queue_paused = False
+        self.queue_started = time.perf_counter()
+        self.queue_run_done = 0
+        self.queue_run_bytes = 0
+        self.status_var.set("⏳ Warteschlange läuft...")
+        self.update_queue_buttons()
+        
+        if not self.queue_polling:
+            self.queue_polling = True
+            self.queue_poll()
+    
+    def queue_toggle_pause(self):
+        """Pausieren reicht keine neuen Dateien mehr ein; laufende werden fertig"""
+        if self.queue_pool is None:
+            return
+        self.queue_paused = not self.queue_paused
+        self.status_var.set("⏸ Warteschlange pausiert" if self.queue_paused
+                            else "⏳ Warteschlange läuft...")
+        self.update_queue_buttons()
+    
+    def queue_cancel(self):
+        """Bricht wartende Dateien ab; bereits laufende Worker werden noch beendet"""
+        for queue_job in self.queue_jobs:
+            if queue_job.state == JOB_WAITING:
+                self.set_queue_job_state(queue_job, JOB_CANCELLED)
+            elif queue_job.state == JOB_RUNNING and queue_job.future.cancel():
+                queue_job.future = None
+                self.set_queue_job_state(queue_job, JOB_CANCELLED)
+        self.queue_paused = False
+        self.update_queue_buttons()
+    
+    def queue_retry_failed(self):
+        """Setzt fehlgeschlagene und abgebrochene Dateien zurück und startet erneut"""
+        for queue_job in self.queue_jobs:
+            if queue_job.state in (JOB_FAILED, JOB_CANCELLED):
+                queue_job.error = None
+                self.set_queue_job_state(queue_job, JOB_WAITING)
+        
+        if self.queue_pool is None:
+            self.queue_start()
+        else:
+            self.update_queue_buttons()
+    
+    def queue_poll(self):
+        """
+        Läuft im Tk-Hauptthread alle QUEUE_POLL_MS: übernimmt fertige Ergebnisse,
+        reicht neue Dateien nach (höchstens QUEUE_IN_FLIGHT_PER_WORKER je Worker)
+        und aktualisiert Fortschritt und Restzeit
+        """
+        for queue_job in self.queue_jobs:
+            if queue_job.state == JOB_RUNNING and queue_job.future.done():
+                self.finish_queue_job(queue_job)
+        
+        in_flight = self.queue_count(JOB_RUNNING)
+        if self.queue_pool is not None and not self.queue_paused:
+            limit = self.queue_workers * QUEUE_IN_FLIGHT_PER_WORKER
+            for queue_job in self.queue_jobs:
+                if in_flight >= limit:
+                    break
+                if queue_job.state == JOB_WAITING:
+                    queue_job.output_path = self.queue_output_path(queue_job.input_path,
+                                                                   self.queue_profile_job)
+                    queue_job.future = self.converter.submit(
+                        self.queue_pool, queue_job.input_path, queue_job.output_path,
+                        self.queue_profile_job)
+                    self.set_queue_job_state(queue_job, JOB_RUNNING)
+                    in_flight += 1
+        
+        self.update_queue_progress()
+        
+        if in_flight == 0 and not (self.queue_paused and self.queue_count(JOB_WAITING)):
+            self.queue_finished()
+            return
+        self.root.after(QUEUE_POLL_MS, self.queue_poll)
+    
+    def finish_queue_job(self, queue_job):
+        """Übernimmt das Ergebnis eines fertigen Futures"""
+        future, queue_job.future = queue_job.future, None
+        if future.cancelled():
+            self.set_queue_job_state(queue_job, JOB_CANCELLED)
+            return
+        
+        try:
+            result = future.result()
         except Exception as e:
-            return False, str(e)
+            queue_job.error = str(e)
+            self.set_queue_job_state(queue_job, JOB_FAILED)
+            return
+        
+        queue_job.elapsed = result.elapsed
+        queue_job.input_bytes = result.input_bytes
+        queue_job.output_bytes = result.output_bytes
+        queue_job.error = result.error
+        if result.success:
+            self.queue_run_done += 1
+            self.queue_run_bytes += result.input_bytes
+        self.set_queue_job_state(queue_job, JOB_DONE if result.success else JOB_FAILED)
+    
+    def queue_finished(self):
+        """Beendet den Pool, wenn nichts mehr läuft"""
+        self.queue_polling = False
+        if self.queue_pool is not None:
+            self.queue_pool.shutdown(wait=False)
+            self.queue_pool = None
+        if self.converter.cache is not None:
+            self.converter.cache.evict()
+        
+        done = self.queue_count(JOB_DONE)
+        failed = self.queue_count(JOB_FAILED)
+        cancelled = self.queue_count(JOB_CANCELLED)
+        if failed or cancelled:
+            self.status_var.set(f"⚠ Warteschlange beendet: {done} fertig, {failed} Fehler, "
+                                f"{cancelled} abgebrochen")
+        else:
+            self.status_var.set(f"✓ Warteschlange abgeschlossen: {done} Datei(en)")
+        self.update_queue_progress()
+        self.update_queue_buttons()
+    
+    def set_queue_job_state(self, queue_job, state):
+        queue_job.state = state
+        duration = ''
+        size = ''
+        if state == JOB_DONE:
+            duration = f"{queue_job.elapsed:.1f} s"
+            size = (f"{queue_job.input_bytes / (1024 * 1024):.1f} → "
+                    f"{queue_job.output_bytes / (1024 * 1024):.1f} MB")
+        label = state
+        if state == JOB_FAILED and queue_job.error:
+            label = f"{state}: {queue_job.error}"
+        self.queue_tree.item(queue_job.item, values=(label, duration, size))
+    
+    def queue_count(self, state):
+        return sum(1 for job in self.queue_jobs if job.state == state)
+    
+    def update_queue_progress(self):
+        """Fortschritt, Durchsatz und Restzeit der Warteschlange"""
+        total = len(self.queue_jobs)
+        if not total:
+            self.queue_progress.configure(value=0, maximum=1)
+            self.queue_progress_var.set("Keine Dateien in der Warteschlange")
+            return
+        
+        finished = sum(1 for job in self.queue_jobs
+                       if job.state in (JOB_DONE, JOB_FAILED, JOB_CANCELLED))
+        self.queue_progress.configure(value=finished, maximum=total)
+        text = f"{finished}/{total} Dateien"
+        
+        if self.queue_pool is not None:
+            elapsed = time.perf_counter() - self.queue_started
+            if self.queue_run_done and elapsed > 0:
+                rate = self.queue_run_done / elapsed
+                megabytes = self.queue_run_bytes / (1024 * 1024)
+                remaining = self.queue_count(JOB_WAITING) + self.queue_count(JOB_RUNNING)
+                text += (f" · {rate:.1f} Bilder/s · {megabytes / elapsed:.1f} MB/s"
+                         f" · Restzeit {format_duration(remaining / rate)}")
+            if self.queue_paused:
+                text += " · pausiert"
+        self.queue_progress_var.set(text)
+    
+    def update_queue_buttons(self):
+        running = self.queue_pool is not None
+        has_waiting = any(job.state == JOB_WAITING for job in self.queue_jobs)
+        has_failed = any(job.state in (JOB_FAILED, JOB_CANCELLED) for job in self.queue_jobs)
+        
+        self.queue_start_button.set_enabled(not running and has_waiting)
+        self.queue_pause_button.set_enabled(running)
+        self.queue_pause_button.set_text("▶ Fortsetzen" if self.queue_paused else "⏸ Pause")
+        self.queue_cancel_button.set_enabled(running)
+        self.queue_retry_button.set_enabled(has_failed)
+        self.queue_clear_button.set_enabled(not running and bool(self.queue_jobs))
+    
+    def on_close(self):
+        """Bricht die Warteschlange ab, ohne auf laufende Worker zu warten"""
+        if self.queue_pool is not None:
+            self.queue_cancel()
+            self.queue_pool.shutdown(wait=False)
+            self.queue_pool = None
+        self.root.destroy()
+
+
+def format_duration(seconds):
+    """Formatiert eine Dauer als '1:05:09', '5:09' oder '9 s'"""
+    seconds = int(round(seconds))
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    if minutes:
+        return f"{minutes}:{seconds:02d}"
+    return f"{seconds} s"
 
 
 def main():
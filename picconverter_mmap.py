@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+PicConverter Mmap - Unkomprimierte Eingaben per Memory-Mapping laden
+
+Pillow liest unkomprimierte Pixel (BMP, TIFF ohne Kompression, PPM) in
+64-KB-Blöcken über gepufferte Datei-Ein-/Ausgabe und hängt jeden Block an
+einen Zwischenpuffer, bevor er entpackt wird. load_mapped() bildet die Datei
+stattdessen in den Speicher ab (bei Bytes im Speicher: deren Puffer) und
+entpackt jede Rohdaten-Kachel in einem Durchgang direkt aus den
+abgebildeten Seiten in das Bild.
+
+Liegen die Pixel schon im Speicherlayout von Pillow vor (L, P, RGBA, ...),
+bildet Pillow eine Datei selbst ohne jede Kopie ab - dann bleibt es dabei.
+RGB legt Pillow mit 4 Bytes je Pixel ab, dort ist genau ein Entpacken
+nötig. Komprimierte Formate laden wie bisher.
+"""
+
+import io
+import mmap
+
+from PIL import Image
+
+
+# Formate, deren unkomprimierte Pixel als 'raw'-Kacheln in der Datei liegen
+MAPPED_FORMATS = ('BMP', 'TIFF', 'PPM')
+
+
+def _raw_args(args):
+    """Vereinheitlicht die Argumente einer 'raw'-Kachel zu (rawmode, stride, ausrichtung)"""
+    if not isinstance(args, tuple):
+        args = (args,)
+    return (args + (0, 1))[:3]
+
+
+def _pillow_maps(img):
+    """True, wenn Pillow die Datei beim Laden selbst ohne Kopie abbildet"""
+    if not getattr(img, 'filename', None) or len(img.tile) != 1:
+        return False
+    rawmode = _raw_args(img.tile[0][3])[0]
+    return rawmode == img.mode and rawmode in getattr(Image, '_MAPMODES', ())
+
+
+def mappable(img):
+    """True, wenn load_mapped() das geöffnete Bild laden kann"""
+    if img.format not in MAPPED_FORMATS or not getattr(img, 'tile', None):
+        return False
+    # Eigene Lese-Funktionen eines Plugins lassen sich nicht umgehen
+    if hasattr(img, 'load_read') or hasattr(img, 'load_seek'):
+        return False
+    if any(tile[0] != 'raw' for tile in img.tile) or _pillow_maps(img):
+        return False
+    fp = getattr(img, 'fp', None)
+    return isinstance(fp, io.BytesIO) or hasattr(fp, 'fileno')
+
+
+def _source_buffer(fp):
+    """Gibt (puffer, schließen) für die Eingabe zurück: BytesIO direkt, Dateien per mmap"""
+    if isinstance(fp, io.BytesIO):
+        return fp.getbuffer(), None
+    mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped), mapped
+
+
+def load_mapped(img):
+    """
+    Lädt die Pixel eines geöffneten Bildes direkt aus der abgebildeten Datei.
+    Gibt False zurück, wenn das nicht möglich ist (komprimiert, bereits
+    geladen, kein Dateizugriff) - dann lädt img.load() wie bisher.
+    """
+    if not mappable(img):
+        return False
+    try:
+        view, mapped = _source_buffer(img.fp)
+    except (OSError, ValueError):
+        return False  # z.B. leere Datei oder Gerät ohne mmap
+    
+    try:
+        img.load_prepare()
+        for _, extents, offset, args in img.tile:
+            decoder = Image._getdecoder(img.mode, 'raw', _raw_args(args))
+            try:
+                decoder.setimage(img.im, extents)
+                # Der Decoder nimmt nur die Zeilen der Kachel, der Rest bleibt unberührt
+                consumed, _ = decoder.decode(view[offset:])
+            finally:
+                decoder.cleanup()
+            if consumed >= 0:
+                raise OSError("Bilddatei ist abgeschnitten")
+    finally:
+        view.release()
+        if mapped is not None:
+            mapped.close()
+    
+    img.tile = []
+    img.load_end()
+    return True
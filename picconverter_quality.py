@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+PicConverter Qualität - Wahrnehmungsbasierte Wahl der Kodierqualität
+
+Statt einer festen Standardqualität wird je Bild die niedrigste Qualität
+gesucht, deren Ergebnis eine Mindest-SSIM (Structural Similarity, auf der
+Luminanz) gegenüber dem Original erreicht. Gemessen wird auf einem kleinen
+Proxy: einem Mosaik aus Kacheln in Zielauflösung, die auf 16 Pixel
+ausgerichtet sind. So bleiben die Blockartefakte des Encoders erhalten,
+die ein verkleinertes Bild verbergen würde, und jede Probe kodiert nur
+wenige hunderttausend Pixel. Die SSIM aller Kacheln wird in einem
+vektorisierten Durchgang berechnet.
+
+Benötigt NumPy (pip install numpy).
+"""
+
+import io
+import math
+
+from PIL import Image
+
+# NumPy wird erst bei Bedarf geladen (require_numpy), damit der Import nicht
+# jeden Programmstart verlangsamt
+np = None
+
+
+# SSIM nach Wang et al. mit gleichförmigem 7x7-Fenster auf 8-Bit-Luminanz
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+
+# Proxy: Raster aus PROXY_GRID x PROXY_GRID Kacheln mit PROXY_TILE Pixeln
+# Kantenlänge, ausgerichtet auf JPEG-MCUs bzw. WebP-Makroblöcke
+PROXY_TILE = 128
+PROXY_GRID = 4
+PROXY_ALIGN = 16
+
+# Standard-Schwelle für --auto-quality
+DEFAULT_MIN_SSIM = 0.98
+
+
+def require_numpy():
+    """Lädt NumPy beim ersten Aufruf, ValueError mit Installationshinweis falls es fehlt"""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError("Automatische Qualität benötigt NumPy (pip install numpy)")
+        np = numpy
+
+
+def luma(img):
+    """Luminanz (ITU-R 601) eines Bildes als float64-Array (höhe, breite)"""
+    require_numpy()
+    if img.mode != 'L':
+        img = img.convert('L')
+    return np.asarray(img, dtype=np.float64)
+
+
+def _window_means(stack, window):
+    """
+    Mittelwerte aller vollständigen window x window-Fenster je Ebene eines
+    Stapels (n, höhe, breite) über Integralbilder - ein Durchgang für alle Ebenen
+    """
+    integral = np.zeros((stack.shape[0], stack.shape[1] + 1, stack.shape[2] + 1))
+    np.cumsum(stack, axis=1, out=integral[:, 1:, 1:])
+    np.cumsum(integral[:, 1:, 1:], axis=2, out=integral[:, 1:, 1:])
+    sums = (integral[:, window:, window:] - integral[:, :-window, window:]
+            - integral[:, window:, :-window] + integral[:, :-window, :-window])
+    return sums / (window * window)
+
+
+def ssim_batch(reference, distorted, window=SSIM_WINDOW):
+    """
+    Mittlere SSIM je Ebene zweier gleich großer Stapel (n, höhe, breite) mit
+    Werten 0-255. Gibt ein Array mit n Werten zurück; Ebenen kleiner als das
+    Fenster werden als ganzes Fenster behandelt.
+    """
+    require_numpy()
+    reference = np.asarray(reference, dtype=np.float64)
+    distorted = np.asarray(distorted, dtype=np.float64)
+    window = min(window, reference.shape[1], reference.shape[2])
+    
+    mean_x = _window_means(reference, window)
+    mean_y = _window_means(distorted, window)
+    # Stichproben-Kovarianz wie in der Referenzimplementierung
+    correction = window * window / (window * window - 1) if window > 1 else 1.0
+    var_x = (_window_means(reference * reference, window) - mean_x * mean_x) * correction
+    var_y = (_window_means(distorted * distorted, window) - mean_y * mean_y) * correction
+    covariance = (_window_means(reference * distorted, window) - mean_x * mean_y) * correction
+    
+    ssim_map = ((2 * mean_x * mean_y + SSIM_C1) * (2 * covariance + SSIM_C2)
+                / ((mean_x * mean_x + mean_y * mean_y + SSIM_C1) * (var_x + var_y + SSIM_C2)))
+    return ssim_map.mean(axis=(1, 2))
+
+
+def psnr(reference, distorted):
+    """
+    PSNR in dB zweier gleich großer 8-Bit-Bilder über alle Kanäle;
+    float('inf') bei identischen Bildern
+    """
+    require_numpy()
+    difference = (np.asarray(reference, dtype=np.float64)
+                  - np.asarray(distorted, dtype=np.float64))
+    mse = float(np.mean(difference * difference))
+    return float('inf') if mse == 0 else 10 * math.log10(255 * 255 / mse)
+
+
+def proxy_tiles(img):
+    """
+    Erstellt den Mess-Proxy eines vorbereiteten Bildes. Gibt (mosaik, boxen)
+    zurück; boxen sind die Kachelbereiche im Mosaik als (links, oben, rechts,
+    unten). Kleine Bilder werden unverändert als eine Kachel verwendet.
+    """
+    if img.mode not in ('RGB', 'RGBA', 'L'):
+        img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA')
+                          else 'RGB')
+    
+    width, height = img.size
+    tile = min(PROXY_TILE, width // PROXY_ALIGN * PROXY_ALIGN,
+               height // PROXY_ALIGN * PROXY_ALIGN)
+    if width * height <= (PROXY_TILE * PROXY_GRID) ** 2 or tile < PROXY_ALIGN:
+        return img, [(0, 0, width, height)]
+    
+    mosaic = Image.new(img.mode, (tile * PROXY_GRID, tile * PROXY_GRID))
+    boxes = []
+    for row in range(PROXY_GRID):
+        for column in range(PROXY_GRID):
+            # Gleichmäßig verteilt, Ursprung auf dem Blockraster des Originals
+            left = (width - tile) * column // (PROXY_GRID - 1) // PROXY_ALIGN * PROXY_ALIGN
+            top = (height - tile) * row // (PROXY_GRID - 1) // PROXY_ALIGN * PROXY_ALIGN
+            x, y = column * tile, row * tile
+            mosaic.paste(img.crop((left, top, left + tile, top + tile)), (x, y))
+            boxes.append((x, y, x + tile, y + tile))
+    return mosaic, boxes
+
+
+class SsimProbe:
+    """
+    Vergleicht Kodierungen des Proxys mit dem Original. Die Luminanz des
+    Originals wird einmal berechnet und für alle Proben wiederverwendet.
+    """
+    def __init__(self, img):
+        require_numpy()
+        self.image, self.boxes = proxy_tiles(img)
+        self.reference = self._stack(self.image)
+    
+    def _stack(self, img):
+        plane = luma(img)
+        return np.stack([plane[top:bottom, left:right]
+                         for left, top, right, bottom in self.boxes])
+    
+    def score(self, data):
+        """Mittlere SSIM der kodierten Bytes data über alle Kacheln"""
+        with Image.open(io.BytesIO(data)) as decoded:
+            return float(ssim_batch(self.reference, self._stack(decoded)).mean())
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+PicConverter Scheduler - Batch-Konvertierung unter einem Speicherbudget
+
+Ein Batch aus Vorschaubildern und riesigen Scans passt schlecht zu einem
+Pool mit fester Worker-Zahl: zu viele große Bilder gleichzeitig sprengen
+den Speicher, zu wenige Worker lassen Kerne leer laufen. MemoryScheduler
+liest vorab nur die Header (siehe inspect_many()), schätzt daraus den
+Speicherbedarf jeder Konvertierung und reicht Aufträge erst dann an den
+Pool weiter, wenn sie ins gemeinsame Budget passen - die größten zuerst
+(First-Fit-Decreasing), kleinere füllen die Lücken.
+"""
+
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from PIL import Image
+
+from picconverter_core import inspect_many
+from picconverter_stream import FULL_IMAGE_COPIES, STREAM_BASE_MEMORY
+
+
+# Höchstzahl gespeicherter Messpunkte in samples; darüber wird ausgedünnt
+SAMPLE_LIMIT = 1000
+
+
+def estimate_task_memory(header, job):
+    """
+    Schätzt den Speicherbedarf einer Konvertierung ohne den Grundbedarf des
+    Worker-Prozesses aus den Header-Daten von inspect_image(): dekodiertes
+    Bild samt Zwischenkopien plus die skalierte Ausgabe. Mit job.max_memory
+    bleibt ein größeres Bild per Streaming innerhalb dieses Budgets.
+    Für unlesbare Header gibt es keine Schätzung (None) - der Aufrufer
+    muss vom schlimmsten Fall ausgehen.
+    """
+    if 'error' in header:
+        return None
+    size = (header['width'], header['height'])
+    bytes_per_pixel = 1 if header['mode'] in ('1', 'L', 'P') else 4
+    target = job.target_size(size)
+    estimate = (size[0] * size[1] * bytes_per_pixel * FULL_IMAGE_COPIES
+                + target[0] * target[1] * 4)
+    if job.max_memory:
+        estimate = min(estimate, max(0, job.max_memory - STREAM_BASE_MEMORY))
+    return estimate
+
+
+class MemoryScheduler:
+    """
+    Führt Konvertierungen (eingabe, ausgabe, ConversionJob) im Prozess-Pool
+    eines Converters aus, ohne dass die geschätzten Bedarfe aller laufenden
+    Aufträge budget übersteigen. Vom Budget geht der Grundbedarf der
+    Worker-Prozesse ab. Ein Auftrag, der allein schon nicht hineinpasst,
+    läuft ohne andere Aufträge.
+    
+    Kennzahlen während und nach run(): queue_depth (wartende Aufträge),
+    in_flight und in_flight_bytes (laufende Aufträge und deren Schätzung),
+    die Höchststände peak_*, held_back (wie oft ein freier Worker auf
+    Speicher warten musste) und samples als Zeitreihe (siehe metrics()).
+    samples hält höchstens SAMPLE_LIMIT Messpunkte, bei langen Batches
+    gleichmäßig ausgedünnt; die Höchststände bleiben davon unberührt.
+    """
+    
+    def __init__(self, converter, budget, workers=None):
+        self.converter = converter
+        self.workers = workers or os.cpu_count() or 1
+        self.budget = budget
+        self.job_budget = budget - self.workers * STREAM_BASE_MEMORY
+        if self.job_budget <= 0:
+            raise ValueError(f"Speicherbudget reicht nicht für den Grundbedarf von "
+                             f"{self.workers} Worker(n) "
+                             f"({self.workers * STREAM_BASE_MEMORY // (1024 * 1024)} MB)")
+        
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.in_flight_bytes = 0
+        self.peak_queue_depth = 0
+        self.peak_in_flight = 0
+        self.peak_in_flight_bytes = 0
+        self.held_back = 0
+        self.oversized = 0
+        self.samples = []
+        self._sample_count = 0
+        self._sample_stride = 1
+        self._start = None
+    
+    def plan(self, tasks):
+        """
+        Liest die Header aller Eingaben parallel und gibt (schätzungen, aufträge)
+        aufsteigend nach Schätzung sortiert zurück - der größte Auftrag liegt am Ende.
+        Ein unlesbarer Header zählt wie das ganze Budget, der Auftrag läuft also allein.
+        """
+        tasks = list(tasks)
+        # Gerade die riesigen Scans, die das Budget zurückhalten soll, überschreiten
+        # Pillows Bomben-Grenze - für reine Header-Zugriffe aufheben (wie bei inspect).
+        # Der Pool entsteht erst danach, die Worker erben die Grenze also unverändert.
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            headers = {header['path']: header
+                       for header in inspect_many(str(input_path) for input_path, _, _ in tasks)}
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+        
+        def estimate(task):
+            memory = estimate_task_memory(headers[str(task[0])], task[2])
+            return self.job_budget if memory is None else memory
+        
+        planned = sorted((estimate(task), index) for index, task in enumerate(tasks))
+        return [estimate for estimate, _ in planned], [tasks[index] for _, index in planned]
+    
+    def run(self, tasks, profile_path=None):
+        """
+        Konvertiert alle Aufträge und liefert die ConversionResults in der
+        Reihenfolge der Fertigstellung; profile_path wie bei Converter.pool()
+        """
+        estimates, queue = self.plan(tasks)
+        self._start = time.perf_counter()
+        self.queue_depth = self.peak_queue_depth = len(queue)
+        self._sample()
+        
+        with self.converter.pool(self.workers, profile_path) as pool:
+            running = {}
+            while queue or running:
+                self._admit(estimates, queue, running, pool)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self.in_flight -= 1
+                    self.in_flight_bytes -= running.pop(future)
+                    self._sample()
+                    yield future.result()
+        
+        if self.converter.cache is not None:
+            self.converter.cache.evict()
+    
+    def _admit(self, estimates, queue, running, pool):
+        """Startet den jeweils größten wartenden Auftrag, der noch ins Budget passt"""
+        while queue and len(running) < self.workers:
+            index = bisect_right(estimates, self.job_budget - self.in_flight_bytes) - 1
+            if index < 0:
+                if running:
+                    self.held_back += 1
+                    return
+                # Passt allein nicht ins Budget: ohne andere Aufträge trotzdem starten
+                index = len(queue) - 1
+                self.oversized += 1
+            
+            estimate = estimates.pop(index)
+            input_path, output_path, job = queue.pop(index)
+            running[self.converter.submit(pool, input_path, output_path, job)] = estimate
+            self.queue_depth -= 1
+            self.in_flight += 1
+            self.in_flight_bytes += estimate
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.peak_in_flight_bytes = max(self.peak_in_flight_bytes, self.in_flight_bytes)
+            self._sample()
+    
+    def _sample(self):
+        """Nimmt jeden _sample_stride-ten Zustand auf; über SAMPLE_LIMIT jeden zweiten verwerfen"""
+        self._sample_count += 1
+        if (self._sample_count - 1) % self._sample_stride:
+            return
+        self.samples.append((time.perf_counter() - self._start, self.queue_depth,
+                             self.in_flight, self.in_flight_bytes))
+        if len(self.samples) > SAMPLE_LIMIT:
+            self.samples = self.samples[::2]
+            self._sample_stride *= 2
+    
+    def metrics(self):
+        """Kennzahlen als dict (z.B. für --metrics-json), samples als Liste von dicts"""
+        return {
+            'budget_bytes': self.budget,
+            'job_budget_bytes': self.job_budget,
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': self.in_flight,
+            'in_flight_bytes': self.in_flight_bytes,
+            'peak_queue_depth': self.peak_queue_depth,
+            'peak_in_flight': self.peak_in_flight,
+            'peak_in_flight_bytes': self.peak_in_flight_bytes,
+            'held_back': self.held_back,
+            'oversized': self.oversized,
+            'samples': [{'t_s': t, 'queue_depth': depth, 'in_flight': count,
+                         'in_flight_bytes': used}
+                        for t, depth, count, used in self.samples],
+        }
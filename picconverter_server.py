@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+PicConverter Server - Konvertierungs-Daemon mit warmen Worker-Prozessen
+
+Jeder CLI-Aufruf bezahlt den Start von Python, den Import von Pillow und
+das Laden der Format-Plugins, bevor ein Pixel konvertiert wird - bei
+Vorschaubildern der größte Teil der Zeit. Der Server startet den
+Prozess-Pool einmal, lädt in jedem Worker alle Plugins vorab und nimmt
+Aufträge als JSON entgegen: über einen Unix-Socket (eine Zeile je Auftrag
+und Antwort, die Verbindung bleibt offen) oder lokales HTTP (POST /).
+Die Schlüssel heißen wie die CLI-Optionen, siehe job_from_request().
+Gestartet wird er mit picconverter_cli.py --serve, der schlanke Client ist
+picconverter_client.py.
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import threading
+import socketserver
+import http.server
+from pathlib import Path
+
+from PIL import Image
+
+from picconverter_core import Converter, format_extension, job_from_options
+from picconverter_client import parse_address
+
+# Schlüssel eines Auftrags zusätzlich zu den Bildoptionen (JOB_OPTION_KEYS)
+REQUEST_KEYS = ('command', 'input', 'output', 'output_dir')
+
+# Cache nach so vielen Konvertierungen auf seine Maximalgröße bringen
+CACHE_EVICT_INTERVAL = 100
+
+
+def job_from_request(request):
+    """
+    Baut aus einem Auftrag Eingabe, Ausgabe und ConversionJob. Neben input
+    und optional output bzw. output_dir enthält er die Bildoptionen von
+    job_from_options() (format, quality, width, height, ...). Ungültige
+    Aufträge lösen ValueError aus.
+    """
+    if not request.get('input'):
+        raise ValueError("'input' ist erforderlich")
+    job = job_from_options({key: value for key, value in request.items()
+                            if key not in REQUEST_KEYS})
+    
+    input_path = Path(request['input'])
+    if request.get('output'):
+        output_path = Path(request['output'])
+    else:
+        directory = Path(request.get('output_dir') or input_path.parent)
+        output_path = directory / f"{input_path.stem}.{format_extension(job.output_format)}"
+    return input_path, output_path, job
+
+
+def _warm_worker(delay):
+    """Lädt alle Format-Plugins im Worker; delay verteilt die Aufgaben auf alle Worker"""
+    Image.init()
+    time.sleep(delay)
+    return os.getpid()
+
+
+class ConversionServer:
+    """
+    Hält einen Converter mit Prozess-Pool und beantwortet Aufträge über
+    einen Unix-Socket oder HTTP. Jede Verbindung läuft in einem eigenen
+    Thread; die Konvertierung selbst übernehmen die Worker-Prozesse.
+    """
+    
+    def __init__(self, address=None, converter=None, workers=None):
+        self.address = parse_address(address)
+        self.converter = converter or Converter()
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.server = None
+        self.started = None
+        self.completed = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Startet und wärmt die Worker vor und öffnet den Socket"""
+        self.pool = self.converter.pool(self.workers)
+        warmups = [self.pool.submit(_warm_worker, 0.05) for _ in range(self.workers)]
+        for future in warmups:
+            future.result()
+        
+        if self.address[0] == 'unix':
+            if not hasattr(socket, 'AF_UNIX'):
+                raise ValueError("Unix-Sockets werden hier nicht unterstützt - "
+                                 "http://host:port verwenden")
+            path = self.address[1]
+            if os.path.exists(path):
+                self._remove_stale_socket(path)
+            self.server = socketserver.ThreadingUnixStreamServer(path, _LineHandler)
+            os.chmod(path, 0o600)
+        else:
+            self.server = http.server.ThreadingHTTPServer(self.address[1:], _HttpHandler)
+        self.server.daemon_threads = True
+        self.server.conversion_server = self
+        self.started = time.time()
+    
+    def _remove_stale_socket(self, path):
+        """Entfernt einen verwaisten Socket, bricht ab wenn dort schon ein Server läuft"""
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+        except OSError:
+            os.unlink(path)
+        else:
+            raise OSError(f"Unter {path} läuft bereits ein Server")
+        finally:
+            probe.close()
+    
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+    
+    def close(self):
+        """Schließt Socket und Pool und bringt den Cache auf seine Maximalgröße"""
+        if self.server is not None:
+            self.server.server_close()
+            if self.address[0] == 'unix' and os.path.exists(self.address[1]):
+                os.unlink(self.address[1])
+            self.server = None
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.converter.cache is not None:
+            self.converter.cache.evict()
+    
+    def handle(self, request):
+        """Beantwortet einen Auftrag (dict) und gibt die Antwort als dict zurück"""
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': 'Auftrag muss ein JSON-Objekt sein'}
+        
+        command = request.get('command', 'convert')
+        if command == 'status':
+            return {'ok': True, 'workers': self.workers, 'completed': self.completed,
+                    'failed': self.failed, 'uptime_s': time.time() - self.started}
+        if command == 'shutdown':
+            # shutdown() wartet auf serve_forever(), daher aus einem eigenen Thread
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return {'ok': True}
+        if command != 'convert':
+            return {'ok': False, 'error': f"Unbekannter Befehl: {command}"}
+        
+        try:
+            input_path, output_path, job = job_from_request(request)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+        except (OSError, ValueError, TypeError) as e:
+            return {'ok': False, 'error': str(e)}
+        
+        try:
+            result = self.converter.submit(self.pool, input_path, output_path, job).result()
+        except Exception as e:
+            # z.B. BrokenProcessPool nach einem abgestürzten Worker
+            return {'ok': False, 'error': str(e) or type(e).__name__}
+        with self._lock:
+            if result.success:
+                self.completed += 1
+            else:
+                self.failed += 1
+            evict = (self.converter.cache is not None
+                     and (self.completed + self.failed) % CACHE_EVICT_INTERVAL == 0)
+        if evict:
+            self.converter.cache.evict()
+        
+        return {'ok': result.success, 'error': result.error, 'input': result.input_path,
+                'output': result.output_path, 'input_bytes': result.input_bytes,
+                'output_bytes': result.output_bytes, 'elapsed_s': result.elapsed,
+                'cached': result.cached, 'stages': result.stages}
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    """Unix-Socket: je Zeile ein JSON-Auftrag, je Zeile eine JSON-Antwort"""
+    
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {'ok': False, 'error': f"Ungültiges JSON: {e}"}
+            else:
+                response = self.server.conversion_server.handle(request)
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+class _HttpHandler(http.server.BaseHTTPRequestHandler):
+    """HTTP: POST / mit JSON-Auftrag, GET /status; Verbindungen bleiben offen"""
+    protocol_version = 'HTTP/1.1'
+    
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        try:
+            request = json.loads(body)
+        except ValueError as e:
+            self._reply(400, {'ok': False, 'error': f"Ungültiges JSON: {e}"})
+            return
+        response = self.server.conversion_server.handle(request)
+        self._reply(200, response)
+    
+    def do_GET(self):
+        if self.path.rstrip('/') != '/status':
+            self._reply(404, {'ok': False, 'error': 'Nur GET /status und POST /'})
+            return
+        self._reply(200, self.server.conversion_server.handle({'command': 'status'}))
+    
+    def _reply(self, status, response):
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        # Kein Zugriffsprotokoll auf stderr je Auftrag
+        pass
+
+
+def serve(address=None, converter=None, workers=None):
+    """Startet einen Server und bedient Aufträge bis shutdown, SIGTERM oder Strg+C"""
+    server = ConversionServer(address, converter, workers)
+    server.start()
+    # SIGTERM (kill, systemd) beendet wie der shutdown-Befehl: Socket und Pool aufräumen
+    signal.signal(signal.SIGTERM, lambda signum, frame: server.handle({'command': 'shutdown'}))
+    kind, *location = server.address
+    where = location[0] if kind == 'unix' else f"http://{location[0]}:{location[1]}"
+    print(f"PicConverter-Server bereit: {where} ({server.workers} Worker)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nServer beendet.")
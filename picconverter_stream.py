@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+PicConverter Stream - Streifenweise Konvertierung für Bilder größer als der Arbeitsspeicher
+
+Liest BMP, unkomprimierte TIFF und PNG (8 Bit, ohne Interlacing) in
+horizontalen Streifen, wandelt jeden Streifen um, verkleinert optional um
+einen ganzzahligen Faktor und schreibt BMP, TIFF oder PNG streifenweise.
+Der Speicherbedarf hängt nur von Bildbreite und Streifenhöhe ab, die
+Streifenhöhe wird aus dem Speicherbudget berechnet.
+"""
+
+import io
+import math
+import struct
+import zlib
+from dataclasses import replace
+
+from PIL import Image
+
+
+STREAM_INPUT_FORMATS = ('BMP', 'TIFF', 'PNG')
+STREAM_OUTPUT_FORMATS = ('BMP', 'TIFF', 'PNG')
+
+# Grundbedarf des Prozesses (Interpreter, Pillow) und Anzahl gleichzeitiger
+# Kopien eines Streifens in der Pipeline (Rohdaten, Bild, Umwandlung, Kodierung),
+# gemessen mit benchmarks/stream_memory_check.py
+STREAM_BASE_MEMORY = 64 * 1024 * 1024
+STREAM_STRIP_COPIES = 10
+
+# Kopien des ganzen Bildes bei Konvertierung im Speicher (dekodiert, umgewandelt,
+# kodierter Puffer)
+FULL_IMAGE_COPIES = 3
+
+# Größe der geschriebenen PNG-IDAT-Chunks
+PNG_CHUNK_SIZE = 1024 * 1024
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+PNG_CHANNELS = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+class StreamingNotSupported(ValueError):
+    """Das Bild oder Zielformat kann nicht streifenweise verarbeitet werden"""
+
+
+def pixel_bytes(img):
+    """Bytes je Pixel im Speicher - Pillow legt mehrkanalige Bilder mit 4 Bytes ab"""
+    return 1 if img.mode in ('1', 'L', 'P') else 4
+
+
+def memory_required(img):
+    """Schätzt den Spitzenbedarf einer Konvertierung im Speicher in Bytes"""
+    return (img.size[0] * img.size[1] * pixel_bytes(img) * FULL_IMAGE_COPIES
+            + STREAM_BASE_MEMORY)
+
+
+def reduction_factor(size, target):
+    """
+    Bestimmt den ganzzahligen Verkleinerungsfaktor von size auf target.
+    Streaming unterstützt nur ganzzahlige Faktoren (1 = nur Formatwandlung).
+    """
+    factor = max(1, round(size[0] / target[0]))
+    for source, wanted in zip(size, target):
+        if wanted not in (source // factor, math.ceil(source / factor)):
+            raise StreamingNotSupported(
+                f"Streaming unterstützt nur ganzzahlige Verkleinerung "
+                f"({size[0]}x{size[1]} -> {target[0]}x{target[1]})")
+    return factor
+
+
+def strip_height(width, factor, max_memory):
+    """Berechnet die Streifenhöhe (Vielfaches von factor) für ein Speicherbudget"""
+    budget = max(0, max_memory - STREAM_BASE_MEMORY)
+    rows = budget // (width * 4 * STREAM_STRIP_COPIES)
+    return max(factor, rows // factor * factor)
+
+
+def open_strip_reader(img):
+    """Gibt einen passenden Streifenleser für ein geöffnetes Bild zurück"""
+    if img.format == 'PNG':
+        return PngStripReader(img)
+    if img.format in ('BMP', 'TIFF'):
+        return RawStripReader(img)
+    raise StreamingNotSupported(f"Streaming-Eingabe für {img.format} nicht unterstützt")
+
+
+def open_strip_writer(output_path, output_format, size, mode, save_kwargs):
+    """Gibt einen passenden Streifenschreiber für das Zielformat zurück"""
+    if output_format == 'BMP':
+        return BmpStripWriter(output_path, size, mode)
+    if output_format == 'TIFF':
+        return TiffStripWriter(output_path, size, mode, save_kwargs)
+    if output_format == 'PNG':
+        return PngStripWriter(output_path, size, mode, save_kwargs)
+    raise StreamingNotSupported(f"Streaming-Ausgabe als {output_format} nicht unterstützt")
+
+
+class StripReader:
+    """
+    Basisklasse der Streifenleser. Palette und Transparenz werden aus dem
+    Header übernommen - getpalette() würde das ganze Bild dekodieren.
+    """
+    def __init__(self, img):
+        self.img = img
+        self.size = img.size
+        self.palette = img.palette if img.mode == 'P' else None
+    
+    def _with_palette(self, strip):
+        """Überträgt Palette und Transparenz des Quellbildes auf einen Streifen"""
+        if self.palette is not None:
+            strip.putpalette(self.palette.palette, self.palette.rawmode or self.palette.mode)
+            if 'transparency' in self.img.info:
+                strip.info['transparency'] = self.img.info['transparency']
+        return strip
+
+
+class RawStripReader(StripReader):
+    """
+    Liest unkomprimierte Zeilen direkt aus der Datei (BMP, TIFF ohne
+    Kompression). Verwendet die von Pillow ermittelten Rohdaten-Kacheln
+    und liest je Streifen nur die benötigten Bytes.
+    """
+    def __init__(self, img):
+        super().__init__(img)
+        self.tiles = []
+        
+        width = img.size[0]
+        for tile in img.tile:
+            codec, extents, offset, args = tile[:4]
+            if codec != 'raw' or extents[0] != 0 or extents[2] != width:
+                raise StreamingNotSupported(
+                    f"{img.format} ist komprimiert oder gekachelt - kein Streaming möglich")
+            if not isinstance(args, tuple):
+                args = (args,)
+            rawmode, stride, orientation = (args + (0, 1))[:3]
+            if not stride:
+                stride = self._row_stride(rawmode, extents)
+            self.tiles.append((extents[1], extents[3], offset, rawmode, stride, orientation))
+    
+    def _row_stride(self, rawmode, extents):
+        """Ermittelt die Zeilenlänge in Bytes für Kacheln ohne Angabe"""
+        counts = getattr(self.img, 'tag_v2', {}).get(279)
+        if counts and len(counts) == len(self.img.tile):
+            return counts[0] // (extents[3] - extents[1])
+        return len(Image.new(self.img.mode, (self.size[0], 1)).tobytes('raw', rawmode))
+    
+    def read(self, top, bottom):
+        """Liest die Zeilen [top, bottom) als Bild"""
+        width = self.size[0]
+        strip = Image.new(self.img.mode, (width, bottom - top))
+        fp = self.img.fp
+        
+        for tile_top, tile_bottom, offset, rawmode, stride, orientation in self.tiles:
+            first = max(top, tile_top)
+            last = min(bottom, tile_bottom)
+            if first >= last:
+                continue
+            
+            # Von unten nach oben gespeicherte Zeilen (BMP) liegen umgekehrt in der Datei
+            if orientation < 0:
+                fp.seek(offset + (tile_bottom - last) * stride)
+            else:
+                fp.seek(offset + (first - tile_top) * stride)
+            data = fp.read((last - first) * stride)
+            part = Image.frombytes(self.img.mode, (width, last - first), data,
+                                   'raw', rawmode, stride, orientation)
+            strip.paste(part, (0, first - top))
+        
+        return self._with_palette(strip)
+    
+    def strips(self, rows):
+        """Liefert das Bild als Folge von Streifen mit höchstens rows Zeilen"""
+        for top in range(0, self.size[1], rows):
+            yield self.read(top, min(top + rows, self.size[1]))
+
+
+class PngStripReader(StripReader):
+    """
+    Dekodiert PNG streifenweise. Die IDAT-Daten werden fortlaufend entpackt;
+    jeder Streifen wird zusammen mit der vorherigen (bereits entfilterten)
+    Zeile an Pillows PNG-Decoder gegeben, damit Filter wie Paeth über die
+    Streifengrenze hinweg korrekt aufgelöst werden.
+    """
+    def __init__(self, img):
+        super().__init__(img)
+        
+        fp = img.fp
+        fp.seek(0)
+        if fp.read(8) != PNG_SIGNATURE:
+            raise StreamingNotSupported("Keine gültige PNG-Datei")
+        length, chunk_type = struct.unpack('>I4s', fp.read(8))
+        header = fp.read(length)
+        _, _, bit_depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', header)
+        
+        if interlace or bit_depth != 8 or color_type not in PNG_CHANNELS:
+            raise StreamingNotSupported(
+                "Streaming unterstützt nur PNG mit 8 Bit je Kanal ohne Interlacing")
+        
+        args = img.tile[0][3]
+        self.rawmode = args[0] if isinstance(args, tuple) else args
+        self.row_bytes = self.size[0] * PNG_CHANNELS[color_type]
+    
+    def _idat_chunks(self):
+        """Liefert die IDAT-Nutzdaten der Datei in Reihenfolge"""
+        fp = self.img.fp
+        fp.seek(8)
+        while True:
+            header = fp.read(8)
+            if len(header) < 8:
+                return
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'IDAT':
+                yield fp.read(length)
+                fp.seek(4, io.SEEK_CUR)
+            elif chunk_type == b'IEND':
+                return
+            else:
+                fp.seek(length + 4, io.SEEK_CUR)
+    
+    def strips(self, rows):
+        """Liefert das Bild als Folge von Streifen mit höchstens rows Zeilen"""
+        width, height = self.size
+        line = self.row_bytes + 1
+        
+        chunks = self._idat_chunks()
+        inflater = zlib.decompressobj()
+        filtered = bytearray()
+        previous = bytes(self.row_bytes)
+        
+        for top in range(0, height, rows):
+            count = min(rows, height - top)
+            needed = count * line
+            
+            # Nur so viel entpacken, wie der Streifen benötigt - der Rest
+            # bleibt in unconsumed_tail bzw. in den noch nicht gelesenen Chunks
+            filtered.clear()
+            while len(filtered) < needed:
+                if inflater.unconsumed_tail:
+                    data = inflater.unconsumed_tail
+                else:
+                    data = next(chunks, None)
+                    if data is None:
+                        raise StreamingNotSupported("PNG-Bilddaten sind unvollständig")
+                filtered += inflater.decompress(data, needed - len(filtered))
+            
+            # Vorherige Zeile ungefiltert voranstellen, unkomprimiert einpacken
+            packer = zlib.compressobj(0)
+            packed = packer.compress(b'\x00' + previous) + packer.compress(filtered) + packer.flush()
+            strip = Image.new(self.img.mode, (width, count + 1))
+            decoder = Image._getdecoder(self.img.mode, 'zip', self.rawmode)
+            decoder.setimage(strip.im, (0, 0, width, count + 1))
+            decoder.decode(packed)
+            decoder.cleanup()
+            
+            strip = strip.crop((0, 1, width, count + 1))
+            previous = strip.crop((0, count - 1, width, count)).tobytes('raw', self.rawmode)
+            yield self._with_palette(strip)
+
+
+class BmpStripWriter:
+    """Schreibt BMP streifenweise (Zeilen von unten nach oben per seek)"""
+    MODES = {'L': ('L', 8), 'RGB': ('BGR', 24), 'RGBA': ('BGRA', 32)}
+    
+    def __init__(self, output_path, size, mode):
+        if mode not in self.MODES:
+            raise StreamingNotSupported(f"BMP-Streaming unterstützt keinen Modus {mode}")
+        self.size = size
+        self.rawmode, bits = self.MODES[mode]
+        self.stride = ((size[0] * bits + 31) // 32) * 4
+        
+        palette = b''.join(bytes((i, i, i, 0)) for i in range(256)) if mode == 'L' else b''
+        self.data_offset = 14 + 40 + len(palette)
+        image_size = self.stride * size[1]
+        
+        self.fp = open(output_path, 'wb')
+        self.fp.write(b'BM' + struct.pack('<IHHI', self.data_offset + image_size, 0, 0,
+                                          self.data_offset))
+        self.fp.write(struct.pack('<IiiHHIIiiII', 40, size[0], size[1], 1, bits, 0,
+                                  image_size, 2835, 2835, 256 if palette else 0, 0))
+        self.fp.write(palette)
+        self.rows = 0
+    
+    def write(self, strip):
+        bottom = self.rows + strip.size[1]
+        self.fp.seek(self.data_offset + (self.size[1] - bottom) * self.stride)
+        self.fp.write(strip.tobytes('raw', self.rawmode, self.stride, -1))
+        self.rows = bottom
+    
+    def close(self):
+        self.fp.close()
+
+
+class TiffStripWriter:
+    """
+    Schreibt TIFF streifenweise. Jeder Streifen wird von Pillow in einen
+    eigenen TIFF-Puffer kodiert (z.B. LZW); dessen Streifendaten werden
+    übernommen und am Ende in einem gemeinsamen IFD verzeichnet. Ausgaben,
+    die 4 GB überschreiten könnten, werden als BigTIFF geschrieben.
+    """
+    PHOTOMETRIC = {'L': 1, 'RGB': 2, 'RGBA': 2}
+    
+    def __init__(self, output_path, size, mode, save_kwargs):
+        if mode not in self.PHOTOMETRIC:
+            raise StreamingNotSupported(f"TIFF-Streaming unterstützt keinen Modus {mode}")
+        self.size = size
+        self.mode = mode
+        self.save_kwargs = save_kwargs
+        self.bands = len(mode)
+        self.big = size[0] * size[1] * self.bands * 1.5 > 2 ** 32 - 2 ** 24
+        
+        self.rows = 0
+        self.offsets = []
+        self.counts = []
+        self.rows_per_strip = None
+        self.compression = 1
+        self.predictor = None
+        
+        self.fp = open(output_path, 'wb')
+        if self.big:
+            self.fp.write(b'II' + struct.pack('<HHHQ', 43, 8, 0, 0))
+        else:
+            self.fp.write(b'II' + struct.pack('<HI', 42, 0))
+    
+    def write(self, strip):
+        if self.rows_per_strip is None:
+            self.rows_per_strip = strip.size[1]
+        
+        buffer = io.BytesIO()
+        strip.save(buffer, format='TIFF', tiffinfo={278: strip.size[1]}, **self.save_kwargs)
+        encoded = Image.open(buffer)
+        self.compression = encoded.tag_v2.get(259, 1)
+        self.predictor = encoded.tag_v2.get(317)
+        
+        data = buffer.getbuffer()
+        for offset, count in zip(encoded.tag_v2[273], encoded.tag_v2[279]):
+            self.offsets.append(self.fp.tell())
+            self.counts.append(count)
+            self.fp.write(data[offset:offset + count])
+        encoded.close()
+        self.rows += strip.size[1]
+    
+    def close(self):
+        long_type = 16 if self.big else 4
+        entries = [
+            (256, 4, [self.size[0]]),
+            (257, 4, [self.size[1]]),
+            (258, 3, [8] * self.bands),
+            (259, 3, [self.compression]),
+            (262, 3, [self.PHOTOMETRIC[self.mode]]),
+            (273, long_type, self.offsets),
+            (277, 3, [self.bands]),
+            (278, 4, [self.rows_per_strip or self.size[1]]),
+            (279, long_type, self.counts),
+            (284, 3, [1]),
+        ]
+        if self.predictor:
+            entries.append((317, 3, [self.predictor]))
+        if self.mode == 'RGBA':
+            entries.append((338, 3, [2]))  # Nicht vormultiplizierter Alphakanal
+        self._write_ifd(entries)
+        self.fp.close()
+    
+    def _write_ifd(self, entries):
+        """Schreibt das IFD ans Dateiende und trägt dessen Position im Header ein"""
+        formats = {3: 'H', 4: 'I', 16: 'Q'}
+        inline = 8 if self.big else 4
+        
+        # Werte, die nicht in den Eintrag passen, vor das IFD schreiben
+        packed = []
+        for tag, field_type, values in entries:
+            data = struct.pack(f'<{len(values)}{formats[field_type]}', *values)
+            if len(data) > inline:
+                if self.fp.tell() % 2:
+                    self.fp.write(b'\x00')
+                position = self.fp.tell()
+                self.fp.write(data)
+                data = struct.pack('<Q' if self.big else '<I', position)
+            packed.append((tag, field_type, len(values), data.ljust(inline, b'\x00')))
+        
+        if self.fp.tell() % 2:
+            self.fp.write(b'\x00')
+        ifd_offset = self.fp.tell()
+        if self.big:
+            self.fp.write(struct.pack('<Q', len(packed)))
+            for tag, field_type, count, data in packed:
+                self.fp.write(struct.pack('<HHQ', tag, field_type, count) + data)
+            self.fp.write(struct.pack('<Q', 0))
+            self.fp.seek(8)
+            self.fp.write(struct.pack('<Q', ifd_offset))
+        else:
+            self.fp.write(struct.pack('<H', len(packed)))
+            for tag, field_type, count, data in packed:
+                self.fp.write(struct.pack('<HHI', tag, field_type, count) + data)
+            self.fp.write(struct.pack('<I', 0))
+            self.fp.seek(4)
+            self.fp.write(struct.pack('<I', ifd_offset))
+
+
+class PngStripWriter:
+    """
+    Schreibt PNG streifenweise in einen durchgehenden Deflate-Strom. Die
+    Zeilenfilter wählt Pillow: Jeder Streifen wird mit der vorherigen Zeile
+    davor unkomprimiert kodiert, die gefilterten Zeilen werden entpackt und
+    ohne die Hilfszeile in den gemeinsamen Strom übernommen.
+    """
+    COLOR_TYPES = {'L': 0, 'RGB': 2, 'RGBA': 6}
+    
+    def __init__(self, output_path, size, mode, save_kwargs):
+        if mode not in self.COLOR_TYPES:
+            raise StreamingNotSupported(f"PNG-Streaming unterstützt keinen Modus {mode}")
+        self.size = size
+        self.mode = mode
+        self.row_bytes = size[0] * len(mode) + 1
+        self.deflater = zlib.compressobj(save_kwargs.get('compress_level', 6))
+        self.rows = 0
+        self.previous = None
+        self.pending = bytearray()
+        
+        self.fp = open(output_path, 'wb')
+        self.fp.write(PNG_SIGNATURE)
+        self._chunk(b'IHDR', struct.pack('>IIBBBBB', size[0], size[1], 8,
+                                          self.COLOR_TYPES[mode], 0, 0, 0))
+    
+    def _chunk(self, chunk_type, data):
+        self.fp.write(struct.pack('>I', len(data)) + chunk_type + data)
+        self.fp.write(struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+    
+    def _filtered_rows(self, strip):
+        """Gibt die von Pillow gefilterten Zeilen des Streifens zurück"""
+        width, count = strip.size
+        if self.previous is not None:
+            padded = Image.new(self.mode, (width, count + 1))
+            padded.paste(self.previous, (0, 0))
+            padded.paste(strip, (0, 1))
+        else:
+            padded = strip
+        
+        buffer = io.BytesIO()
+        padded.save(buffer, format='PNG', compress_level=0)
+        del padded
+        data = buffer.getbuffer()
+        
+        position = 8
+        inflater = zlib.decompressobj()
+        rows = bytearray()
+        while position < len(data):
+            length, chunk_type = struct.unpack('>I4s', data[position:position + 8])
+            if chunk_type == b'IDAT':
+                rows += inflater.decompress(data[position + 8:position + 8 + length])
+            position += length + 12
+        del data
+        buffer.close()
+        
+        skip = self.row_bytes if self.previous is not None else 0
+        self.previous = strip.crop((0, count - 1, width, count))
+        return memoryview(rows)[skip:]
+    
+    def write(self, strip):
+        self.pending += self.deflater.compress(self._filtered_rows(strip))
+        self.rows += strip.size[1]
+        while len(self.pending) >= PNG_CHUNK_SIZE:
+            self._chunk(b'IDAT', bytes(self.pending[:PNG_CHUNK_SIZE]))
+            del self.pending[:PNG_CHUNK_SIZE]
+    
+    def close(self):
+        self.pending += self.deflater.flush()
+        if self.pending:
+            self._chunk(b'IDAT', bytes(self.pending))
+        self._chunk(b'IEND', b'')
+        self.fp.close()
+
+
+def open_unbounded(input_path):
+    """
+    Öffnet ein Bild ohne Pillows Schutz vor Dekompressionsbomben - das
+    Speicherbudget übernimmt beim Streaming diese Aufgabe
+    """
+    limit = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        return Image.open(input_path)
+    finally:
+        Image.MAX_IMAGE_PIXELS = limit
+
+
+def stream_convert(img, output_path, job, converter):
+    """
+    Konvertiert ein geöffnetes Bild streifenweise innerhalb von job.max_memory.
+    Jeder Streifen läuft durch converter.prepare() (Farbmodus, Transparenz)
+    und wird bei Verkleinerung per reduce() um den ganzzahligen Faktor verkleinert.
+    """
+    from picconverter_core import get_save_kwargs
+    
+    output_format = job.output_format
+    if output_format not in STREAM_OUTPUT_FORMATS:
+        raise StreamingNotSupported(f"Streaming-Ausgabe als {output_format} nicht unterstützt")
+    
+    target = job.target_size(img.size)
+    factor = reduction_factor(img.size, target)
+    rows = strip_height(img.size[0], factor, job.max_memory)
+    
+    reader = open_strip_reader(img)
+    strip_job = replace(job, width=None, height=None, max_memory=None)
+    save_kwargs = get_save_kwargs(output_format, job.quality)
+    
+    writer = None
+    try:
+        for strip in reader.strips(rows):
+            strip = converter.prepare(strip, strip_job)
+            if strip.mode not in ('L', 'RGB', 'RGBA'):
+                strip = strip.convert('RGBA' if 'A' in strip.getbands() else 'RGB')
+            if factor > 1:
+                strip = strip.reduce(factor)
+                strip = strip.crop((0, 0, target[0], strip.size[1]))
+            
+            if writer is None:
+                writer = open_strip_writer(output_path, output_format, target,
+                                           strip.mode, save_kwargs)
+            
+            # Letzter Streifen kann bei abgerundeter Zielhöhe eine Zeile zu viel haben
+            remaining = target[1] - writer.rows
+            if strip.size[1] > remaining:
+                strip = strip.crop((0, 0, strip.size[0], remaining))
+            if strip.size[1]:
+                writer.write(strip)
+    finally:
+        if writer is not None:
+            writer.close()